@@ -0,0 +1,41 @@
+"""
+Settings for benchmarks and load tests: ``--settings=alx_travel_app.bench_settings``.
+
+Like the test settings, but with a database that outlives the process (a SQLite file, or
+BENCH_DATABASE_URL for a local Postgres), no rate limits, no query-budget stack capture,
+Chapa pointed at ``manage.py fake_chapa`` and email kept in memory instead of SendGrid.
+"""
+import os
+
+import dj_database_url
+from decouple import config
+
+from .test_settings import *  # noqa: F401,F403
+from .test_settings import BASE_DIR, REST_FRAMEWORK
+
+BENCH_DATABASE_URL = config("BENCH_DATABASE_URL", default="")
+if BENCH_DATABASE_URL:
+    DATABASES = {"default": dj_database_url.parse(BENCH_DATABASE_URL, conn_max_age=600)}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("BENCH_SQLITE_PATH", default=str(BASE_DIR / "bench.sqlite3")),
+            "OPTIONS": {"timeout": 30},
+        }
+    }
+
+DEBUG = False
+QUERY_BUDGET_MODE = ""
+
+# Measure the views, not the throttles: every scope gets an effectively unlimited rate.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_RATES": {scope: "1000000/second" for scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]},
+}
+
+# Local stand-ins: `manage.py fake_chapa` for the gateway, the locmem backend for SendGrid.
+CHAPA_BASE_URL = config("BENCH_CHAPA_BASE_URL", default="http://127.0.0.1:8765/v1")
+CHAPA_SECRET_KEY = os.environ.get("CHAPA_SECRET_KEY") or "bench-chapa-secret"
+CHAPA_WEBHOOK_SECRET = os.environ.get("CHAPA_WEBHOOK_SECRET") or "bench-webhook-secret"
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
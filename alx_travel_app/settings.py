@@ -3,13 +3,27 @@ Django settings for alx_travel_app project.
 """
 
 from pathlib import Path
-from decouple import config
+from kombu import Queue
+from decouple import Csv, config
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
 CHAPA_SECRET_KEY = os.getenv('CHAPA_SECRET_KEY')
+CHAPA_WEBHOOK_SECRET = os.getenv('CHAPA_WEBHOOK_SECRET')
+
+# Chapa HTTP client (see listings/Utils/chapa_client.py)
+CHAPA_BASE_URL = config("CHAPA_BASE_URL", default="https://api.chapa.co/v1")
+CHAPA_CONNECT_TIMEOUT = config("CHAPA_CONNECT_TIMEOUT", default=3.05, cast=float)
+CHAPA_READ_TIMEOUT = config("CHAPA_READ_TIMEOUT", default=10, cast=float)
+CHAPA_MAX_RETRIES = config("CHAPA_MAX_RETRIES", default=2, cast=int)
+CHAPA_BACKOFF_BASE = config("CHAPA_BACKOFF_BASE", default=0.25, cast=float)
+CHAPA_BACKOFF_MAX = config("CHAPA_BACKOFF_MAX", default=2.0, cast=float)
+CHAPA_POOL_MAXSIZE = config("CHAPA_POOL_MAXSIZE", default=10, cast=int)
+CHAPA_ASYNC_POOL_MAXSIZE = config("CHAPA_ASYNC_POOL_MAXSIZE", default=100, cast=int)  # per ASGI worker
+CHAPA_CIRCUIT_FAILURE_THRESHOLD = config("CHAPA_CIRCUIT_FAILURE_THRESHOLD", default=5, cast=int)
+CHAPA_CIRCUIT_RECOVERY_TIMEOUT = config("CHAPA_CIRCUIT_RECOVERY_TIMEOUT", default=30, cast=float)
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,16 +52,25 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "listings.Utils.metrics.MetricsMiddleware",  # first, so it times the whole stack
+    "listings.Utils.db_router.ReplicaStickinessMiddleware",  # read-your-writes for replica routing
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "listings.Utils.static.AsyncWhiteNoiseMiddleware",  # WhiteNoise, usable by the ASGI workers too
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "listings.Utils.query_budget.QueryBudgetMiddleware",
 ]
 
+# Per-view query budgets (views' ``query_budgets``): "log", "raise", or "" to disable. Dev only.
+QUERY_BUDGET_MODE = config("QUERY_BUDGET_MODE", default="log" if DEBUG else "")
+
+# /api/metrics/ is staff-only; a Prometheus scraper sends "Authorization: Bearer <METRICS_TOKEN>" instead.
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 # --------------------------
 # Static files
 # --------------------------
@@ -103,6 +126,20 @@ else:
         }
     }
 
+# Read replicas: comma separated database URLs, added as "replica1", "replica2", ... Listing, search and
+# export reads go to a healthy replica (listings/Utils/db_router.py); everything else uses "default".
+DATABASE_REPLICA_URLS = config("DATABASE_REPLICA_URLS", default="", cast=Csv())
+DATABASE_REPLICAS = []
+for _number, _url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f"replica{_number}"] = dj_database_url.parse(_url, conn_max_age=600)
+    DATABASE_REPLICAS.append(f"replica{_number}")
+DATABASE_ROUTERS = ["listings.Utils.db_router.ReplicaRouter"]
+# After a write, the client's replica reads stay on the primary this long (cover the replication lag).
+DATABASE_REPLICA_STICKY_SECONDS = config("DATABASE_REPLICA_STICKY_SECONDS", default=5, cast=int)
+DATABASE_REPLICA_STICKY_COOKIE = "db_primary_until"
+# How long an unreachable replica is skipped before it is tried again.
+DATABASE_REPLICA_RETRY_SECONDS = config("DATABASE_REPLICA_RETRY_SECONDS", default=30, cast=int)
+
 # --------------------------
 # Password validation
 # --------------------------
@@ -144,8 +181,8 @@ REST_FRAMEWORK = {
     
      # Enable throttling
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',   # unauthenticated users
-        'rest_framework.throttling.UserRateThrottle',   # authenticated users
+        'listings.Utils.throttling.GCRAAnonRateThrottle',   # unauthenticated users
+        'listings.Utils.throttling.GCRAUserRateThrottle',   # authenticated users
     ],
 
     'DEFAULT_THROTTLE_RATES': {
@@ -153,9 +190,65 @@ REST_FRAMEWORK = {
         'user': '20/minute',  # limit logged-in users
         'booking': '1/minute',  # custom scope
         'payment': '1/minute',  # custom scope
+        'booking_bulk': '5/minute',  # custom scope, each call carries up to BULK_BOOKING_MAX_ITEMS bookings
     },
 }
 
+# Cursor pagination for listing endpoints
+LISTINGS_PAGE_SIZE = config("LISTINGS_PAGE_SIZE", default=20, cast=int)
+LISTINGS_MAX_PAGE_SIZE = config("LISTINGS_MAX_PAGE_SIZE", default=100, cast=int)
+
+# Render listing and booking reads from .values() rows (listings/Utils/fast_serializers.py) instead of
+# model instances through DRF. Same JSON either way; False switches back to the plain serializers.
+FAST_SERIALIZERS = config("FAST_SERIALIZERS", default=True, cast=bool)
+
+# Rows fetched per server-side cursor round trip by the streaming exports (/api/exports/, manage.py export_data)
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
+
+# Bulk listing import (/api/listings/import/, manage.py import_listings): rows per validation batch and bulk_create,
+# and how many rejected rows are reported back individually.
+IMPORT_BATCH_SIZE = config("IMPORT_BATCH_SIZE", default=2000, cast=int)
+IMPORT_MAX_REPORTED_ERRORS = config("IMPORT_MAX_REPORTED_ERRORS", default=1000, cast=int)
+
+# Maximum number of bookings accepted by one /api/bookings/bulk/ request
+BULK_BOOKING_MAX_ITEMS = config("BULK_BOOKING_MAX_ITEMS", default=200, cast=int)
+
+# --------------------------
+# Cache (Redis when configured, per-process LocMem otherwise)
+# --------------------------
+REDIS_CACHE_URL = config("REDIS_CACHE_URL", default=None)
+
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Rate limiter state (listings/Utils/throttling.py). Shared Redis keeps limits cluster-wide;
+# empty falls back to per-process memory.
+THROTTLE_REDIS_URL = config("THROTTLE_REDIS_URL", default=REDIS_CACHE_URL or "")
+
+# Idempotency-Key support for booking and payment creation ("cache" = Redis/LocMem, "db" = IdempotencyRecord table)
+IDEMPOTENCY_BACKEND = config("IDEMPOTENCY_BACKEND", default="cache" if REDIS_CACHE_URL else "db")
+IDEMPOTENCY_TTL = config("IDEMPOTENCY_TTL", default=24 * 3600, cast=int)  # how long responses are replayable
+IDEMPOTENCY_LOCK_TIMEOUT = config("IDEMPOTENCY_LOCK_TIMEOUT", default=60, cast=int)  # max in-flight time
+IDEMPOTENCY_WAIT_TIMEOUT = config("IDEMPOTENCY_WAIT_TIMEOUT", default=10, cast=int)  # how long repeats wait
+
+# Read-through cache for listing responses; entries are also invalidated by table version bumps.
+# Versions are kept in the cache, so they are only seen by every worker with a shared (Redis) cache:
+# off by default with the per-process LocMem cache, where one worker's write would not reach the others.
+LISTINGS_CACHE = config("LISTINGS_CACHE", default=bool(REDIS_CACHE_URL), cast=bool)
+LISTINGS_CACHE_TTL = config("LISTINGS_CACHE_TTL", default=300, cast=int)
+LISTINGS_CACHE_LOCK_TIMEOUT = config("LISTINGS_CACHE_LOCK_TIMEOUT", default=5, cast=int)
+
 
 # BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -187,6 +280,84 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Lagos'
 
+# Queue topology: payment work never waits behind an email backlog. See README "Queues and worker profiles".
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_QUEUES = (
+    Queue("payments", routing_key="payments"),
+    Queue("notifications", routing_key="notifications"),
+    Queue("maintenance", routing_key="maintenance"),
+    Queue("default", routing_key="default"),
+)
+
+# Priorities 0-9 within a queue. RabbitMQ serves higher numbers first, the Redis transport
+# lower numbers first, so levels are written RabbitMQ-style and flipped for Redis.
+_REDIS_BROKER = CELERY_BROKER_URL.startswith(("redis://", "rediss://"))
+
+
+def _priority(level):
+    return 9 - level if _REDIS_BROKER else level
+
+
+CELERY_TASK_QUEUE_MAX_PRIORITY = 10  # x-max-priority on RabbitMQ queues
+CELERY_TASK_DEFAULT_PRIORITY = _priority(5)
+if _REDIS_BROKER:
+    CELERY_BROKER_TRANSPORT_OPTIONS = {
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    }
+
+CELERY_TASK_ROUTES = {
+    "listings.tasks.verify_payment": {"queue": "payments", "priority": _priority(8)},
+    "listings.tasks.process_chapa_webhook_event": {"queue": "payments", "priority": _priority(8)},
+    "listings.tasks.send_payment_status_email": {"queue": "notifications", "priority": _priority(7)},
+    "listings.tasks.send_notification_batch": {"queue": "notifications", "priority": _priority(6)},
+    "listings.tasks.send_booking_confirmation_email": {"queue": "notifications", "priority": _priority(5)},
+    "listings.tasks.send_bulk_booking_confirmation_emails": {"queue": "notifications", "priority": _priority(5)},
+    "listings.tasks.reconcile_pending_payments": {"queue": "maintenance"},
+    "listings.tasks.relay_outbox": {"queue": "maintenance", "priority": _priority(7)},
+    "listings.tasks.purge_idempotency_records": {"queue": "maintenance", "priority": _priority(2)},
+}
+
+# Reserve one message at a time per process: a long reconcile sweep must not sit on prefetched
+# payment tasks. The notifications worker profile raises this on its command line.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True  # tasks are idempotent; redeliver if a worker dies mid-task
+
+# Per-task rate limits (per worker instance)
+CHAPA_VERIFY_RATE_LIMIT = config("CHAPA_VERIFY_RATE_LIMIT", default="20/s")
+# Repeated verify requests for one payment queue a single task per window (seconds).
+CHAPA_VERIFY_DEDUP_SECONDS = config("CHAPA_VERIFY_DEDUP_SECONDS", default=30, cast=int)
+NOTIFICATION_TASK_RATE_LIMIT = config("NOTIFICATION_TASK_RATE_LIMIT", default="120/m")
+
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-pending-payments": {
+        "task": "listings.tasks.reconcile_pending_payments",
+        "schedule": config("PAYMENT_RECONCILE_INTERVAL", default=120, cast=int),
+    },
+    "purge-idempotency-records": {
+        "task": "listings.tasks.purge_idempotency_records",
+        "schedule": 3600,
+    },
+    "relay-outbox": {
+        "task": "listings.tasks.relay_outbox",
+        "schedule": 30,
+    },
+}
+
+# Transactional outbox relay (manage.py relay_outbox)
+OUTBOX_BATCH_SIZE = config("OUTBOX_BATCH_SIZE", default=100, cast=int)
+OUTBOX_POLL_INTERVAL = config("OUTBOX_POLL_INTERVAL", default=0.5, cast=float)  # seconds
+OUTBOX_RETENTION = config("OUTBOX_RETENTION", default=7 * 24 * 3600, cast=int)  # seconds to keep dispatched rows
+OUTBOX_CLAIM_TIMEOUT = config("OUTBOX_CLAIM_TIMEOUT", default=60, cast=int)  # seconds a relay leases its batch
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=5, cast=int)  # failed relays before a row is dead-lettered
+
+# Pending payment reconciliation (listings.tasks.reconcile_pending_payments)
+PAYMENT_RECONCILE_MIN_AGE = config("PAYMENT_RECONCILE_MIN_AGE", default=60, cast=int)  # seconds
+PAYMENT_RECONCILE_MAX_AGE = config("PAYMENT_RECONCILE_MAX_AGE", default=3 * 24 * 3600, cast=int)  # seconds
+PAYMENT_RECONCILE_BATCH_SIZE = config("PAYMENT_RECONCILE_BATCH_SIZE", default=100, cast=int)
+CHAPA_RECONCILE_CONCURRENCY = config("CHAPA_RECONCILE_CONCURRENCY", default=4, cast=int)
+
 
 # ----------------------
 # Sendgrid Email Configuration
@@ -198,3 +369,8 @@ SENDGRID_SANDBOX_MODE_IN_DEBUG = False
 SENDGRID_ECHO_TO_STDOUT = True
 
 EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="noreply@yourdomain.com")
+
+# Notification emails (listings/Utils/notifications.py)
+NOTIFICATION_BATCH_SIZE = config("NOTIFICATION_BATCH_SIZE", default=100, cast=int)  # emails per batch job
+NOTIFICATION_RATE_LIMIT = config("NOTIFICATION_RATE_LIMIT", default=20, cast=int)  # per recipient per window; 0 = off
+NOTIFICATION_RATE_WINDOW = config("NOTIFICATION_RATE_WINDOW", default=3600, cast=int)  # seconds
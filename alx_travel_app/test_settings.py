@@ -0,0 +1,41 @@
+"""
+Settings for the test suite: ``python manage.py test --settings=alx_travel_app.test_settings``.
+
+Runs against SQLite with in-process cache, email and rate limiting, so no Postgres,
+Redis, broker or SendGrid is needed.
+"""
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("SENDGRID_API_KEY", "test")
+os.environ.setdefault("REDIS_CACHE_URL", "")
+
+from .settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
+    # A second SQLite connection standing in for a read replica. As a test mirror it reads
+    # the default database's rows, over its own connection, so tests can tell which
+    # database served each query. It only sees committed rows: routing tests that use it
+    # are TransactionTestCases and enable it with override_settings(DATABASE_REPLICAS=...).
+    "replica1": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "TEST": {"MIRROR": "default"},
+    },
+}
+DATABASE_REPLICAS = []
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+LISTINGS_CACHE = True  # a single process, so LocMem table versions are shared
+THROTTLE_REDIS_URL = ""
+IDEMPOTENCY_BACKEND = "cache"
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+CELERY_TASK_ALWAYS_EAGER = True
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Fail loudly on any request that exceeds its view's query budget.
+QUERY_BUDGET_MODE = "raise"
@@ -0,0 +1,49 @@
+"""
+pytest-benchmark fixtures: Django on ``alx_travel_app.bench_settings`` (see pytest.ini) with a
+throwaway test database filled once by ``manage.py seed``.
+
+    pytest benchmarks/ --benchmark-autosave          # stores .benchmarks/<machine>/NNNN_<commit>.json
+    pytest benchmarks/ --benchmark-compare           # compares against the last saved run
+"""
+import io
+import os
+
+import django
+import pytest
+from django.apps import apps
+
+# pytest-django sets Django up from pytest.ini when pytest runs on benchmarks/; cover runs
+# started from the repository root (where nothing configures it) too.
+if not apps.ready:
+    os.environ["DJANGO_SETTINGS_MODULE"] = "alx_travel_app.bench_settings"
+    django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from listings.Utils.throttling import reset_limiter  # noqa: E402
+
+# Rows generated for the in-process benchmarks; override with BENCH_LISTINGS etc. for bigger runs.
+SEED_SIZES = {
+    "users": int(os.environ.get("BENCH_USERS", 200)),
+    "listings": int(os.environ.get("BENCH_LISTINGS", 5000)),
+    "bookings": int(os.environ.get("BENCH_BOOKINGS", 10000)),
+    "reviews": int(os.environ.get("BENCH_REVIEWS", 10000)),
+    "payments": int(os.environ.get("BENCH_PAYMENTS", 5000)),
+}
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    """The test database, seeded with the same data on every run."""
+    with django_db_blocker.unblock():
+        call_command("seed", seed=42, stdout=io.StringIO(), **SEED_SIZES)
+
+
+@pytest.fixture
+def api(db):
+    """An API client that starts cold: no cached pages, no rate-limit history."""
+    cache.clear()
+    reset_limiter()
+    return APIClient()
@@ -0,0 +1,113 @@
+"""Serializer timings in isolation: rendering listing pages and validating incoming bookings and reviews."""
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.utils import timezone
+
+from listings.models import Booking, Listing, Review
+from listings.serializers import (BookingSerializer, ListingSerializer, ReviewSerializer, fast_booking_serializer,
+                                  fast_listing_serializer, fast_review_serializer)
+
+pytest.importorskip("pytest_benchmark")
+
+PAGE_SIZE = 100
+
+# Rows rendered by the DRF vs fast path comparison, and benchmark rounds per size (100k DRF rounds take seconds).
+RENDER_ROUNDS = {1_000: 20, 10_000: 5, 100_000: 3}
+
+
+@pytest.fixture
+def page(db):
+    return list(Listing.objects.order_by("pk")[:PAGE_SIZE])
+
+
+def test_listing_page_full(benchmark, page):
+    data = benchmark(lambda: ListingSerializer(page, many=True).data)
+    assert len(data) == len(page)
+
+
+def test_listing_page_sparse_fields(benchmark, page):
+    fields = ["listing_id", "title", "price", "rating_avg"]
+    data = benchmark(lambda: ListingSerializer(page, many=True, fields=fields).data)
+    assert set(data[0]) == set(fields)
+
+
+def test_booking_validation(benchmark, page):
+    check_in = timezone.localdate() + timedelta(days=30)
+    body = {"listing": str(page[0].pk), "email": "bench@example.com", "check_in": str(check_in),
+            "check_out": str(check_in + timedelta(days=2))}
+    context = {"request": SimpleNamespace(user=AnonymousUser()), "listings": {page[0].pk: page[0]}}
+    assert benchmark(lambda: BookingSerializer(data=body, context=context).is_valid())
+
+
+def test_review_validation(benchmark, page):
+    body = {"listing": str(page[0].pk), "rating": 4, "comment": "Great location, would recommend."}
+    context = {"request": SimpleNamespace(user=get_user_model().objects.order_by("pk").first())}
+    assert benchmark(lambda: ReviewSerializer(data=body, context=context).is_valid())
+
+
+def _listing_row(rng, now):
+    counts = [rng.randint(0, 20) for _ in range(5)]
+    return {"listing_id": uuid.UUID(int=rng.getrandbits(128), version=4), "title": f"Villa {rng.random()}",
+            "description": "Sea view villa with a garden", "price": Decimal(rng.randint(2000, 90000)) / 100,
+            "location": "Addis Ababa", "created_at": now - timedelta(seconds=rng.randint(0, 10 ** 7)),
+            "rating_avg": Decimal(rng.randint(100, 500)) / 100, "rating_count": sum(counts),
+            **{f"rating_{star}_count": count for star, count in enumerate(counts, 1)}}
+
+
+def _booking_row(rng, now):
+    check_in = now.date() + timedelta(days=rng.randint(1, 300))
+    return {"booking_id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "listing_id": uuid.UUID(int=rng.getrandbits(128), version=4), "user_id": None,
+            "email": "guest@example.com", "status": "pending", "check_in": check_in,
+            "check_out": check_in + timedelta(days=2), "created_at": now}
+
+
+def _review_row(rng, now):
+    return {"review_id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "listing_id": uuid.UUID(int=rng.getrandbits(128), version=4), "user_id": 1,
+            "rating": rng.randint(1, 5), "comment": "Lovely stay overall", "created_at": now}
+
+
+RENDER_KINDS = {
+    "listing": (Listing, ListingSerializer, fast_listing_serializer, _listing_row),
+    "booking": (Booking, BookingSerializer, fast_booking_serializer, _booking_row),
+    "review": (Review, ReviewSerializer, fast_review_serializer, _review_row),
+}
+_render_rows = {}
+
+
+def render_rows(kind, size):
+    """``size`` synthetic ``.values()`` rows of ``kind`` and the matching model instances, built once per run."""
+    if (kind, size) not in _render_rows:
+        model, _, _, make_row = RENDER_KINDS[kind]
+        rng, now = random.Random(size), timezone.now()
+        rows = [make_row(rng, now) for _ in range(size)]
+        _render_rows[kind, size] = rows, [model(**row) for row in rows]
+    return _render_rows[kind, size]
+
+
+@pytest.mark.parametrize("size", list(RENDER_ROUNDS))
+@pytest.mark.parametrize("kind", list(RENDER_KINDS))
+def test_render_drf(benchmark, kind, size):
+    benchmark.group = f"render-{kind}-{size}"
+    _, objects = render_rows(kind, size)
+    serializer_class = RENDER_KINDS[kind][1]
+    data = benchmark.pedantic(lambda: serializer_class(objects, many=True).data, rounds=RENDER_ROUNDS[size])
+    assert len(data) == size
+
+
+@pytest.mark.parametrize("size", list(RENDER_ROUNDS))
+@pytest.mark.parametrize("kind", list(RENDER_KINDS))
+def test_render_fast(benchmark, kind, size):
+    benchmark.group = f"render-{kind}-{size}"
+    rows, _ = render_rows(kind, size)
+    fast = RENDER_KINDS[kind][2]
+    data = benchmark.pedantic(lambda: fast.serialize_rows(rows), rounds=RENDER_ROUNDS[size])
+    assert len(data) == size
@@ -0,0 +1,72 @@
+"""In-process request timings for the API views (full Django + DRF stack, no network)."""
+import itertools
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from listings.models import Listing, Payments
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def listing(db):
+    return Listing.objects.order_by("pk").first()
+
+
+def get_ok(api, url, expected=200):
+    response = api.get(url)
+    assert response.status_code == expected, response.content[:500]
+    return response
+
+
+def test_listing_list_cold(benchmark, api):
+    benchmark.pedantic(get_ok, args=(api, "/api/listings/"), setup=cache.clear, rounds=200, warmup_rounds=5)
+
+
+def test_listing_list_cached(benchmark, api):
+    benchmark(get_ok, api, "/api/listings/")
+
+
+def test_listing_list_filtered(benchmark, api, listing):
+    url = f"/api/listings/?location={listing.location}&sort=price_asc&fields=listing_id,title,price"
+    benchmark.pedantic(get_ok, args=(api, url), setup=cache.clear, rounds=200, warmup_rounds=5)
+
+
+def test_listing_search(benchmark, api):
+    benchmark(get_ok, api, "/api/listings/search/?q=villa")
+
+
+def test_listing_availability(benchmark, api):
+    check_in = timezone.localdate() + timedelta(days=10)
+    benchmark(get_ok, api, f"/api/listings/availability/?check_in={check_in}&check_out={check_in + timedelta(days=3)}")
+
+
+def test_booking_create(benchmark, api, listing):
+    # Every round books a different stay far in the future, so none of them conflict.
+    stays = itertools.count(1000)
+
+    def book():
+        check_in = timezone.localdate() + timedelta(days=next(stays) * 2)
+        body = {"listing": str(listing.pk), "email": "bench@example.com", "check_in": str(check_in),
+                "check_out": str(check_in + timedelta(days=1))}
+        response = api.post("/api/bookings/", body, format="json")
+        assert response.status_code == 201, response.content[:500]
+
+    benchmark(book)
+
+
+def test_payment_status(benchmark, api):
+    reference = Payments.objects.order_by("pk").values_list("trxn_reference", flat=True).first()
+    benchmark(get_ok, api, f"/api/payments/status/{reference}/")
+
+
+def test_payment_verify_settled(benchmark, api):
+    reference = Payments.objects.exclude(status="pending").order_by("pk").values_list("trxn_reference", flat=True)[0]
+    benchmark(get_ok, api, f"/api/payments/verify/{reference}/")
+
+
+def test_health(benchmark, api):
+    benchmark(get_ok, api, "/api/health/")
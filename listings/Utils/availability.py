@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from ..models import Booking, Listing
+
+# PostgreSQL exclusion constraint on overlapping active stays (migration 0012_booking_dates).
+OVERLAP_CONSTRAINT = "booking_no_overlap"
+
+
+class BookingConflict(APIException):
+    """Raised when the requested dates overlap an existing booking for the listing."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The listing is already booked for some of the requested dates."
+    default_code = "booking_conflict"
+
+
+def available_listings(queryset, check_in, check_out):
+    """
+    Restrict a Listing queryset to listings free for the whole ``[check_in, check_out)`` stay.
+
+    Compiles to a single ``NOT EXISTS`` anti-join served by the
+    ``(listing, check_in, check_out)`` booking index, however many listings match.
+    """
+    busy = Booking.objects.overlapping(check_in, check_out).filter(listing=OuterRef("pk"))
+    return queryset.filter(~Exists(busy))
+
+
+def lock_listings(listing_ids):
+    """
+    Take row locks on the given listings for the rest of the current transaction.
+
+    Rows are locked in primary key order so two transactions locking overlapping
+    sets cannot deadlock. Concurrent bookings for the same listing queue here
+    instead of both passing the overlap check.
+    """
+    return list(
+        Listing.objects.select_for_update().filter(pk__in=listing_ids).order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def is_overlap_violation(exc):
+    """
+    Tell whether an IntegrityError comes from the ``booking_no_overlap`` exclusion constraint.
+
+    Other integrity errors (NOT NULL, foreign keys, check constraints) are bugs or
+    bad data, not taken dates, and must not be reported as a booking conflict.
+    """
+    diag = getattr(exc.__cause__, "diag", None)  # psycopg / psycopg2 error details
+    constraint = getattr(diag, "constraint_name", None)
+    if constraint is not None:
+        return constraint == OVERLAP_CONSTRAINT
+    return OVERLAP_CONSTRAINT in str(exc)
+
+
+def create_booking(create, listing_id, check_in, check_out):
+    """
+    Create a booking only if its dates are still free.
+
+    Args:
+        create (Callable[[], Booking]): Performs the actual insert, e.g. ``super().create``.
+        listing_id: Primary key of the booked listing.
+        check_in (date): First night.
+        check_out (date): Departure day (exclusive).
+
+    Raises:
+        BookingConflict: If an active booking overlaps the requested stay.
+    """
+    with transaction.atomic():
+        lock_listings([listing_id])
+        if Booking.objects.overlapping(check_in, check_out).filter(listing_id=listing_id).exists():
+            raise BookingConflict()
+        try:
+            with transaction.atomic():
+                return create()
+        except IntegrityError as exc:
+            # The PostgreSQL exclusion constraint caught a race the lock did not.
+            if is_overlap_violation(exc):
+                raise BookingConflict() from exc
+            raise
+
+
+def create_bookings_bulk(bookings):
+    """
+    Insert many unsaved bookings at once, skipping any whose dates are taken.
+
+    All affected listings are locked up front, existing bookings that could clash
+    are read with one query, and conflicts inside the batch itself are detected
+    too. Everything that fits is written with a single ``bulk_create``.
+
+    Args:
+        bookings (list[Booking]): Unsaved bookings with listing and dates set.
+
+    Returns:
+        tuple[list[Booking], set[int]]: The created bookings, and the positions in
+        ``bookings`` that were rejected as conflicts.
+    """
+    if not bookings:
+        return [], set()
+
+    listing_ids = {booking.listing_id for booking in bookings}
+    with transaction.atomic():
+        lock_listings(listing_ids)
+
+        taken = defaultdict(list)
+        existing = Booking.objects.active().filter(
+            listing_id__in=listing_ids,
+            check_in__lt=max(booking.check_out for booking in bookings),
+            check_out__gt=min(booking.check_in for booking in bookings),
+        ).values_list("listing_id", "check_in", "check_out")
+        for listing_id, check_in, check_out in existing:
+            taken[listing_id].append((check_in, check_out))
+
+        accepted, conflicts = [], set()
+        for position, booking in enumerate(bookings):
+            ranges = taken[booking.listing_id]
+            if any(check_in < booking.check_out and check_out > booking.check_in for check_in, check_out in ranges):
+                conflicts.add(position)
+                continue
+            ranges.append((booking.check_in, booking.check_out))
+            accepted.append(booking)
+
+        try:
+            with transaction.atomic():
+                Booking.objects.bulk_create(accepted)
+        except IntegrityError as exc:
+            if is_overlap_violation(exc):
+                raise BookingConflict() from exc
+            raise
+
+    return accepted, conflicts
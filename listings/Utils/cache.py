@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Striped per-process locks so concurrent threads in one worker share a single recompute
+# without keeping a lock object alive for every cache key ever seen.
+_LOCK_STRIPES = [threading.Lock() for _ in range(64)]
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def _version_key(table):
+    return f"tableversion:{table}"
+
+
+def get_table_version(table):
+    """
+    Return the current cache version for a table.
+
+    Versions are the microsecond timestamp of the last committed write, so a version
+    evicted from the cache comes back as a fresh, larger value instead of restarting
+    at a number an old cache entry might still carry.
+    """
+    key = _version_key(table)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _now_us(), timeout=None)
+        version = cache.get(key) or _now_us()
+    return version
+
+
+def get_table_versions(*tables):
+    return [get_table_version(table) for table in tables]
+
+
+def bump_table_version(*tables):
+    """Invalidate every cached response built from ``tables`` by moving them to a new version."""
+    now = _now_us()
+    cache.set_many({_version_key(table): now for table in tables}, timeout=None)
+
+
+def canonical_query(request):
+    """Encode the request's query parameters in a stable order, for cache keys and validators."""
+    return urlencode(sorted(request.GET.lists()), doseq=True)
+
+
+def build_cache_key(prefix, tables, params=""):
+    """
+    Build a cache key that changes whenever one of ``tables`` is written to.
+
+    Args:
+        prefix (str): Namespace for the cached response, e.g. ``"listings:list"``.
+        tables (Iterable[str]): Tables the response is built from.
+        params (str): Canonical request parameters (already sorted/encoded).
+    """
+    versions = ".".join(str(version) for version in get_table_versions(*tables))
+    digest = hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+    return f"{prefix}:{versions}:{digest}"
+
+
+def get_or_compute(key, compute, ttl=None):
+    """
+    Read-through cache lookup with single-flight recompute.
+
+    On a miss only one caller recomputes the value: threads in the same process
+    queue on a striped lock, and other processes see a short-lived ``<key>:lock``
+    entry and poll for the result instead of hitting the database themselves.
+    A waiter that outlives ``LISTINGS_CACHE_LOCK_TIMEOUT`` computes the value itself.
+
+    Args:
+        key (str): Cache key, normally from build_cache_key().
+        compute (Callable[[], Any]): Builds the value on a miss. Must not return None.
+        ttl (int | None): Seconds to keep the value; defaults to LISTINGS_CACHE_TTL.
+
+    With LISTINGS_CACHE off (no shared cache, so no shared table versions) the
+    value is computed on every call.
+    """
+    if not settings.LISTINGS_CACHE:
+        return compute()
+
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    ttl = settings.LISTINGS_CACHE_TTL if ttl is None else ttl
+    lock_timeout = settings.LISTINGS_CACHE_LOCK_TIMEOUT
+
+    with _LOCK_STRIPES[hash(key) % len(_LOCK_STRIPES)]:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, timeout=lock_timeout):
+            try:
+                value = compute()
+                cache.set(key, value, timeout=ttl)
+                return value
+            finally:
+                cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    return compute()
+
+
+def table_etag(prefix, tables):
+    """
+    Build an ``etag_func`` for ``django.views.decorators.http.condition``.
+
+    The ETag is derived from the table versions and the query string only, so a
+    matching ``If-None-Match`` is answered with a 304 before any query or
+    serializer runs. No ETag is sent with LISTINGS_CACHE off: per-process versions
+    would miss other workers' writes and keep answering 304.
+    """
+
+    def etag_func(request, *args, **kwargs):
+        if not settings.LISTINGS_CACHE:
+            return None
+        versions = ".".join(str(version) for version in get_table_versions(*tables))
+        validator = f"{prefix}:{versions}:{canonical_query(request)}:{args}:{sorted(kwargs.items())}"
+        return hashlib.md5(validator.encode(), usedforsecurity=False).hexdigest()
+
+    return etag_func
+
+
+def table_last_modified(tables):
+    """
+    Build a ``last_modified_func`` returning the time of the latest committed write to ``tables``
+    (or None, so no Last-Modified header, with LISTINGS_CACHE off).
+    """
+
+    def last_modified_func(request, *args, **kwargs):
+        if not settings.LISTINGS_CACHE:
+            return None
+        return datetime.fromtimestamp(max(get_table_versions(*tables)) / 1_000_000, tz=timezone.utc)
+
+    return last_modified_func
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .metrics import observe_chapa_call
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ChapaError(Exception):
+    """Base class for Chapa gateway errors."""
+
+
+class ChapaUnavailable(ChapaError):
+    """Chapa could not be reached (timeouts, connection errors, or the circuit breaker is open)."""
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail fast for ``recovery_timeout`` seconds. Then a single trial call is let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold, recovery_timeout):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    logger.warning(f"Chapa circuit breaker opened after {self._failures} consecutive failure(s)")
+                # (Re)start the open period; a failed half-open trial re-opens the circuit.
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ChapaClient:
+    """
+    HTTP client for the Chapa payment gateway.
+
+    Reuses one pooled ``requests.Session`` (keep-alive, so no TLS handshake per
+    call), applies connect/read timeouts to every request, retries idempotent
+    calls with jittered exponential backoff, and fails fast through a circuit
+    breaker while Chapa is down. Use ``get_chapa_client()`` to share one instance
+    per worker process.
+    """
+
+    def __init__(self, base_url=None, secret_key=None, session=None, breaker=None):
+        self.base_url = (base_url or settings.CHAPA_BASE_URL).rstrip("/")
+        self.secret_key = secret_key if secret_key is not None else settings.CHAPA_SECRET_KEY
+        self.timeout = (settings.CHAPA_CONNECT_TIMEOUT, settings.CHAPA_READ_TIMEOUT)
+        self.max_retries = settings.CHAPA_MAX_RETRIES
+        self.backoff_base = settings.CHAPA_BACKOFF_BASE
+        self.backoff_max = settings.CHAPA_BACKOFF_MAX
+        self.breaker = breaker or CircuitBreaker(
+            settings.CHAPA_CIRCUIT_FAILURE_THRESHOLD, settings.CHAPA_CIRCUIT_RECOVERY_TIMEOUT
+        )
+        self.session = session or self._build_session()
+
+    @staticmethod
+    def _build_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.CHAPA_POOL_MAXSIZE, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _headers(self):
+        return {"Authorization": f"Bearer {self.secret_key}"}
+
+    def _backoff(self, attempt):
+        """Full jitter: sleep a random time up to the capped exponential delay."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _parse(response):
+        try:
+            return response.json()
+        except ValueError:
+            return {"status": "failed", "message": response.text[:500]}
+
+    def _request(self, operation, method, path, idempotent, **kwargs):
+        """
+        Send a request and return ``(status_code, data)``.
+
+        Raises:
+            ChapaUnavailable: If the circuit is open or the request kept failing at the transport level.
+        """
+        url = f"{self.base_url}{path}"
+        attempts = self.max_retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            if not self.breaker.allow_request():
+                raise ChapaUnavailable("Chapa circuit breaker is open")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=self._headers(), timeout=self.timeout, **kwargs)
+            except requests.RequestException as exc:
+                observe_chapa_call(operation, "error", time.perf_counter() - started)
+                self.breaker.record_failure()
+                logger.warning(f"Chapa {method} {path} failed on attempt {attempt + 1}/{attempts}: {exc}")
+                if attempt + 1 >= attempts:
+                    raise ChapaUnavailable(str(exc)) from exc
+                time.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                # Any other exit (a bug, a worker timeout, KeyboardInterrupt) still settles the call,
+                # so a half-open trial can't stay in flight and wedge the breaker.
+                self.breaker.record_failure()
+                raise
+
+            observe_chapa_call(operation, str(response.status_code), time.perf_counter() - started)
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt + 1 < attempts:
+                logger.warning(f"Chapa {method} {path} returned {response.status_code}, retrying")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            return response.status_code, self._parse(response)
+
+    def initialize(self, payload):
+        """Start a transaction. Not retried: a lost response could otherwise create a second charge."""
+        return self._request("initialize", "POST", "/transaction/initialize", idempotent=False, json=payload)
+
+    def verify(self, reference):
+        """Look up a transaction by reference. Safe to retry."""
+        return self._request("verify", "GET", f"/transaction/verify/{reference}", idempotent=True)
+
+
+class AsyncChapaClient(ChapaClient):
+    """
+    ChapaClient for async views: the same timeouts, retries, backoff and circuit
+    breaker, over a pooled ``httpx.AsyncClient``, so a worker waits on many Chapa
+    calls at once instead of one per thread. Use ``get_async_chapa_client()``.
+    """
+
+    def _build_session(self):
+        connect_timeout, read_timeout = self.timeout
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=settings.CHAPA_ASYNC_POOL_MAXSIZE,
+                                max_keepalive_connections=settings.CHAPA_ASYNC_POOL_MAXSIZE),
+        )
+
+    async def _request(self, operation, method, path, idempotent, **kwargs):
+        """
+        Send a request and return ``(status_code, data)``.
+
+        Raises:
+            ChapaUnavailable: If the circuit is open or the request kept failing at the transport level.
+        """
+        url = f"{self.base_url}{path}"
+        attempts = self.max_retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            if not self.breaker.allow_request():
+                raise ChapaUnavailable("Chapa circuit breaker is open")
+
+            started = time.perf_counter()
+            try:
+                response = await self.session.request(method, url, headers=self._headers(), **kwargs)
+            except httpx.HTTPError as exc:
+                observe_chapa_call(operation, "error", time.perf_counter() - started)
+                self.breaker.record_failure()
+                logger.warning(f"Chapa {method} {path} failed on attempt {attempt + 1}/{attempts}: {exc!r}")
+                if attempt + 1 >= attempts:
+                    raise ChapaUnavailable(repr(exc)) from exc
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                # Includes asyncio.CancelledError when the client disconnects mid-call: the breaker is
+                # shared with the sync client, so a trial left in flight would block both.
+                self.breaker.record_failure()
+                raise
+
+            observe_chapa_call(operation, str(response.status_code), time.perf_counter() - started)
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt + 1 < attempts:
+                logger.warning(f"Chapa {method} {path} returned {response.status_code}, retrying")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            return response.status_code, self._parse(response)
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncChapaClient
+
+
+def get_chapa_client():
+    """
+    Return this process's shared ChapaClient.
+
+    The client is rebuilt after a fork so gunicorn/celery children never share
+    pooled sockets with their parent.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = ChapaClient()
+                _client_pid = pid
+    return _client
+
+
+def get_async_chapa_client():
+    """
+    Return the AsyncChapaClient of the running event loop.
+
+    An ``httpx.AsyncClient`` belongs to the loop it was first used on, so each loop
+    (one per uvicorn worker) gets its own. All of them share the sync client's
+    circuit breaker, so a Chapa outage seen by either path opens it for both.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncChapaClient(breaker=get_chapa_client().breaker)
+    return client
@@ -0,0 +1,239 @@
+import functools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from listings.Utils.cache import get_table_versions
+
+logger = logging.getLogger(__name__)
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_request_state = ContextVar("replica_request_state", default=None)
+
+
+class RoutingState:
+    """Per-request routing facts: pinned by the client's cookie, or because this request wrote."""
+
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.wrote = False
+        self.replica = None  # chosen on the first replica read, then kept for the whole request
+
+    @property
+    def pinned(self):
+        return self.sticky or self.wrote
+
+
+class ReplicaHealth:
+    """
+    Per-process record of replicas that could not be reached.
+
+    A replica whose connection fails is skipped for ``DATABASE_REPLICA_RETRY_SECONDS``,
+    then tried again. Routing only checks that a connection can be opened, so a
+    healthy replica costs no extra query; :meth:`probe` also round-trips to it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = {}  # alias -> monotonic time to retry at
+
+    def is_healthy(self, alias):
+        down_until = self._down_until.get(alias)
+        if down_until is not None and time.monotonic() < down_until:
+            return False
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError as exc:
+            self.mark_down(alias, exc)
+            return False
+        self._up(alias, down_until)
+        return True
+
+    def probe(self, alias):
+        """Check that ``alias`` answers (for health checks), updating its state."""
+        down_until = self._down_until.get(alias)
+        try:
+            connection = connections[alias]
+            connection.ensure_connection()
+            if not connection.is_usable():
+                raise DatabaseError("connection is not usable")
+        except DatabaseError as exc:
+            self.mark_down(alias, exc)
+            return False
+        self._up(alias, down_until)
+        return True
+
+    def _up(self, alias, down_until):
+        if down_until is not None:
+            with self._lock:
+                self._down_until.pop(alias, None)
+            logger.info(f"Read replica {alias} is back")
+
+    def mark_down(self, alias, reason=""):
+        with self._lock:
+            first = alias not in self._down_until
+            self._down_until[alias] = time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+        connections[alias].close()
+        if first:
+            logger.warning(f"Read replica {alias} unavailable, reading from the primary: {reason}")
+
+    def reset(self):
+        with self._lock:
+            self._down_until.clear()
+
+
+health = ReplicaHealth()
+
+
+def choose_replica():
+    """Return a random healthy replica alias, or the primary when none is available."""
+    candidates = list(settings.DATABASE_REPLICAS)
+    random.shuffle(candidates)
+    for alias in candidates:
+        if health.is_healthy(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """
+    Send opted-in reads to a read replica and everything else to the primary.
+
+    Only code running under :func:`replica_reads` (or a view method decorated with
+    :func:`reads_from_replica`) reads from a replica; all other reads, and every
+    write, use ``default``. Requests from a client that wrote in the last
+    ``DATABASE_REPLICA_STICKY_SECONDS`` (see ReplicaStickinessMiddleware), or that
+    already wrote themselves, stay on the primary so they read their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        state = _request_state.get()
+        if state is None:
+            return choose_replica()
+        if state.pinned:
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            state.replica = choose_replica()
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication.
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+def changed_recently(tables):
+    """
+    True while any of ``tables`` was written within ``DATABASE_REPLICA_STICKY_SECONDS``,
+    i.e. while a replica may not have the rows behind the tables' current cache version.
+    """
+    newest_us = max(get_table_versions(*tables))
+    return time.time() - newest_us / 1_000_000 < settings.DATABASE_REPLICA_STICKY_SECONDS
+
+
+@contextmanager
+def replica_reads(unless_changed=()):
+    """
+    Route the block's ORM reads to a replica (unless the request is pinned to the primary).
+
+    Args:
+        unless_changed (Iterable[str]): Tables whose cache version the block's results are
+            stored or validated under. While one of them changed recently the block reads
+            from the primary, so a lagging replica can't fill a new version with old rows.
+    """
+    if unless_changed and settings.LISTINGS_CACHE and settings.DATABASE_REPLICAS and changed_recently(unless_changed):
+        yield
+        return
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reads_from_replica(view_method=None, *, unless_changed=()):
+    """
+    Decorate a read-only view method so its queries may be served by a replica.
+
+    Use ``@reads_from_replica(unless_changed=tables)`` for views whose responses are
+    cached or validated by the table versions of ``tables`` (see :func:`replica_reads`).
+    """
+    if view_method is None:
+        return functools.partial(reads_from_replica, unless_changed=unless_changed)
+
+    @functools.wraps(view_method)
+    def wrapper(*args, **kwargs):
+        with replica_reads(unless_changed):
+            return view_method(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes for clients: after a request that wrote to the primary, set a
+    short-lived cookie that keeps the client's replica-eligible reads on the primary
+    until the replicas have caught up. A no-op when no replicas are configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = self._state(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state = self._state(request)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self._finish(state, response)
+
+    @staticmethod
+    def _state(request):
+        try:
+            until = float(request.COOKIES.get(settings.DATABASE_REPLICA_STICKY_COOKIE, 0))
+        except ValueError:
+            until = 0
+        return RoutingState(sticky=until > time.time())
+
+    @staticmethod
+    def _finish(state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(settings.DATABASE_REPLICA_STICKY_COOKIE, f"{time.time() + seconds:.3f}",
+                                max_age=seconds, httponly=True, samesite="Lax")
+        return response
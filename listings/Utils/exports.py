@@ -0,0 +1,162 @@
+import csv
+import io
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import serializers
+
+from ..models import Booking, Listing, Payments
+from .fast_serializers import FastSerializer
+
+FORMATS = {
+    # format -> (content type, file extension)
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+FLUSH_BYTES = 64 * 1024  # stream output in chunks of about this size
+
+
+class ListingExportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Listing
+        fields = ['listing_id', 'title', 'description', 'price', 'location', 'created_at', 'rating_avg',
+                  'rating_count', 'rating_sum', 'rating_1_count', 'rating_2_count', 'rating_3_count',
+                  'rating_4_count', 'rating_5_count']
+
+
+class BookingExportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Booking
+        fields = ['booking_id', 'listing', 'user', 'email', 'status', 'check_in', 'check_out', 'created_at']
+
+
+class PaymentExportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payments
+        fields = ['payment_id', 'booking', 'amount', 'status', 'trxn_reference', 'chapa_reference', 'created_at',
+                  'updated_at']
+
+
+# Flat, one-row-per-record shapes (foreign keys as IDs) that work the same in NDJSON and CSV.
+DATASETS = {
+    "listings": FastSerializer(ListingExportSerializer),
+    "bookings": FastSerializer(BookingExportSerializer),
+    "payments": FastSerializer(PaymentExportSerializer),
+}
+
+
+def export_rows(dataset, created_after=None, created_before=None, using=None):
+    """
+    Stream every row of ``dataset`` in primary key order, rendered in batches.
+
+    Rows come off a server-side cursor (``.iterator()``) and are rendered
+    ``EXPORT_CHUNK_SIZE`` at a time, so memory stays flat however big the table is.
+
+    Yields:
+        dict: One JSON-ready row per record.
+    """
+    fast = DATASETS[dataset]
+    queryset = fast.serializer_class.Meta.model.objects.using(using)
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    if created_before:
+        queryset = queryset.filter(created_at__lt=created_before)
+
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    batch = []
+    for row in queryset.order_by("pk").values(*fast.columns()).iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield from fast.serialize_rows(batch)
+            batch = []
+    if batch:
+        yield from fast.serialize_rows(batch)
+
+
+def encode_ndjson(dataset, rows):
+    """Yield one JSON document per line."""
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+# Leading characters that make spreadsheet apps evaluate a cell as a formula.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """
+    Prefix text a spreadsheet would run as a formula with ``'`` (CSV injection).
+
+    Other values pass through, including signed numbers rendered as text, such as
+    a negative decimal amount.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        try:
+            float(value)
+        except ValueError:
+            return "'" + value
+    return value
+
+
+def encode_csv(dataset, rows):
+    """
+    Yield a header line, then one CSV line per row (NULL as an empty cell).
+
+    Text cells are neutralized with :func:`_csv_cell`, since listing titles and
+    emails are user input and the file is meant to be opened in a spreadsheet.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([field.field_name for field in DATASETS[dataset].fields])
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row.values()])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv}
+
+
+def export_stream(dataset, export_format="ndjson", compress=False, created_after=None, created_before=None,
+                  using=None):
+    """
+    Render a whole dataset as a stream of byte chunks.
+
+    Args:
+        dataset (str): A key of ``DATASETS``.
+        export_format (str): "ndjson" or "csv".
+        compress (bool): Gzip the stream.
+        created_after (datetime | None): Only rows created at or after this time.
+        created_before (datetime | None): Only rows created before this time.
+        using (str | None): Database alias to read from (the router's choice by default).
+
+    Yields:
+        bytes: Chunks of about ``FLUSH_BYTES`` (before compression).
+    """
+    rows = export_rows(dataset, created_after, created_before, using)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31: gzip container
+    pending = []
+    size = 0
+    for text in ENCODERS[export_format](dataset, rows):
+        pending.append(text)
+        size += len(text)
+        if size >= FLUSH_BYTES:
+            chunk = "".join(pending).encode()
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = "".join(pending).encode()
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_filename(dataset, export_format, compress):
+    extension = FORMATS[export_format][1]
+    return f"{dataset}.{extension}.gz" if compress else f"{dataset}.{extension}"
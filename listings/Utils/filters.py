@@ -0,0 +1,34 @@
+# Keyset orderings for each supported ``sort`` value. Every ordering ends with the
+# primary key so the cursor is unique, and each one is backed by an index on Listing.
+LISTING_ORDERINGS = {
+    "newest": ["-created_at", "-listing_id"],
+    "price_asc": ["price", "listing_id"],
+    "price_desc": ["-price", "-listing_id"],
+    "rating": ["-rating_avg", "-rating_count", "-listing_id"],
+}
+
+
+def filter_listings(queryset, filters):
+    """
+    Apply validated listing filters to a queryset.
+
+    Args:
+        queryset (QuerySet): Base Listing queryset.
+        filters (dict): ``validated_data`` from ListingFilterSerializer.
+
+    Returns:
+        QuerySet: The filtered queryset (ordering is left to the paginator).
+    """
+    if filters.get("location"):
+        queryset = queryset.filter(location=filters["location"])
+    if filters.get("location_prefix"):
+        queryset = queryset.filter(location__startswith=filters["location_prefix"])
+    if filters.get("min_price") is not None:
+        queryset = queryset.filter(price__gte=filters["min_price"])
+    if filters.get("max_price") is not None:
+        queryset = queryset.filter(price__lte=filters["max_price"])
+    if filters.get("created_after"):
+        queryset = queryset.filter(created_at__gte=filters["created_after"])
+    if filters.get("created_before"):
+        queryset = queryset.filter(created_at__lt=filters["created_before"])
+    return queryset
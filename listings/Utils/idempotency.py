@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+from rest_framework.utils.encoders import JSONEncoder
+
+from ..models import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+IN_PROGRESS, COMPLETED = "in_progress", "completed"
+
+
+class CacheIdempotencyStore:
+    """Keeps idempotency records in the Django cache (Redis in production). Replays never touch the database."""
+
+    prefix = "idempotency:"
+
+    def get(self, key):
+        return cache.get(self.prefix + key)
+
+    def acquire(self, key, fingerprint):
+        record = {"state": IN_PROGRESS, "fingerprint": fingerprint}
+        return cache.add(self.prefix + key, record, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+
+    def save(self, key, fingerprint, status_code, data):
+        record = {"state": COMPLETED, "fingerprint": fingerprint, "status_code": status_code, "data": data}
+        cache.set(self.prefix + key, record, timeout=settings.IDEMPOTENCY_TTL)
+
+    def release(self, key):
+        cache.delete(self.prefix + key)
+
+
+class DatabaseIdempotencyStore:
+    """Keeps idempotency records in the IdempotencyRecord table, for deployments without Redis."""
+
+    def get(self, key):
+        record = IdempotencyRecord.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+        if record is None:
+            return None
+        return {"state": record.state, "fingerprint": record.fingerprint,
+                "status_code": record.status_code, "data": record.response}
+
+    def acquire(self, key, fingerprint):
+        now = timezone.now()
+        IdempotencyRecord.objects.filter(key=key, expires_at__lte=now).delete()
+        try:
+            # A savepoint, so losing the race doesn't abort a surrounding transaction (ATOMIC_REQUESTS, tests).
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key, fingerprint=fingerprint, state=IN_PROGRESS,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+                )
+            return True
+        except IntegrityError:
+            return False
+
+    def save(self, key, fingerprint, status_code, data):
+        IdempotencyRecord.objects.filter(key=key).update(
+            state=COMPLETED, status_code=status_code, response=data,
+            expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+        )
+
+    def release(self, key):
+        IdempotencyRecord.objects.filter(key=key, state=IN_PROGRESS).delete()
+
+
+def get_store():
+    """Return the configured store: IDEMPOTENCY_BACKEND is "cache" or "db"."""
+    if settings.IDEMPOTENCY_BACKEND == "db":
+        return DatabaseIdempotencyStore()
+    return CacheIdempotencyStore()
+
+
+def _owner(request):
+    """
+    Who a key belongs to: the user, or for anonymous callers their client address as
+    the anon throttle sees it (hashed), so one guest can't be replayed another's response.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    ident = BaseThrottle().get_ident(request) or ""
+    return "anon-" + hashlib.sha256(ident.encode()).hexdigest()[:16]
+
+
+def _scoped_key(view, request):
+    """Namespace the client's key by endpoint and caller so keys cannot collide across them."""
+    raw_key = request.headers.get(HEADER)
+    if not raw_key:
+        return None
+    return f"{view.idempotency_scope}:{_owner(request)}:{raw_key}"
+
+
+def _fingerprint(request, data, url_kwargs):
+    # The URL kwargs rather than the path, which differs between the sync and /api/async/ views;
+    # the key is already scoped to the endpoint.
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True)
+    return hashlib.sha256(f"{request.method} {sorted(url_kwargs.items())}\n{body}".encode()).hexdigest()
+
+
+def _replay(record):
+    response = Response(record["data"], status=record["status_code"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def has_stored_response(request, view):
+    """True if this request carries an Idempotency-Key whose response is already stored (it will be replayed)."""
+    if not getattr(view, "idempotency_scope", None):
+        return False
+    key = _scoped_key(view, request)
+    if key is None or len(key) > 255:
+        return False
+    record = get_store().get(key)
+    return record is not None and record["state"] == COMPLETED
+
+
+def idempotent(handler):
+    """
+    Make a view handler honour the ``Idempotency-Key`` request header.
+
+    The first request with a key runs the handler and stores its response for
+    IDEMPOTENCY_TTL seconds; repeats get the stored response back (with an
+    ``Idempotent-Replayed: true`` header) without running the handler. A repeat
+    that arrives while the first is still running waits for it, up to
+    IDEMPOTENCY_WAIT_TIMEOUT seconds, then gets a 409. Reusing a key with a
+    different body is a 422. 5xx responses are not stored, so they can be retried.
+
+    The view class must define ``idempotency_scope``.
+    """
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = _scoped_key(view, request)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": f"{HEADER} is too long."}, status=status.HTTP_400_BAD_REQUEST)
+
+        store = get_store()
+        fingerprint = _fingerprint(request, request.data, kwargs)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+        while True:
+            record = store.get(key)
+            if record is None and store.acquire(key, fingerprint):
+                break
+            if record is not None and record["fingerprint"] != fingerprint:
+                return Response({"error": f"{HEADER} was already used with a different request."},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record is not None and record["state"] == COMPLETED:
+                logger.info(f"Replaying stored response for idempotency key {key}")
+                return _replay(record)
+            if time.monotonic() >= deadline:
+                return Response({"error": "A request with this Idempotency-Key is still being processed."},
+                                status=status.HTTP_409_CONFLICT)
+            time.sleep(0.1)
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except Exception:
+            store.release(key)
+            raise
+
+        if response.status_code < 500 and hasattr(response, "data"):
+            data = json.loads(json.dumps(response.data, cls=JSONEncoder))
+            store.save(key, fingerprint, response.status_code, data)
+        else:
+            store.release(key)
+        return response
+
+    return wrapper
+
+
+def async_idempotent(handler):
+    """
+    :func:`idempotent` for async views that return ``JsonResponse`` (the ASGI payment views).
+
+    Same keys, store and rules, so a request may be retried against either path. The
+    view must set ``request.data`` (the parsed body, as DRF does) before the handler runs, and
+    ``request.user`` must already be resolved.
+    """
+
+    @wraps(handler)
+    async def wrapper(view, request, *args, **kwargs):
+        key = _scoped_key(view, request)
+        if key is None:
+            return await handler(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return JsonResponse({"error": f"{HEADER} is too long."}, status=status.HTTP_400_BAD_REQUEST)
+
+        store = get_store()
+        fingerprint = _fingerprint(request, request.data, kwargs)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+        while True:
+            record = await sync_to_async(store.get)(key)
+            if record is None and await sync_to_async(store.acquire)(key, fingerprint):
+                break
+            if record is not None and record["fingerprint"] != fingerprint:
+                return JsonResponse({"error": f"{HEADER} was already used with a different request."},
+                                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record is not None and record["state"] == COMPLETED:
+                logger.info(f"Replaying stored response for idempotency key {key}")
+                response = JsonResponse(record["data"], status=record["status_code"], safe=False)
+                response["Idempotent-Replayed"] = "true"
+                return response
+            if time.monotonic() >= deadline:
+                return JsonResponse({"error": "A request with this Idempotency-Key is still being processed."},
+                                    status=status.HTTP_409_CONFLICT)
+            await asyncio.sleep(0.1)
+
+        try:
+            response = await handler(view, request, *args, **kwargs)
+        except Exception:
+            await sync_to_async(store.release)(key)
+            raise
+
+        if response.status_code < 500:
+            await sync_to_async(store.save)(key, fingerprint, response.status_code, json.loads(response.content))
+        else:
+            await sync_to_async(store.release)(key)
+        return response
+
+    return wrapper
+
+
+def purge_expired_records():
+    """Delete expired rows from the database store. Returns the number deleted."""
+    deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,203 @@
+import csv
+import gzip
+import io
+import json
+
+from django.conf import settings
+from django.core.validators import MaxLengthValidator, MinLengthValidator, ProhibitNullCharactersValidator
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import ProhibitSurrogateCharactersValidator, empty
+from rest_framework.settings import api_settings
+
+from ..models import Listing
+from ..serializers import ListingSerializer
+from . import search
+from .cache import bump_table_version
+
+IMPORT_FIELDS = ["title", "description", "price", "location"]
+FORMAT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "ndjson"}
+
+
+class ListingImportError(ValueError):
+    """The file as a whole cannot be imported (unknown format, not UTF-8, ...)."""
+
+
+def infer_format(filename):
+    """Guess "csv" or "ndjson" from a file name such as ``partner.csv.gz``; None if it has no known extension."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for extension, file_format in FORMAT_EXTENSIONS.items():
+        if name.endswith(extension):
+            return file_format
+    return None
+
+
+def iter_records(stream, file_format):
+    """
+    Parse a CSV or NDJSON binary stream (gzipped or not) one record at a time.
+
+    Yields:
+        tuple[int, dict | None, str | None]: The line number, the record, and a
+        parse error message for lines that are not a JSON object.
+    """
+    if stream.read(2) == b"\x1f\x8b":
+        stream.seek(0)
+        stream = gzip.GzipFile(fileobj=stream)
+    else:
+        stream.seek(0)
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    try:
+        if file_format == "csv":
+            # Missing cells become ``empty``, so they are reported as required fields, not nulls.
+            reader = csv.DictReader(text, restval=empty)
+            for record in reader:
+                yield reader.line_num, record, None
+        elif file_format == "ndjson":
+            for line_number, line in enumerate(text, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    yield line_number, None, f"Invalid JSON: {exc}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, None, "Each line must be a JSON object."
+                    continue
+                yield line_number, record, None
+        else:
+            raise ListingImportError(f"Unknown import format {file_format!r}; use 'csv' or 'ndjson'.")
+    except (UnicodeDecodeError, gzip.BadGzipFile, EOFError, csv.Error) as exc:
+        raise ListingImportError(f"Could not read the file: {exc}") from exc
+    finally:
+        text.detach()
+
+
+class ListingBatchValidator:
+    """
+    Validate listing records a batch at a time, with ListingSerializer's own rules.
+
+    Works column by column: each field's DRF validation (required, blank, length,
+    decimal digits) and then its ``validate_<field>`` method from ListingSerializer
+    run over the whole batch, all bound once, so no serializer is built per row.
+    Plain text columns take a shortcut for values that are clearly valid.
+    """
+
+    def __init__(self):
+        serializer = ListingSerializer()
+        self.columns = []
+        for name in IMPORT_FIELDS:
+            rule = getattr(serializer, f"validate_{name}", None)
+            field = serializer.fields[name]
+            self.columns.append((name, _plain_text_check(field) or field.run_validation, rule))
+
+    def validate(self, records):
+        """
+        Returns:
+            tuple[list[dict | None], list[dict | None]]: For each record, its validated
+            values (None if invalid) and its field errors (None if valid).
+        """
+        errors = [None] * len(records)
+        values = [{} for _ in records]
+        for name, run_validation, rule in self.columns:
+            for position, record in enumerate(records):
+                try:
+                    value = run_validation(record.get(name, empty))
+                    values[position][name] = rule(value) if rule else value
+                except ValidationError as exc:
+                    if errors[position] is None:
+                        errors[position] = {}
+                    errors[position][name] = [str(message) for message in exc.detail]
+        return [None if error else value for value, error in zip(values, errors)], errors
+
+
+_TEXT_VALIDATORS = (MaxLengthValidator, MinLengthValidator, ProhibitNullCharactersValidator,
+                    ProhibitSurrogateCharactersValidator)
+
+
+def _plain_text_check(field):
+    """
+    Return a faster ``run_validation`` for a standard CharField, or None.
+
+    Non-blank ASCII strings within the length limits are exactly what DRF would
+    accept (trimmed); any other value goes through ``field.run_validation`` for
+    its verdict and error message.
+    """
+    if (type(field) is not serializers.CharField or not field.trim_whitespace
+            or any(not isinstance(validator, _TEXT_VALIDATORS) for validator in field.validators)):
+        return None
+    min_length = max(field.min_length or 0, 1)
+    max_length = field.max_length if field.max_length is not None else float("inf")
+
+    def check(value):
+        if type(value) is str:
+            text = value.strip()
+            if min_length <= len(text) <= max_length and text.isascii() and "\x00" not in text:
+                return text
+        return field.run_validation(value)
+    return check
+
+
+def import_listings(stream, file_format, batch_size=None, dry_run=False):
+    """
+    Stream-import listings from a CSV or NDJSON file.
+
+    The file is parsed incrementally; every ``batch_size`` records are validated
+    together (see ListingBatchValidator) and their valid rows saved with one
+    ``bulk_create``, in its own transaction. Invalid rows are skipped and reported
+    with their line number.
+
+    Args:
+        stream (BinaryIO): A seekable binary file, optionally gzipped.
+        file_format (str): "csv" (with a header row) or "ndjson".
+        batch_size (int | None): Rows per validation batch and bulk_create (IMPORT_BATCH_SIZE by default).
+        dry_run (bool): Validate only, insert nothing.
+
+    Returns:
+        dict: ``created`` and ``rejected`` counts, and up to IMPORT_MAX_REPORTED_ERRORS
+        ``{"line": n, "errors": {...}}`` entries.
+
+    Raises:
+        ListingImportError: If the file cannot be read at all.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    validator = ListingBatchValidator()
+    report = {"created": 0, "rejected": 0, "errors": []}
+
+    def flush(batch):
+        lines = [line for line, _ in batch]
+        cleaned, errors = validator.validate([record for _, record in batch])
+        valid = [values for values in cleaned if values is not None]
+        for line, row_errors in zip(lines, errors):
+            if row_errors is not None:
+                _reject(report, line, row_errors)
+        if valid and not dry_run:
+            Listing.objects.bulk_create([Listing(**values) for values in valid])  # atomic per call
+        report["created"] += len(valid)
+
+    batch = []
+    for line, record, parse_error in iter_records(stream, file_format):
+        if parse_error is not None:
+            _reject(report, line, {api_settings.NON_FIELD_ERRORS_KEY: [parse_error]})
+            continue
+        batch.append((line, record))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if report["created"] and not dry_run:
+        # bulk_create sends no post_save signals: invalidate what they would have.
+        bump_table_version(Listing._meta.db_table)
+        search.reset_index()
+    return report
+
+
+def _reject(report, line, errors):
+    report["rejected"] += 1
+    if len(report["errors"]) < settings.IMPORT_MAX_REPORTED_ERRORS:
+        report["errors"].append({"line": line, "errors": errors})
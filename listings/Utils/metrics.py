@@ -0,0 +1,198 @@
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
+from rest_framework.permissions import BasePermission
+
+# Our own registry, so /api/metrics/ exposes these series only. Under gunicorn set
+# PROMETHEUS_MULTIPROC_DIR (an empty directory) and every worker's samples are merged.
+REGISTRY = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+REQUEST_LATENCY = Histogram(
+    "listings_http_request_duration_seconds", "Request latency by view.",
+    ["view", "method", "status"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "listings_http_request_db_queries", "Database queries per request.",
+    ["view"], buckets=QUERY_COUNT_BUCKETS, registry=REGISTRY,
+)
+REQUEST_DB_TIME = Histogram(
+    "listings_http_request_db_seconds", "Time spent in database queries per request.",
+    ["view"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+REQUEST_CHAPA_TIME = Histogram(
+    "listings_http_request_chapa_seconds", "Time spent waiting on Chapa per request.",
+    ["view"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+REQUEST_SERIALIZER_TIME = Histogram(
+    "listings_http_request_serializer_seconds", "Time spent validating and rendering serializers per request.",
+    ["view"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+CHAPA_LATENCY = Histogram(
+    "listings_chapa_request_duration_seconds", "Latency of each outbound Chapa HTTP call (web and Celery).",
+    ["operation", "outcome"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+
+
+class RequestStats:
+    """Counters for the request being served, filled in by the DB wrapper, Chapa client and serializers."""
+
+    __slots__ = ("queries", "db_seconds", "chapa_seconds", "serializer_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.chapa_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+
+_current = ContextVar("listings_request_stats", default=None)
+_serializer_active = ContextVar("listings_serializer_active", default=False)
+
+
+def current_stats():
+    """Stats of the request being served, or None outside a request (e.g. in Celery)."""
+    return _current.get()
+
+
+def _count_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += time.perf_counter() - started
+
+
+def instrument_connection(connection, **kwargs):
+    """
+    Put the query counter on a database connection for good.
+
+    It is first in the wrapper list so ``execute_wrapper()`` blocks entered before the
+    connection opened still pop their own wrapper. Being permanent (rather than entered
+    per request) it also sees the queries async views run through ``sync_to_async``
+    on another thread; the request's stats reach that thread through the context.
+    """
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+connection_created.connect(instrument_connection)
+
+
+def observe_chapa_call(operation, outcome, seconds):
+    CHAPA_LATENCY.labels(operation, outcome).observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.chapa_seconds += seconds
+
+
+@contextmanager
+def serializer_timer():
+    """Add the block's time to the request's serializer total; nested serializers are counted once."""
+    if _serializer_active.get():
+        yield
+        return
+    token = _serializer_active.set(True)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _serializer_active.reset(token)
+        stats = _current.get()
+        if stats is not None:
+            stats.serializer_seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Record latency, DB query count/time, Chapa time and serializer time for every request.
+
+    Series are labelled with the URL name the request resolved to (``listings/urls.py``),
+    so a slow ``chapa-payment-verify`` can be split into database, Chapa and
+    serializer time. Queries are counted on every configured database alias.
+    Works under WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported missed the signal.
+        for alias in connections:
+            instrument_connection(connections[alias])
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _observe(request, response, stats, elapsed):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(elapsed)
+        REQUEST_DB_QUERIES.labels(view).observe(stats.queries)
+        REQUEST_DB_TIME.labels(view).observe(stats.db_seconds)
+        REQUEST_CHAPA_TIME.labels(view).observe(stats.chapa_seconds)
+        REQUEST_SERIALIZER_TIME.labels(view).observe(stats.serializer_seconds)
+
+
+def render_metrics():
+    """Return ``(body, content_type)`` in the Prometheus text exposition format."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class CanReadMetrics(BasePermission):
+    """
+    Metrics reveal per-view latency, error rates and queue internals: staff only, or a
+    scraper sending ``Authorization: Bearer <METRICS_TOKEN>`` (disabled while the token is empty).
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        header = request.headers.get("Authorization", "")
+        return bool(token) and hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
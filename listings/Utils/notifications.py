@@ -0,0 +1,153 @@
+import logging
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template import engines
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+# kind -> (subject template, body template name)
+NOTIFICATIONS = {
+    "booking_confirmation": ("Booking Confirmation", "listings/email/booking_confirmation.txt"),
+    "group_booking_confirmation": ("Group Booking Confirmation", "listings/email/group_booking_confirmation.txt"),
+    "payment_status": ("Payment {{ status|capfirst }}", "listings/email/payment_status.txt"),
+}
+
+
+def booking_confirmation(user_email, booking_id):
+    return {"kind": "booking_confirmation", "to": user_email, "context": {"booking_id": str(booking_id)}}
+
+
+def group_booking_confirmation(user_email, booking_ids):
+    """One email confirming all of a recipient's bookings from a bulk request (a plain confirmation for one)."""
+    if len(booking_ids) == 1:
+        return booking_confirmation(user_email, booking_ids[0])
+    return {"kind": "group_booking_confirmation", "to": user_email,
+            "context": {"booking_ids": [str(booking_id) for booking_id in booking_ids]}}
+
+
+def payment_status(user_email, status, amount, reference):
+    return {"kind": "payment_status", "to": user_email,
+            "context": {"status": status, "amount": str(amount), "reference": reference}}
+
+
+# Single-email tasks the outbox relay folds into one send_notification_batch job: task name -> message builder.
+COALESCED_TASKS = {
+    "listings.tasks.send_booking_confirmation_email": booking_confirmation,
+    "listings.tasks.send_payment_status_email": payment_status,
+}
+BATCH_TASK = "listings.tasks.send_notification_batch"
+
+
+@lru_cache(maxsize=None)
+def _compiled(kind):
+    """Parse a notification's subject and body templates once per process."""
+    subject, body_template = NOTIFICATIONS[kind]
+    return engines["django"].from_string(subject), get_template(body_template)
+
+
+def precompile_templates():
+    """Compile every notification template up front (called when a worker process starts)."""
+    for kind in NOTIFICATIONS:
+        _compiled(kind)
+
+
+def render(message):
+    """Return ``(subject, body)`` for a notification message dict."""
+    subject, body = _compiled(message["kind"])
+    context = message.get("context") or {}
+    return subject.render(context).strip(), body.render(context).strip()
+
+
+def _rate_limit(messages):
+    """
+    Split messages into (allowed, deferred) by the per-recipient limit.
+
+    Each recipient may receive NOTIFICATION_RATE_LIMIT emails per
+    NOTIFICATION_RATE_WINDOW seconds, counted in the shared cache so the limit
+    holds across workers. One counter update per distinct recipient.
+    """
+    limit = settings.NOTIFICATION_RATE_LIMIT
+    if not limit:
+        return messages, []
+
+    window = settings.NOTIFICATION_RATE_WINDOW
+    budget = {}
+    for recipient, wanted in Counter(message["to"].lower() for message in messages).items():
+        key = f"notifications:rate:{recipient}"
+        cache.add(key, 0, timeout=window)
+        try:
+            used = cache.incr(key, wanted)
+        except ValueError:  # expired between add() and incr()
+            cache.set(key, wanted, timeout=window)
+            used = wanted
+        budget[recipient] = wanted - max(0, used - limit)
+
+    allowed, deferred = [], []
+    for message in messages:
+        recipient = message["to"].lower()
+        if budget[recipient] > 0:
+            budget[recipient] -= 1
+            allowed.append(message)
+        else:
+            deferred.append(message)
+    return allowed, deferred
+
+
+class NotificationDeliveryError(Exception):
+    """
+    Sending stopped part way through a batch.
+
+    ``unsent`` holds the allowed messages that did not go out (the failing one
+    included), ``deferred`` the ones held back by the rate limit; the rest were sent.
+    """
+
+    def __init__(self, sent, unsent, deferred):
+        super().__init__(f"{len(unsent)} notification(s) not sent after {sent} sent")
+        self.sent = sent
+        self.unsent = unsent
+        self.deferred = deferred
+
+
+def deliver(messages, rate_limit=True):
+    """
+    Render and send notification messages over one reused connection.
+
+    Messages are dicts built by :func:`booking_confirmation` / :func:`payment_status`.
+    They all go out through a single ``get_connection()``, instead of one
+    connection and one job per email. Each email is handed to the backend on its
+    own, so a failure part way through is known to have sent exactly the ones before it.
+
+    Args:
+        messages (list[dict]): Notification messages.
+        rate_limit (bool): Apply the per-recipient rate limit. Off for messages that
+            already passed it, such as the unsent part of a failed batch.
+
+    Returns:
+        tuple[int, list]: Number sent, and the messages deferred by the per-recipient rate limit.
+
+    Raises:
+        NotificationDeliveryError: If rendering or sending fails; it carries the messages still to send.
+    """
+    messages = [message for message in messages if message.get("to")]
+    allowed, deferred = _rate_limit(messages) if rate_limit else (messages, [])
+    if deferred:
+        logger.warning(f"Rate limit deferred {len(deferred)} notification(s)")
+
+    sent = 0
+    try:
+        with get_connection() as mail_connection:
+            for message in allowed:
+                subject, body = render(message)
+                mail_connection.send_messages([EmailMessage(subject, body, settings.EMAIL_HOST_USER, [message["to"]])])
+                sent += 1
+    except Exception as exc:
+        if sent == len(allowed):  # everything went out; only closing the connection failed
+            logger.warning(f"Error closing the mail connection after sending {sent} notification(s): {exc}")
+            return sent, deferred
+        raise NotificationDeliveryError(sent, allowed[sent:], deferred) from exc
+    return sent, deferred
@@ -0,0 +1,155 @@
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from kombu.exceptions import OperationalError as BrokerUnavailable
+
+from ..models import OutboxMessage
+from . import notifications
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, args=(), kwargs=None):
+    """
+    Record a Celery task call in the outbox.
+
+    Call it inside the transaction that makes the change the task reacts to: the
+    row commits or rolls back together with that change, and the relay publishes
+    it only after commit. Nothing talks to the broker on the caller's thread.
+
+    Args:
+        task: A Celery task or its registered name.
+        args (Iterable): Positional task arguments (JSON serialisable).
+        kwargs (dict | None): Keyword task arguments (JSON serialisable).
+    """
+    task_name = task if isinstance(task, str) else task.name
+    return OutboxMessage.objects.create(task_name=task_name, args=list(args), kwargs=kwargs or {})
+
+
+async def aenqueue(task, args=(), kwargs=None):
+    """
+    Async :func:`enqueue` for the ASGI views.
+
+    The async ORM cannot open a transaction, so use it only where the outbox row is
+    the one write (it then commits alone); otherwise wrap the whole unit of work in
+    ``sync_to_async`` and call :func:`enqueue` inside its ``transaction.atomic()``.
+    """
+    task_name = task if isinstance(task, str) else task.name
+    return await OutboxMessage.objects.acreate(task_name=task_name, args=list(args), kwargs=kwargs or {})
+
+
+def relay_batch(batch_size=None):
+    """
+    Publish one batch of pending outbox messages to the broker.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and leased for
+    OUTBOX_CLAIM_TIMEOUT seconds in a short transaction; publishing happens after it
+    commits, so no row lock is held while the broker is slow. Several relays can run
+    side by side, and rows leased by a relay that died come up again once the lease
+    runs out. Messages go out over a single broker connection. Single-email
+    notification jobs are folded into ``send_notification_batch`` jobs of up to
+    NOTIFICATION_BATCH_SIZE messages, so a burst of bookings costs a handful of
+    tasks rather than one per email.
+
+    A message that can't be built or is rejected by the broker is skipped, with
+    ``attempts`` and ``last_error`` recorded. After OUTBOX_MAX_ATTEMPTS it is
+    dead-lettered: left undispatched for inspection and no longer relayed. A broker
+    connection error ends the pass without counting against the messages.
+
+    Returns:
+        int: Number of messages dispatched.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+                    dispatched_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+            .order_by("id")[:batch_size]
+        )
+        if not messages:
+            return 0
+        OutboxMessage.objects.filter(pk__in=[message.pk for message in messages]).update(
+            claimed_until=now + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+        )
+
+    failures = {}  # pk -> error
+    plain, coalesced = [], []
+    for message in messages:
+        builder = notifications.COALESCED_TASKS.get(message.task_name)
+        if builder is None:
+            plain.append(message)
+            continue
+        try:
+            coalesced.append((message, builder(*message.args, **message.kwargs)))
+        except Exception as exc:
+            failures[message.pk] = f"Could not build {message.task_name}: {exc!r}"
+
+    chunk = settings.NOTIFICATION_BATCH_SIZE
+    jobs = [(message.task_name, [message], message.args, message.kwargs) for message in plain]
+    for start in range(0, len(coalesced), chunk):
+        rows = coalesced[start:start + chunk]
+        jobs.append((notifications.BATCH_TASK, [row for row, _ in rows], [[item for _, item in rows]], {}))
+
+    dispatched = []
+    try:
+        with current_app.producer_or_acquire() as producer:
+            for task_name, rows, args, kwargs in jobs:
+                try:
+                    current_app.send_task(task_name, args=args, kwargs=kwargs, producer=producer)
+                except BrokerUnavailable as exc:
+                    logger.warning(f"Outbox relay stopped, broker unavailable: {exc}")
+                    break
+                except Exception as exc:
+                    failures.update((row.pk, f"Could not publish {task_name}: {exc!r}") for row in rows)
+                    continue
+                dispatched.extend(row.pk for row in rows)
+    finally:
+        _settle(messages, dispatched, failures)
+
+    return len(dispatched)
+
+
+def _settle(messages, dispatched, failures):
+    """Mark published rows dispatched, record failures, and release the lease on everything else."""
+    OutboxMessage.objects.filter(pk__in=dispatched).update(dispatched_at=timezone.now(), claimed_until=None)
+    for message in messages:
+        error = failures.get(message.pk)
+        if error is None:
+            continue
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            attempts=F("attempts") + 1, last_error=error[:2000], claimed_until=None
+        )
+        if message.attempts + 1 >= settings.OUTBOX_MAX_ATTEMPTS:
+            logger.error(f"Outbox message #{message.pk} dead-lettered after {message.attempts + 1} attempts: {error}")
+        else:
+            logger.warning(f"Outbox message #{message.pk} skipped: {error}")
+    untouched = {message.pk for message in messages} - set(dispatched) - failures.keys()
+    if untouched:
+        OutboxMessage.objects.filter(pk__in=untouched).update(claimed_until=None)
+
+
+def relay_pending(max_batches=None):
+    """Relay batches until the outbox is empty (or ``max_batches`` is reached). Returns the total dispatched."""
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        sent = relay_batch()
+        total += sent
+        batches += 1
+        if sent < settings.OUTBOX_BATCH_SIZE:
+            break
+    return total
+
+
+def purge_dispatched(older_than=None):
+    """Delete dispatched messages older than OUTBOX_RETENTION seconds. Returns the number deleted."""
+    older_than = older_than or timedelta(seconds=settings.OUTBOX_RETENTION)
+    deleted, _ = OutboxMessage.objects.filter(dispatched_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a fixed, unique ordering.
+
+    Instead of ``OFFSET n`` the next page is fetched with a ``WHERE`` clause on the
+    ordering columns of the last row seen, so every page costs the same index range
+    scan no matter how deep the client has paged.
+
+    Args:
+        ordering (list[str]): Model field names, prefixed with ``-`` for descending.
+            The last field must be unique (usually the primary key).
+        page_size (int): Default number of rows per page.
+        max_page_size (int): Upper bound for the ``page_size`` query parameter.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def __init__(self, ordering, page_size=None, max_page_size=None):
+        self.ordering = list(ordering)
+        self.page_size = page_size or settings.LISTINGS_PAGE_SIZE
+        self.max_page_size = max_page_size or settings.LISTINGS_MAX_PAGE_SIZE
+
+    @property
+    def fields(self):
+        return [name.lstrip("-") for name in self.ordering]
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({self.page_size_query_param: ["A valid integer is required."]})
+        if size < 1:
+            raise ValidationError({self.page_size_query_param: ["Must be a positive integer."]})
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, obj):
+        if isinstance(obj, dict):  # a ``.values()`` row
+            values = [str(obj[name]) for name in self.fields]
+        else:
+            values = [str(getattr(obj, name)) for name in self.fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, model, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [model._meta.get_field(name).to_python(value) for name, value in zip(self.fields, values)]
+        except (ValueError, TypeError, binascii.Error, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: ["Invalid cursor."]})
+
+    def _after(self, values):
+        """Build the lexicographic 'comes after' filter for the given cursor values."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return ``(rows, next_cursor)`` for the page requested by ``request``.
+
+        One extra row is fetched to learn whether another page exists, so no
+        ``COUNT(*)`` is ever issued.
+        """
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(queryset.model, cursor)))
+
+        rows = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = self.encode_cursor(rows[-1])
+        return rows, next_cursor
+
+    def get_next_link(self, request, next_cursor):
+        if next_cursor is None:
+            return None
+        params = request.query_params.copy()
+        params[self.cursor_query_param] = next_cursor
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
@@ -0,0 +1,146 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Payments
+from . import outbox
+from .chapa_client import get_chapa_client
+
+logger = logging.getLogger(__name__)
+
+# Chapa transaction statuses mapped onto Payments.status. Anything else leaves the payment pending.
+CHAPA_STATUS_MAP = {
+    "success": "completed",
+    "successful": "completed",
+    "completed": "completed",
+    "failed": "failed",
+    "failure": "failed",
+    "cancelled": "failed",
+    "canceled": "failed",
+}
+
+
+def find_payment(reference):
+    """
+    Look up a payment by our merchant reference (with or without the ``CHAP-`` prefix) or by Chapa's reference.
+
+    Both references are unique indexes, and the booking and its user are joined
+    in so notifications need no extra queries.
+    """
+    return _payment_lookup(reference).first()
+
+
+async def afind_payment(reference):
+    """Async :func:`find_payment`, for the ASGI views."""
+    return await _payment_lookup(reference).afirst()
+
+
+def claim_verification(payment):
+    """
+    Reserve the right to queue a Chapa verification for ``payment``.
+
+    Returns True for the first caller in each CHAPA_VERIFY_DEDUP_SECONDS window
+    and False for the rest, so clients polling the verify endpoint queue one
+    ``verify_payment`` task, not one per request. The claim lives in the shared cache.
+    """
+    return cache.add(_verification_key(payment), 1, timeout=settings.CHAPA_VERIFY_DEDUP_SECONDS)
+
+
+async def aclaim_verification(payment):
+    """Async :func:`claim_verification`, for the ASGI views."""
+    return await cache.aadd(_verification_key(payment), 1, timeout=settings.CHAPA_VERIFY_DEDUP_SECONDS)
+
+
+def release_verification(payment):
+    """Drop a claim whose task could not be queued, so the next request can try again."""
+    cache.delete(_verification_key(payment))
+
+
+def _verification_key(payment):
+    return f"payments:verify:{payment.payment_id}"
+
+
+def _payment_lookup(reference):
+    refs = [reference]
+    if not reference.startswith("CHAP-"):
+        refs.append(f"CHAP-{reference}")
+    return Payments.objects.select_related("booking__user").filter(
+        Q(trxn_reference__in=refs) | Q(chapa_reference=reference)
+    )
+
+
+def apply_payment_status(payment, chapa_status, source):
+    """
+    Move a pending payment to its final status, exactly once.
+
+    Polls, the reconciler and webhooks all funnel through this conditional
+    ``UPDATE ... WHERE status = 'pending'``, so whichever arrives first wins and
+    every later or concurrent call is a no-op. The status email is queued through
+    the outbox in the same transaction, only by the call that made the transition.
+
+    Args:
+        payment (Payments): The payment to update.
+        chapa_status (str): Transaction status as reported by Chapa.
+        source (str): What reported it ("verify", "reconcile", "webhook"), for logs.
+
+    Returns:
+        bool: True if this call changed the payment's status.
+    """
+    new_status = CHAPA_STATUS_MAP.get((chapa_status or "").lower())
+    if new_status is None:
+        return False
+
+    with transaction.atomic():
+        updated = Payments.objects.filter(pk=payment.pk, status="pending").update(
+            status=new_status, updated_at=timezone.now()
+        )
+        if not updated:
+            return False
+
+        payment.status = new_status
+        _notify_payment_status(payment)
+    logger.info(f"Payment {payment.trxn_reference} marked {new_status} via {source}")
+    return True
+
+
+def _notify_payment_status(payment):
+    """Queue the payment status email through the outbox (call inside the status update's transaction)."""
+    booking = payment.booking
+    user_email = None
+    if booking and booking.user and getattr(booking.user, 'email', None):
+        user_email = booking.user.email
+    elif getattr(booking, 'email', None):
+        user_email = booking.email
+
+    if user_email:
+        outbox.enqueue(
+            "listings.tasks.send_payment_status_email",
+            [user_email, payment.status, str(payment.amount), payment.trxn_reference],
+        )
+    else:
+        logger.warning(f"No email found for payment {payment.trxn_reference}")
+
+
+def verify_with_chapa(payment):
+    """
+    Ask Chapa for the transaction behind ``payment`` and apply the result.
+
+    Uses our own ``tx_ref``, so a single upstream call is enough.
+
+    Returns:
+        str: The payment's status after verification.
+
+    Raises:
+        ChapaUnavailable: If Chapa cannot be reached; the caller decides whether to retry.
+    """
+    status_code, response_data = get_chapa_client().verify(payment.trxn_reference)
+    if status_code == 200 and response_data.get("status") == "success":
+        payment_data = response_data.get("data") or {}
+        apply_payment_status(payment, payment_data.get("status"), source="verify")
+    else:
+        logger.info(f"Chapa could not verify {payment.trxn_reference} yet: {status_code} {response_data}")
+    return payment.status
@@ -0,0 +1,139 @@
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_NUMBERS = re.compile(r"\b\d+\b")
+_QUOTED = re.compile(r"'(?:[^']|'')*'")
+# Transaction control differs between a test (savepoints inside the test's transaction) and
+# production (BEGIN), so it is not counted against budgets.
+_TRANSACTION_CONTROL = re.compile(r"^\s*(BEGIN|SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.I)
+_INSTRUMENTATION_FILES = ("query_budget.py", "metrics.py")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block ran more queries than its budget allows."""
+
+
+class QueryLog:
+    """Queries run inside a :func:`count_queries` block, each with the stack that issued it."""
+
+    def __init__(self):
+        self.queries = []  # (sql, stack)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        if not _TRANSACTION_CONTROL.match(sql):
+            stack = [frame for frame in traceback.extract_stack()[:-1] if _is_project_frame(frame.filename)]
+            self.queries.append((sql, stack))
+        return execute(sql, params, many, context)
+
+    def report(self, budget, label=""):
+        """Describe the overrun: repeated statements first (the usual N+1 sign), then each query and its stack."""
+        shapes = Counter(_NUMBERS.sub("?", _QUOTED.sub("?", sql)) for sql, _ in self.queries)
+        lines = [f"{label or 'Block'} ran {len(self.queries)} queries, budget is {budget}."]
+        repeated = [(shape, count) for shape, count in shapes.most_common() if count > 1]
+        if repeated:
+            lines.append("Repeated statements (likely N+1):")
+            lines.extend(f"  {count}x {shape[:300]}" for shape, count in repeated)
+        for number, (sql, stack) in enumerate(self.queries, 1):
+            lines.append(f"#{number}: {sql[:500]}")
+            lines.extend(f"    {frame.filename}:{frame.lineno} in {frame.name}" for frame in stack[-6:])
+        return "\n".join(lines)
+
+
+def _is_project_frame(filename):
+    return (filename.startswith(str(settings.BASE_DIR)) and "site-packages" not in filename
+            and not filename.endswith(_INSTRUMENTATION_FILES))
+
+
+@contextmanager
+def count_queries(using=None):
+    """Record every query run on ``using`` (an alias, or all configured databases) inside the block."""
+    log = QueryLog()
+    with ExitStack() as stack:
+        for alias in [using] if using else connections:
+            stack.enter_context(connections[alias].execute_wrapper(log))
+        yield log
+
+
+@contextmanager
+def query_budget(max_queries, label="", using=None):
+    """
+    Fail with :class:`QueryBudgetExceeded` if the block runs more than ``max_queries`` queries.
+
+    The error lists repeated statements and the project stack frames behind each query, so
+    the offending loop is easy to find::
+
+        with query_budget(2, label="GET /api/listings/"):
+            client.get("/api/listings/")
+    """
+    with count_queries(using) as log:
+        yield log
+    if len(log) > max_queries:
+        raise QueryBudgetExceeded(log.report(max_queries, label))
+
+
+def view_budget(view_class, method):
+    """The query budget a view declares for an HTTP method (``query_budgets = {"get": 2}``), or None."""
+    return getattr(view_class, "query_budgets", {}).get(method.lower())
+
+
+class QueryBudgetMiddleware:
+    """
+    Dev-mode guard: check every request against its view's ``query_budgets``.
+
+    Enabled by QUERY_BUDGET_MODE: "log" logs the report with the offending stacks,
+    "raise" turns the request into an error. Capturing stacks is not free, so keep
+    this out of production (QUERY_BUDGET_MODE empty).
+
+    Under ASGI requests pass straight through: async views run their queries on
+    ``sync_to_async`` threads this middleware cannot watch. Their budgets are checked
+    by the test suite and under runserver, where they run on the request thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mode = settings.QUERY_BUDGET_MODE
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if not self.mode or iscoroutinefunction(self):
+            return self.get_response(request)
+
+        with count_queries() as log:
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        view_class = getattr(match.func, "view_class", None) if match else None
+        budget = view_budget(view_class, request.method) if view_class else None
+        if budget is not None and len(log) > budget:
+            report = log.report(budget, f"{request.method} {request.path} ({view_class.__name__})")
+            if self.mode == "raise":
+                raise QueryBudgetExceeded(report)
+            logger.warning(report)
+        return response
+
+
+class QueryBudgetMixin:
+    """TestCase mixin: run a request under the query budget its view declares."""
+
+    def assertWithinBudget(self, view_class, method, send, label=None):
+        budget = view_budget(view_class, method)
+        if budget is None:
+            self.fail(f"{view_class.__name__} declares no query budget for {method.upper()}")
+        with query_budget(budget, label=label or f"{view_class.__name__}.{method.lower()}"):
+            return send()
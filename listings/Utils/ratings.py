@@ -0,0 +1,86 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+
+from ..models import Listing, Review
+from .cache import bump_table_version
+
+RATING_VALUES = range(1, 6)
+
+HISTOGRAM_FIELDS = [f"rating_{value}_count" for value in RATING_VALUES]
+
+AGGREGATE_FIELDS = ["rating_avg", "rating_count", "rating_sum", *HISTOGRAM_FIELDS]
+
+
+def record_review_rating(listing_id, rating):
+    """
+    Fold one new review into its listing's rating aggregates.
+
+    Runs as a single ``UPDATE`` whose right-hand side reads the old column values,
+    so concurrent reviews for the same listing cannot lose increments. Call it in
+    the same transaction that saves the review.
+    """
+    new_sum = Cast(F("rating_sum") + rating, FloatField())
+    new_count = Cast(F("rating_count") + 1, FloatField())
+    Listing.objects.filter(pk=listing_id).update(
+        rating_avg=Cast(new_sum / new_count, DecimalField(max_digits=3, decimal_places=2)),
+        rating_count=F("rating_count") + 1,
+        rating_sum=F("rating_sum") + rating,
+        **{f"rating_{rating}_count": F(f"rating_{rating}_count") + 1},
+    )
+
+
+def rebuild_rating_aggregates(listing_ids=None, batch_size=1000):
+    """
+    Recompute rating aggregates from the Review table with one grouped query.
+
+    Args:
+        listing_ids (Iterable | None): Limit the rebuild to these listings; all listings when None.
+        batch_size (int): Rows per bulk UPDATE.
+
+    Returns:
+        int: Number of listings that have at least one review.
+    """
+    listings = Listing.objects.all()
+    reviews = Review.objects.all()
+    if listing_ids is not None:
+        listings = listings.filter(pk__in=listing_ids)
+        reviews = reviews.filter(listing_id__in=listing_ids)
+
+    totals = (
+        reviews.order_by()
+        .values("listing_id")
+        .annotate(
+            count=Count("pk"),
+            total=Sum("rating"),
+            **{field: Count("pk", filter=Q(rating=value)) for field, value in zip(HISTOGRAM_FIELDS, RATING_VALUES)},
+        )
+    )
+
+    updated = 0
+    with transaction.atomic():
+        listings.update(**{field: 0 for field in AGGREGATE_FIELDS})
+
+        batch = []
+        for row in totals.iterator(chunk_size=batch_size):
+            listing = Listing(
+                listing_id=row["listing_id"],
+                rating_avg=(Decimal(row["total"]) / row["count"]).quantize(Decimal("0.01"), ROUND_HALF_UP),
+                rating_count=row["count"],
+                rating_sum=row["total"],
+                **{field: row[field] for field in HISTOGRAM_FIELDS},
+            )
+            batch.append(listing)
+            if len(batch) >= batch_size:
+                Listing.objects.bulk_update(batch, AGGREGATE_FIELDS)
+                updated += len(batch)
+                batch = []
+        if batch:
+            Listing.objects.bulk_update(batch, AGGREGATE_FIELDS)
+            updated += len(batch)
+
+        # Bulk updates skip model signals, so invalidate cached listing responses here.
+        transaction.on_commit(lambda: bump_table_version(Listing._meta.db_table))
+    return updated
@@ -0,0 +1,162 @@
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+
+from ..models import Listing
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Small English stop word list so the in-process index ranks roughly like to_tsvector('english').
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the to was were will with".split()
+)
+
+TITLE_WEIGHT = 2.5
+
+
+def tokenize(text):
+    """Split text into lowercase search terms, dropping stop words."""
+    return [token for token in TOKEN_RE.findall((text or "").lower()) if token not in STOP_WORDS]
+
+
+class InvertedIndex:
+    """
+    Thread-safe in-memory inverted index over listing titles and descriptions.
+
+    Used when the database has no full-text search support (SQLite in tests and
+    local development). Each process keeps its own copy, kept current by the
+    Listing signal handlers in ``listings.signals``.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # term -> {listing_id: weighted term frequency}
+        self._documents = {}  # listing_id -> set of terms, for removal
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, listing_id, title, description):
+        weights = defaultdict(float)
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            weights[term] += 1.0
+
+        with self._lock:
+            self._remove(listing_id)
+            for term, weight in weights.items():
+                self._postings[term][listing_id] = weight
+            self._documents[listing_id] = set(weights)
+
+    def remove(self, listing_id):
+        with self._lock:
+            self._remove(listing_id)
+
+    def _remove(self, listing_id):
+        for term in self._documents.pop(listing_id, ()):
+            postings = self._postings[term]
+            postings.pop(listing_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query, limit):
+        """
+        Return up to ``limit`` ``(listing_id, score)`` pairs matching every query term, best first.
+
+        Scores are TF-IDF with a log-scaled term frequency, title terms weighted higher.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+            total = len(self._documents)
+
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+
+            scores = []
+            for listing_id in candidates:
+                score = sum(
+                    (1 + math.log(posting[listing_id])) * math.log(1 + total / len(posting))
+                    for posting in postings
+                )
+                scores.append((listing_id, score))
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide in-memory index, building it from the database on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = InvertedIndex()
+                rows = Listing.objects.values_list("listing_id", "title", "description")
+                for listing_id, title, description in rows.iterator(chunk_size=2000):
+                    index.add(listing_id, title, description)
+                _index = index
+    return _index
+
+
+def index_is_loaded():
+    return _index is not None
+
+
+def reset_index():
+    """Drop the in-memory index so it is rebuilt on next use (e.g. after bulk writes that skip signals)."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def search_listings(query, limit, fields=None):
+    """
+    Rank listings against a free text query.
+
+    Args:
+        query (str): The user's search terms.
+        limit (int): Maximum number of results.
+        fields (Iterable[str] | None): Optional model column subset to load.
+
+    Returns:
+        list[Listing]: Matching listings, best first, each with a ``rank`` attribute.
+    """
+    listings = Listing.objects.all()
+    if fields is not None:
+        listings = listings.only(*fields)
+
+    if connection.vendor == "postgresql":
+        search_query = SearchQuery(query, search_type="websearch", config="english")
+        return list(
+            listings.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "-created_at")[:limit]
+        )
+
+    ranked = get_index().search(query, limit)
+    rows = listings.in_bulk([listing_id for listing_id, _ in ranked])
+    results = []
+    for listing_id, score in ranked:
+        listing = rows.get(listing_id)
+        if listing is not None:
+            listing.rank = score
+            results.append(listing)
+    return results
@@ -1,14 +1,182 @@
-from rest_framework.throttling import ScopedRateThrottle
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
 from rest_framework.exceptions import Throttled
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+from .idempotency import has_stored_response
+
+logger = logging.getLogger(__name__)
+
+# GCRA (generic cell rate algorithm): one "theoretical arrival time" per key, in microseconds.
+# A request is allowed if, after adding one emission interval, the TAT is no more than one
+# period ahead of now. Time comes from the Redis server so all web workers share one clock.
+# All values are whole numbers (microseconds fit exactly in a Lua double), and the key's
+# PX expiry is rounded up to whole milliseconds, as SET requires an integer.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000000 + clock[2]
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, allow_at - now}
+end
+redis.call('SET', KEYS[1], string.format('%d', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+return {1, 0}
+"""
+
+
+class RedisGCRALimiter:
+    """Cluster-wide limiter: one atomic Lua call (GET + SET of a single integer) per check."""
+
+    prefix = "throttle:"
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.script = self.client.register_script(GCRA_SCRIPT)
+
+    def hit(self, key, limit, period):
+        """Count one request against ``limit`` per ``period`` seconds. Returns ``(allowed, retry_after_seconds)``."""
+        # Whole microseconds; rounding down lets a full burst of ``limit`` through for rates like 3/s.
+        interval_us = period * 1_000_000 // limit
+        allowed, retry_us = self.script(keys=[self.prefix + key], args=[interval_us, period * 1_000_000])
+        return bool(allowed), retry_us / 1_000_000
+
+
+class MemoryGCRALimiter:
+    """The same algorithm in process memory: fallback when Redis is unset or unreachable, and for tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tats = {}  # key -> theoretical arrival time, monotonic seconds
+
+    def hit(self, key, limit, period):
+        interval = period / limit
+        with self._lock:
+            now = time.monotonic()
+            new_tat = max(self._tats.get(key, now), now) + interval
+            allow_at = new_tat - period
+            if allow_at > now:
+                return False, allow_at - now
+            self._tats[key] = new_tat
+            if len(self._tats) > 10000:
+                # Keys whose TAT has passed carry no state; drop them.
+                self._tats = {k: tat for k, tat in self._tats.items() if tat > now}
+            return True, 0.0
+
+    def reset(self):
+        with self._lock:
+            self._tats.clear()
+
+
+_limiter = None
+_limiter_pid = None
+_limiter_lock = threading.Lock()
+_fallback = MemoryGCRALimiter()
+_redis_retry_at = 0.0
+REDIS_RETRY_INTERVAL = 5  # seconds to stay on the in-memory fallback after a Redis error
+
+
+def get_limiter():
+    """
+    Return this process's limiter: Redis when THROTTLE_REDIS_URL is set, otherwise in-memory.
+
+    Rebuilt after a fork so gunicorn children never share a Redis socket with their parent.
+    """
+    global _limiter, _limiter_pid
+    pid = os.getpid()
+    if _limiter is None or _limiter_pid != pid:
+        with _limiter_lock:
+            if _limiter is None or _limiter_pid != pid:
+                _limiter = RedisGCRALimiter(settings.THROTTLE_REDIS_URL) if settings.THROTTLE_REDIS_URL else _fallback
+                _limiter_pid = pid
+    return _limiter
+
+
+def reset_limiter():
+    """Drop the cached limiter and all in-memory state (for tests and settings changes)."""
+    global _limiter, _redis_retry_at
+    with _limiter_lock:
+        _limiter = None
+        _redis_retry_at = 0.0
+    _fallback.reset()
+
+
+def _hit(key, limit, period):
+    global _redis_retry_at
+    limiter = get_limiter()
+    if limiter is _fallback or time.monotonic() < _redis_retry_at:
+        return _fallback.hit(key, limit, period)
+    try:
+        return limiter.hit(key, limit, period)
+    except Exception as exc:
+        # Keep serving with per-process limits rather than failing every request while Redis is down.
+        _redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(f"Redis rate limiter unavailable for {REDIS_RETRY_INTERVAL}s, using in-process limits: {exc}")
+        return _fallback.hit(key, limit, period)
+
+
+class GCRAThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle with its per-key timestamp list replaced by GCRA.
+
+    State is one integer per key, updated atomically in Redis, so limits hold
+    across all gunicorn workers and hosts and each check is O(1).
+    """
+
+    retry_after = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, retry_after = _hit(self.key, self.num_requests, self.duration)
+        if allowed:
+            return True
+        self.retry_after = retry_after
+        return self.throttle_failure()
+
+    def wait(self):
+        return self.retry_after
+
+
+class GCRAAnonRateThrottle(AnonRateThrottle, GCRAThrottle):
+    """AnonRateThrottle backed by the GCRA limiter."""
+
+
+class GCRAUserRateThrottle(UserRateThrottle, GCRAThrottle):
+    """UserRateThrottle backed by the GCRA limiter."""
+
+
+class CustomScopedRateThrottle(ScopedRateThrottle, GCRAThrottle):
+    """Scoped GCRA throttle that returns a friendly message and a Retry-After header when the limit is exceeded."""
 
-class CustomScopedRateThrottle(ScopedRateThrottle):
-    """Custom throttle to return a friendly message when rate limit is exceeded."""
+    def allow_request(self, request, view):
+        # Retries that will only replay a stored idempotent response cost nothing, so don't count them.
+        if has_stored_response(request, view):
+            return True
+        return super().allow_request(request, view)
 
     def throttle_failure(self):
         wait = self.wait()
         detail = (
-            f"Too many requests. Please try again after {int(wait)} seconds."
+            f"Too many requests. Please try again after {math.ceil(wait)} seconds."
             if wait
             else "You are sending requests too quickly. Please wait a bit."
         )
-        raise Throttled(detail=detail)
\ No newline at end of file
+        exc = Throttled(detail=detail)
+        exc.wait = wait  # sets the Retry-After header without DRF appending its own "Expected available" text
+        raise exc
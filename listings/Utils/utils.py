@@ -13,4 +13,33 @@ def generate_payment_reference(prefix="CHAP"):
     
     
     unique_id = uuid.uuid4().hex[:12].upper() 
-    return f"{prefix}-{unique_id}"
\ No newline at end of file
+    return f"{prefix}-{unique_id}"
+
+def parse_fields_param(raw, allowed):
+    """
+    Parse a comma separated ``fields=`` query parameter.
+
+    Args:
+        raw (str | None): The raw query parameter value.
+        allowed (Iterable[str]): Field names the client may ask for.
+
+    Returns:
+        list[str] | None: The requested field names in order, or None when all
+        fields should be returned.
+
+    Raises:
+        ValueError: If an unknown field name is requested.
+    """
+    if not raw:
+        return None
+
+    requested = []
+    for name in raw.split(","):
+        name = name.strip()
+        if name and name not in requested:
+            requested.append(name)
+
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return requested or None
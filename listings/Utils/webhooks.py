@@ -0,0 +1,85 @@
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import ChapaWebhookEvent
+from . import outbox
+
+logger = logging.getLogger(__name__)
+
+
+def _hmac_sha256(secret, message):
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_chapa_signature(raw_body, headers):
+    """
+    Check that a webhook request really comes from Chapa.
+
+    ``x-chapa-signature`` must be the HMAC-SHA256 of the raw body with the
+    webhook secret. Chapa's other header, ``Chapa-Signature``, is an HMAC of the
+    secret itself: it is the same for every delivery and says nothing about the
+    body, so it is not accepted on its own. Without a configured
+    CHAPA_WEBHOOK_SECRET every delivery is rejected.
+    """
+    secret = settings.CHAPA_WEBHOOK_SECRET
+    if not secret:
+        logger.error("CHAPA_WEBHOOK_SECRET is not configured; rejecting webhook")
+        return False
+
+    signature = headers.get("x-chapa-signature")
+    return bool(signature) and hmac.compare_digest(signature, _hmac_sha256(secret, raw_body))
+
+
+def webhook_event_id(payload):
+    """
+    Return a stable ID for a webhook delivery.
+
+    Chapa payloads carry no delivery ID, so redeliveries are recognised by a hash
+    of the canonical (key-sorted) payload unless an explicit ``id`` is present.
+    """
+    explicit = payload.get("id") or payload.get("event_id")
+    if explicit:
+        return str(explicit)[:128]
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def record_webhook_event(payload):
+    """
+    Append a delivery to the webhook event log.
+
+    Returns:
+        tuple[ChapaWebhookEvent, bool]: The event and whether it is new. A
+        redelivery is found through the unique ``event_id`` index and is not written again.
+    """
+    return ChapaWebhookEvent.objects.get_or_create(
+        event_id=webhook_event_id(payload),
+        defaults={
+            "event_type": str(payload.get("event") or payload.get("type") or "")[:50],
+            "reference": str(payload.get("reference") or "")[:100],
+            "tx_ref": str(payload.get("tx_ref") or "")[:100],
+            "status": str(payload.get("status") or "")[:20],
+            "payload": payload,
+        },
+    )
+
+
+def accept_webhook_event(payload):
+    """
+    Record a delivery and, if it is new, queue ``process_chapa_webhook_event`` for it.
+
+    The event row and its outbox row commit together. Shared by the sync and async webhook views.
+
+    Returns:
+        tuple[ChapaWebhookEvent, bool]: The event and whether it is new.
+    """
+    with transaction.atomic():
+        event, created = record_webhook_event(payload)
+        if created:
+            outbox.enqueue("listings.tasks.process_chapa_webhook_event", [event.pk])
+    return event, created
@@ -0,0 +1,244 @@
+"""
+Async (ASGI) versions of the I/O-bound payment endpoints, mounted under ``/api/async/``.
+
+Their sync counterparts in views.py hold a gunicorn thread for the whole Chapa round
+trip; these await it, so one uvicorn worker serves many payments at once. They give
+the same responses and share throttles, idempotency keys, references and the outbox
+with the sync views, so clients can switch between the two paths freely. Serve them
+with ``gunicorn alx_travel_app.asgi:application -k uvicorn_worker.UvicornWorker``.
+"""
+import json
+import logging
+import math
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import Payments
+from .tasks import verify_payment
+from .Utils import outbox
+from .Utils.chapa_client import ChapaUnavailable, get_async_chapa_client
+from .Utils.idempotency import async_idempotent
+from .Utils.payments import aclaim_verification, afind_payment, release_verification
+from .Utils.throttling import CustomScopedRateThrottle, GCRAAnonRateThrottle, GCRAUserRateThrottle
+from .Utils.webhooks import accept_webhook_event, verify_chapa_signature
+
+logger = logging.getLogger(__name__)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    """
+    The parts of DRF's APIView the payment views rely on, for async handlers.
+
+    Authenticates with DRF's ``authentication_classes`` off the event loop, parses
+    JSON bodies into ``request.data`` when ``json_body`` is set, and applies
+    ``throttle_classes`` (the same GCRA throttles and rates as the sync views).
+    ``request.user`` is thus the same user the sync views see, and so are the
+    throttle and idempotency keys built from it.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    throttle_classes = [GCRAAnonRateThrottle, GCRAUserRateThrottle]
+    json_body = False
+    query_budgets = {}
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Authenticators query the session and user tables; run them now, on a thread, not later on the loop.
+        try:
+            await sync_to_async(self._authenticate)(request)
+        except APIException as exc:
+            return self._auth_failed(request, exc)
+
+        if self.json_body:
+            try:
+                request.data = json.loads(request.body or b"{}")
+            except ValueError:
+                return JsonResponse({"error": "Request body must be JSON."}, status=status.HTTP_400_BAD_REQUEST)
+            if not isinstance(request.data, dict):
+                return JsonResponse({"error": "Request body must be a JSON object."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+        for throttle_class in self.throttle_classes:
+            try:
+                allowed = await sync_to_async(throttle_class().allow_request)(request, self)
+            except Throttled as exc:
+                return self._throttled(exc.detail, exc.wait)
+            if not allowed:
+                return self._throttled(Throttled.default_detail, None)
+
+        return await super().dispatch(request, *args, **kwargs)
+
+    def _authenticate(self, request):
+        """Set ``request.user`` and ``request.auth`` as APIView.initial() would."""
+        drf_request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        # Reading .auth runs the authenticators, which also set request.user on the wrapped request.
+        request.auth = drf_request.auth
+
+    def _auth_failed(self, request, exc):
+        """Answer like DRF: 401 with a challenge when the first authenticator has one, else 403."""
+        response = JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            authenticators = self.authentication_classes
+            header = authenticators[0]().authenticate_header(request) if authenticators else None
+            if header:
+                response["WWW-Authenticate"] = header
+            else:
+                response.status_code = status.HTTP_403_FORBIDDEN
+        return response
+
+    @staticmethod
+    def _throttled(detail, wait):
+        response = JsonResponse({"detail": str(detail)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        if wait is not None:
+            response["Retry-After"] = str(math.ceil(wait))
+        return response
+
+
+class AsyncChapaPaymentInitView(AsyncAPIView):
+    """Async API view to initialize a payment with Chapa."""
+    query_budgets = {"post": 2}
+    throttle_classes = [CustomScopedRateThrottle]
+    throttle_scope = 'payment'
+    idempotency_scope = 'payment_init'
+    json_body = True
+
+    @async_idempotent
+    async def post(self, request, *args, **kwargs):
+        amount = request.data.get("amount")
+        email = request.data.get("email")
+        booking_id = request.data.get("booking_id")
+
+        payment_reference = f"CHAP-{uuid.uuid4().hex[:10].upper()}"
+
+        payload = {
+            "amount": amount,
+            "currency": "ETB",
+            "email": email,
+            "tx_ref": payment_reference,
+            "callback_url": "http://localhost:8000/chapa/verify/",
+        }
+
+        try:
+            status_code, response_data = await get_async_chapa_client().initialize(payload)
+
+            if status_code == 200 and response_data.get("status") == "success":
+                checkout_url = response_data["data"]["checkout_url"]
+                chapa_ref = checkout_url.split("/")[-1]
+
+                await Payments.objects.acreate(
+                    booking_id=booking_id,
+                    amount=amount,
+                    trxn_reference=payment_reference,
+                    chapa_reference=chapa_ref,
+                )
+                logger.info(f"Chapa payment record created: ETB{amount} | Ref: {payment_reference} | "
+                            f"ChapaRef: {chapa_ref}")
+
+                return JsonResponse({
+                    "message": "Payment initialized successfully.",
+                    "payment_url": checkout_url,
+                    "merchant_reference": payment_reference,
+                    "chapa_reference": chapa_ref
+                }, status=status.HTTP_200_OK)
+
+            logger.error(f"Chapa payment initialization failed: {response_data}")
+            return JsonResponse({"error": "Failed to initialize payment", "details": response_data},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        except ChapaUnavailable as exc:
+            logger.error(f"Chapa unavailable during payment initialization: {exc}")
+            return JsonResponse({"error": "Payment gateway is temporarily unavailable. Please try again later."},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        except Exception:
+            logger.exception("Error initializing Chapa payment")
+            return JsonResponse({"error": "Internal server error while initializing payment."},
+                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncChapaPaymentVerifyView(AsyncAPIView):
+    """Async API view to request verification of a payment (queued for Celery, like the sync view)."""
+    query_budgets = {"get": 2}
+
+    async def get(self, request, reference, *args, **kwargs):
+        try:
+            payment = await afind_payment(reference)
+            if not payment:
+                logger.warning(f"No payment found for reference={reference}")
+                return JsonResponse({"error": "Payment record not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            status_url = request.build_absolute_uri(reverse('chapa-payment-status', args=[payment.trxn_reference]))
+            body = {
+                "reference": payment.chapa_reference,
+                "tx_ref": payment.trxn_reference,
+                "status": payment.status,
+                "status_url": status_url,
+            }
+
+            if payment.status != "pending":
+                return JsonResponse({"message": "Payment already verified.", **body}, status=status.HTTP_200_OK)
+
+            if await aclaim_verification(payment):
+                try:
+                    # The outbox row is the only write, so it needs no transaction of its own.
+                    await outbox.aenqueue(verify_payment, [str(payment.payment_id)])
+                except Exception:
+                    await sync_to_async(release_verification)(payment)
+                    raise
+                logger.info(f"Chapa payment verification queued: {payment.trxn_reference}")
+            else:
+                logger.info(f"Chapa payment verification already queued: {payment.trxn_reference}")
+            return JsonResponse({"message": "Payment verification in progress.", **body},
+                                status=status.HTTP_202_ACCEPTED)
+
+        except Exception:
+            logger.exception("Error queuing Chapa payment verification")
+            return JsonResponse({"error": "Internal server error while verifying payment."},
+                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncChapaPaymentWebhookView(AsyncAPIView):
+    """Async API view to receive Chapa payment webhooks (recorded, acknowledged, processed by Celery)."""
+    query_budgets = {"post": 3}
+    throttle_classes = []
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            raw_body = request.body
+            if not verify_chapa_signature(raw_body, request.headers):
+                logger.warning("Chapa webhook rejected: invalid signature")
+                return JsonResponse({"error": "Invalid webhook signature."}, status=status.HTTP_401_UNAUTHORIZED)
+
+            try:
+                payload = json.loads(raw_body)
+            except ValueError:
+                return JsonResponse({"error": "Webhook payload must be JSON."}, status=status.HTTP_400_BAD_REQUEST)
+
+            if not isinstance(payload, dict) or not (payload.get("reference") or payload.get("tx_ref")):
+                logger.error("Chapa webhook missing 'reference' field")
+                return JsonResponse({"error": "Missing 'reference' in webhook payload"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+            # The event and its outbox row need one transaction, which the async ORM cannot open.
+            event, created = await sync_to_async(accept_webhook_event)(payload)
+
+            if not created:
+                logger.info(f"Duplicate Chapa webhook {event.event_id} ignored")
+                return JsonResponse({"message": "Webhook already received."}, status=status.HTTP_200_OK)
+
+            logger.info(f"Chapa webhook {event.event_id} accepted for reference: {event.reference or event.tx_ref}")
+            return JsonResponse({"message": "Webhook received."}, status=status.HTTP_200_OK)
+
+        except Exception:
+            logger.exception("Error processing Chapa webhook")
+            return JsonResponse({"error": "Internal server error while processing webhook."},
+                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,68 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from listings.Utils.chapa_client import ChapaClient, ChapaUnavailable
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark Chapa calls (initialize + verify) through the pooled ChapaClient against bare "
+        "requests calls. Intended to run against `manage.py fake_chapa`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default=settings.CHAPA_BASE_URL)
+        parser.add_argument("--requests", type=int, default=200, help="Payment flows per mode.")
+        parser.add_argument("--concurrency", type=int, default=8)
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/")
+        client = ChapaClient(base_url=base_url)
+
+        def bare_flow():
+            headers = {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
+            tx_ref = f"CHAP-{uuid.uuid4().hex[:10].upper()}"
+            requests.post(f"{base_url}/transaction/initialize", json={"tx_ref": tx_ref, "amount": "10"},
+                          headers=headers)
+            requests.get(f"{base_url}/transaction/verify/{tx_ref}", headers=headers)
+
+        def pooled_flow():
+            tx_ref = f"CHAP-{uuid.uuid4().hex[:10].upper()}"
+            client.initialize({"tx_ref": tx_ref, "amount": "10"})
+            client.verify(tx_ref)
+
+        self.stdout.write(f"{'mode':<8} {'ok':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'flows/s':>8}")
+        for name, flow in (("bare", bare_flow), ("pooled", pooled_flow)):
+            self._run(name, flow, options["requests"], options["concurrency"])
+        self.stdout.write(f"circuit breaker state after run: {client.breaker.state}")
+
+    def _run(self, name, flow, total, concurrency):
+        def timed(_):
+            start = time.perf_counter()
+            try:
+                flow()
+                return (time.perf_counter() - start) * 1000, None
+            except (requests.RequestException, ChapaUnavailable) as exc:
+                return (time.perf_counter() - start) * 1000, exc
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, range(total)))
+        wall = time.perf_counter() - started
+
+        timings = sorted(elapsed for elapsed, error in results if error is None)
+        errors = sum(1 for _, error in results if error is not None)
+        if len(timings) < 2:
+            self.stdout.write(f"{name:<8} {len(timings):>6} {errors:>6}   (not enough successful calls)")
+            return
+        cuts = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f"{name:<8} {len(timings):>6} {errors:>6} {statistics.median(timings):>8.1f} "
+            f"{cuts[94]:>8.1f} {cuts[98]:>8.1f} {total / wall:>8.1f}"
+        )
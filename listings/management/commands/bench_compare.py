@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def change(before, after):
+    """Relative change in percent, or None when either side is missing."""
+    if before in (None, 0) or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare two `manage.py bench_http --output` result files (e.g. before and after a commit): "
+        "throughput and p50/p95/p99 per endpoint, with an optional regression threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline", help="Results of the reference run.")
+        parser.add_argument("candidate", help="Results of the run under test.")
+        parser.add_argument("--fail-over", type=float, default=None,
+                            help="Exit with an error if any endpoint's p95/p99 grows or its throughput "
+                                 "drops by more than this many percent.")
+
+    def handle(self, *args, **options):
+        baseline, candidate = self._load(options["baseline"]), self._load(options["candidate"])
+        self.stdout.write(f"baseline  {baseline['meta'].get('commit')} ({baseline['meta'].get('database')})  "
+                          f"candidate {candidate['meta'].get('commit')} ({candidate['meta'].get('database')})")
+        self.stdout.write(f"{'endpoint':<24} {'req/s':>16} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16}")
+
+        regressions = []
+        names = sorted(set(baseline["endpoints"]) | set(candidate["endpoints"]))
+        rows = [(name, baseline["endpoints"].get(name), candidate["endpoints"].get(name)) for name in names]
+        rows.append(("TOTAL", baseline["total"], candidate["total"]))
+        for name, before, after in rows:
+            if before is None or after is None:
+                self.stdout.write(f"{name:<24} only in {'candidate' if before is None else 'baseline'}")
+                continue
+            cells = []
+            for metric, worse_when_higher in (("throughput_rps", False), ("p50_ms", True), ("p95_ms", True),
+                                              ("p99_ms", True)):
+                delta = change(before.get(metric), after.get(metric))
+                cells.append(f"{after.get(metric) or 0:>8.1f} {f'{delta:+.0f}%' if delta is not None else '':>7}")
+                threshold = options["fail_over"]
+                # p50 is reported but not gated: it moves with noise more than the tail does.
+                if threshold is not None and delta is not None and metric != "p50_ms":
+                    if (delta if worse_when_higher else -delta) > threshold:
+                        regressions.append(f"{name} {metric} {before[metric]} -> {after[metric]} ({delta:+.1f}%)")
+            self.stdout.write(f"{name:<24} " + " ".join(cells))
+
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+
+    def _load(self, path):
+        try:
+            with open(path) as results:
+                return json.load(results)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from listings.models import Booking, Listing, Payments
+
+DEFAULT_TRACE = Path(settings.BASE_DIR) / "benchmarks" / "scenarios" / "mixed.jsonl"
+FIXTURE_ROWS = 2000  # rows of each kind sampled from the database to fill in placeholders
+
+
+def load_trace(path):
+    """Read a JSONL trace: one request template per line (blank lines and ``#`` comments are skipped)."""
+    entries = []
+    with open(path) as trace:
+        for number, line in enumerate(trace, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f"{path}:{number}: invalid JSON ({exc})")
+            if "name" not in entry or "path" not in entry:
+                raise CommandError(f"{path}:{number}: every entry needs a 'name' and a 'path'")
+            entry.setdefault("method", "GET")
+            entry.setdefault("weight", 1)
+            entries.append(entry)
+    if not entries:
+        raise CommandError(f"{path} has no requests")
+    return entries
+
+
+def fill(template, values):
+    """Substitute ``{placeholder}`` values into every string of a path, query or JSON body template."""
+    if isinstance(template, str):
+        return template.format_map(values)
+    if isinstance(template, dict):
+        return {key: fill(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill(value, values) for value in template]
+    return template
+
+
+def summarise(latencies, statuses, errors, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one endpoint or the whole run."""
+    stats = {"requests": len(latencies), "errors": errors,
+             "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0}
+    if latencies:
+        latencies = sorted(latencies)
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+        stats.update(mean_ms=round(statistics.fmean(latencies), 2), p50_ms=round(cuts[49], 2),
+                     p95_ms=round(cuts[94], 2), p99_ms=round(cuts[98], 2), max_ms=round(latencies[-1], 2))
+    else:
+        stats.update(mean_ms=None, p50_ms=None, p95_ms=None, p99_ms=None, max_ms=None)
+    stats["statuses"] = dict(sorted(statuses.items()))
+    return stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a JSONL request trace against a running server (e.g. gunicorn with "
+        "alx_travel_app.bench_settings) and report throughput and p50/p95/p99 latency per endpoint. "
+        "Write the results with --output and compare runs with `manage.py bench_compare`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--trace", default=str(DEFAULT_TRACE), help="JSONL file of request templates.")
+        parser.add_argument("--mode", choices=["mix", "replay"], default="mix",
+                            help="mix: draw entries at random by weight; replay: send them in file order, cycling.")
+        parser.add_argument("--requests", type=int, default=2000, help="Measured requests (after warm-up).")
+        parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds instead.")
+        parser.add_argument("--warmup", type=int, default=100, help="Requests sent first and not measured.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once.")
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--seed", type=int, default=42, help="Same seed, same request sequence.")
+        parser.add_argument("--output", default=None, help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        entries = load_trace(options["trace"])
+        self.rng = random.Random(options["seed"])
+        self.fixtures = self._load_fixtures()
+        results = asyncio.run(self._run(entries, options))
+
+        self._report(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+                output.write("\n")
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _load_fixtures(self):
+        """IDs and references that exist in the database, for the trace's placeholders."""
+        fixtures = {
+            "listing_ids": [str(pk) for pk in Listing.objects.values_list("pk", flat=True)[:FIXTURE_ROWS]],
+            "titles": list(Listing.objects.values_list("title", flat=True)[:FIXTURE_ROWS]),
+            "cities": sorted(set(Listing.objects.values_list("location", flat=True)[:FIXTURE_ROWS])),
+            "booking_ids": [str(pk) for pk in Booking.objects.values_list("pk", flat=True)[:FIXTURE_ROWS]],
+            "payments": list(Payments.objects.values_list("trxn_reference", "chapa_reference")[:FIXTURE_ROWS]),
+        }
+        if not fixtures["listing_ids"]:
+            raise CommandError("No listings found; seed the database first (manage.py seed).")
+        return fixtures
+
+    def _values(self, number):
+        """Placeholder values for one request; a stay far in the future rarely collides with other bookings."""
+        rng, fixtures = self.rng, self.fixtures
+        check_in = timezone.localdate() + timedelta(days=rng.randint(400, 40000))
+        tx_ref, chapa_ref = rng.choice(fixtures["payments"]) if fixtures["payments"] else ("CHAP-NONE", "")
+        return {
+            "n": number,
+            "listing_id": rng.choice(fixtures["listing_ids"]),
+            "booking_id": rng.choice(fixtures["booking_ids"]) if fixtures["booking_ids"] else "",
+            "city": rng.choice(fixtures["cities"]),
+            "keyword": rng.choice(rng.choice(fixtures["titles"]).split()).lower(),
+            "check_in": check_in.isoformat(),
+            "check_out": (check_in + timedelta(days=rng.randint(1, 7))).isoformat(),
+            "email": f"load{rng.randrange(10 ** 6)}@example.com",
+            "tx_ref": tx_ref,
+            "chapa_ref": chapa_ref or "",
+        }
+
+    def _schedule(self, entries, mode):
+        """Endless, seed-determined sequence of ``(entry, placeholder values)``."""
+        weights = [entry["weight"] for entry in entries]
+        number = 0
+        while True:
+            number += 1
+            if mode == "replay":
+                entry = entries[(number - 1) % len(entries)]
+            else:
+                entry = self.rng.choices(entries, weights=weights)[0]
+            yield entry, self._values(number)
+
+    def _build(self, entry, values):
+        request = {"method": entry["method"], "url": fill(entry["path"], values),
+                   "params": fill(entry.get("params") or {}, values), "headers": dict(entry.get("headers") or {})}
+        if "json" in entry:
+            body = json.dumps(fill(entry["json"], values)).encode()
+            request["content"] = body
+            request["headers"]["Content-Type"] = "application/json"
+            if entry.get("sign"):
+                # Sign like Chapa does, so webhook deliveries pass verification.
+                secret = settings.CHAPA_WEBHOOK_SECRET or ""
+                request["headers"]["x-chapa-signature"] = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return request
+
+    async def _run(self, entries, options):
+        schedule = self._schedule(entries, options["mode"])
+        warmup, measured = options["warmup"], options["requests"]
+        deadline = None
+        latencies = defaultdict(list)
+        statuses = defaultdict(Counter)
+        errors = Counter()
+        sent = 0
+        started = None
+
+        limits = httpx.Limits(max_connections=options["concurrency"], max_keepalive_connections=options["concurrency"])
+        async with httpx.AsyncClient(base_url=options["base_url"], limits=limits,
+                                     timeout=options["timeout"]) as client:
+
+            async def worker():
+                nonlocal sent, started, deadline
+                while True:
+                    if sent == warmup and started is None:
+                        started = time.perf_counter()
+                        if options["duration"]:
+                            deadline = started + options["duration"]
+                    if deadline is not None:
+                        if time.perf_counter() >= deadline:
+                            return
+                    elif sent >= warmup + measured:
+                        return
+                    entry, values = next(schedule)
+                    record = sent >= warmup
+                    sent += 1
+
+                    request = self._build(entry, values)
+                    began = time.perf_counter()
+                    try:
+                        response = await client.request(**request)
+                        status = response.status_code
+                    except httpx.HTTPError as exc:
+                        status = type(exc).__name__
+                    elapsed_ms = (time.perf_counter() - began) * 1000
+                    if not record:
+                        continue
+
+                    name = entry["name"]
+                    latencies[name].append(elapsed_ms)
+                    statuses[name][str(status)] += 1
+                    expected = entry.get("expect")
+                    ok = status in expected if expected else isinstance(status, int) and status < 400
+                    if not ok:
+                        errors[name] += 1
+
+            amount = f"{options['duration']}s" if options["duration"] else f"{measured} requests"
+            self.stdout.write(f"Sending {warmup} warm-up requests, then {amount} of load "
+                              f"with {options['concurrency']} in flight...")
+            await asyncio.gather(*(worker() for _ in range(options["concurrency"])))
+
+        elapsed = time.perf_counter() - (started or time.perf_counter())
+        endpoints = {name: summarise(latencies[name], statuses[name], errors[name], elapsed)
+                     for name in sorted(latencies)}
+        all_statuses = sum(statuses.values(), Counter())
+        return {
+            "meta": {
+                "commit": self._commit(),
+                "timestamp": timezone.now().isoformat(),
+                "base_url": options["base_url"],
+                "trace": str(options["trace"]),
+                "mode": options["mode"],
+                "concurrency": options["concurrency"],
+                "seed": options["seed"],
+                "database": connection.vendor,
+                "elapsed_seconds": round(elapsed, 3),
+            },
+            "total": summarise([ms for values in latencies.values() for ms in values], all_statuses,
+                               sum(errors.values()), elapsed),
+            "endpoints": endpoints,
+        }
+
+    def _commit(self):
+        try:
+            return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _report(self, results):
+        self.stdout.write(f"{'endpoint':<24} {'reqs':>7} {'errors':>7} {'req/s':>9} {'p50 ms':>9} "
+                          f"{'p95 ms':>9} {'p99 ms':>9}")
+        rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+        for name, stats in rows:
+            if not stats["requests"]:
+                continue
+            self.stdout.write(
+                f"{name:<24} {stats['requests']:>7} {stats['errors']:>7} {stats['throughput_rps']:>9.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+            )
@@ -0,0 +1,117 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+
+from listings.models import Listing
+from listings.Utils.cache import bump_table_version
+from listings.views import ListingListCreateView
+
+TITLE_PREFIX = "Benchmark listing "
+
+LOCATIONS = ["Abuja", "Accra", "Addis Ababa", "Cairo", "Kigali", "Lagos", "Nairobi", "Zanzibar"]
+
+SCENARIOS = {
+    "first_page": {},
+    "location_exact": {"location": "Lagos"},
+    "location_prefix": {"location_prefix": "A"},
+    "price_range": {"min_price": "100", "max_price": "250", "sort": "price_asc"},
+    "location_and_price": {"location": "Nairobi", "min_price": "50", "max_price": "400"},
+    "created_window": {"created_after": "2000-01-01T00:00:00Z", "created_before": "2100-01-01T00:00:00Z"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the filtered listing search endpoint at growing table sizes and report p50/p95 latency. "
+        "Every request misses the response cache, so the database queries are what is timed. The rows it "
+        "adds are deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 50_000, 100_000],
+                            help="Table sizes to measure at (rows are added to reach each size).")
+        parser.add_argument("--iterations", type=int, default=50, help="Requests per scenario and size.")
+        parser.add_argument("--deep-pages", type=int, default=20,
+                            help="Pages to follow through the cursor for the deep paging scenario.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark rows instead of deleting them.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        view = ListingListCreateView.as_view(throttle_classes=[])
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{'rows':>8}  {'scenario':<20} {'p50 ms':>8} {'p95 ms':>8}")
+        try:
+            for size in sorted(options["sizes"]):
+                self._grow_table(size, rng)
+
+                for name, params in SCENARIOS.items():
+                    timings = [self._timed(view, factory, params)[0] for _ in range(options["iterations"])]
+                    self._report(size, name, timings)
+
+                timings = self._deep_page_timings(view, factory, options["deep_pages"])
+                self._report(size, f"page_{options['deep_pages']}_deep", timings)
+        finally:
+            if not options["keep"]:
+                self._remove_rows()
+
+    def _grow_table(self, size, rng, chunk_size=5_000):
+        missing = size - Listing.objects.count()
+        while missing > 0:
+            batch = [
+                Listing(
+                    title=f"{TITLE_PREFIX}{rng.randrange(10**9)}",
+                    description="Benchmark description " * 10,
+                    price=Decimal(rng.randrange(1_000, 100_000)) / 100,
+                    location=rng.choice(LOCATIONS),
+                )
+                for _ in range(min(chunk_size, missing))
+            ]
+            with transaction.atomic():
+                Listing.objects.bulk_create(batch)
+            missing -= len(batch)
+        # bulk_create sends no signals: invalidate cached pages for the new rows.
+        bump_table_version(Listing._meta.db_table)
+
+    def _remove_rows(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            # A plain DELETE: a queryset delete() would load every row to run cascades and signals.
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(Listing._meta.db_table)} WHERE title LIKE %s",
+                           [f"{TITLE_PREFIX}%"])
+            self.stdout.write(f"Removed {cursor.rowcount} benchmark listings.")
+        bump_table_version(Listing._meta.db_table)
+
+    def _timed(self, view, factory, params):
+        request = factory.get("/api/listings/", params)
+        bump_table_version(Listing._meta.db_table)  # a fresh cache key: time the queries, not a cached page
+        start = time.perf_counter()
+        response = view(request)
+        response.render()
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"Unexpected status {response.status_code}: {response.data}")
+        return elapsed, response.data
+
+    def _deep_page_timings(self, view, factory, depth):
+        """Time only the last page of a ``depth`` page cursor walk, repeated a few times."""
+        timings = []
+        for _ in range(5):
+            params = {}
+            for _ in range(depth):
+                elapsed, data = self._timed(view, factory, params)
+                if not data["next_cursor"]:
+                    break
+                params = {"cursor": data["next_cursor"]}
+            timings.append(elapsed)
+        return timings
+
+    def _report(self, size, name, timings):
+        p50 = statistics.median(timings)
+        p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        self.stdout.write(f"{size:>8}  {name:<20} {p50:>8.2f} {p95:>8.2f}")
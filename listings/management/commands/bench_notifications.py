@@ -0,0 +1,64 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import get_template
+from django.test.utils import override_settings
+
+from listings.Utils import notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark notification delivery against the locmem email backend: one rendered template and "
+        "connection per email (the old task) versus notifications.deliver() over one connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=5000)
+        parser.add_argument("--recipients", type=int, default=1000, help="Distinct recipient addresses.")
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]  # fresh addresses, so earlier runs' rate-limit counters don't interfere
+        messages = [
+            notifications.booking_confirmation(f"guest{i % options['recipients']}.{run}@example.com", f"booking-{i}")
+            for i in range(options["messages"])
+        ]
+        overrides = {
+            "EMAIL_BACKEND": "django.core.mail.backends.locmem.EmailBackend",
+            "NOTIFICATION_RATE_LIMIT": 0,
+        }
+        with override_settings(**overrides):
+            self.stdout.write(f"{'mode':<10} {'sent':>6} {'seconds':>8} {'emails/s':>9}")
+            self._run("per-email", lambda: self._per_email(messages))
+            self._run("batched", lambda: notifications.deliver(messages)[0])
+
+        rate_limit = settings.NOTIFICATION_RATE_LIMIT
+        with override_settings(**{**overrides, "NOTIFICATION_RATE_LIMIT": rate_limit}):
+            started = time.perf_counter()
+            sent, deferred = notifications.deliver(messages)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"with rate limit {rate_limit}/recipient: {sent} sent, {len(deferred)} deferred "
+                              f"in {elapsed:.3f}s")
+
+    def _per_email(self, messages):
+        engine = engines["django"]
+        for message in messages:
+            # Parse the templates and open a connection for every email, as one task per email does.
+            subject_source, body_name = notifications.NOTIFICATIONS[message["kind"]]
+            body_source = get_template(body_name).template.source
+            subject = engine.from_string(subject_source).render(message["context"]).strip()
+            body = engine.from_string(body_source).render(message["context"]).strip()
+            send_mail(subject, body, settings.EMAIL_HOST_USER, [message["to"]])
+        return len(messages)
+
+    def _run(self, name, send):
+        mail.outbox = []
+        started = time.perf_counter()
+        sent = send()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{name:<10} {sent:>6} {elapsed:>8.3f} {sent / elapsed:>9.0f}")
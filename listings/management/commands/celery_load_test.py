@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from django.core.management.base import BaseCommand
+
+from listings.tasks import queue_latency_probe
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure queue latency per task class under mixed load. Floods the notifications queue, then sends "
+        "payment and maintenance probes behind it, and reports how long each class waited before a worker "
+        "picked it up. Needs the broker, result backend and workers running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--notifications", type=int, default=2000, help="Probes on the notifications queue.")
+        parser.add_argument("--payments", type=int, default=200, help="Probes on the payments queue.")
+        parser.add_argument("--maintenance", type=int, default=20, help="Probes on the maintenance queue.")
+        parser.add_argument("--notification-work-ms", type=float, default=50, help="Simulated email send time.")
+        parser.add_argument("--payment-work-ms", type=float, default=150, help="Simulated Chapa round trip.")
+        parser.add_argument("--maintenance-work-ms", type=float, default=1000, help="Simulated sweep time.")
+        parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for all probes.")
+
+    def handle(self, *args, **options):
+        # The backlog goes in first, as after a flash sale; payments and maintenance arrive behind it.
+        plan = [
+            ("notifications", options["notifications"], options["notification_work_ms"]),
+            ("payments", options["payments"], options["payment_work_ms"]),
+            ("maintenance", options["maintenance"], options["maintenance_work_ms"]),
+        ]
+        results = {queue: [] for queue, _, _ in plan}
+        for queue, count, work_ms in plan:
+            for _ in range(count):
+                results[queue].append(queue_latency_probe.apply_async(args=[time.time(), work_ms], queue=queue))
+        self.stdout.write(f"Sent {sum(len(r) for r in results.values())} probes, waiting for workers...")
+
+        deadline = time.monotonic() + options["timeout"]
+        self.stdout.write(f"{'queue':<14} {'done':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for queue, pending in results.items():
+            waits = []
+            for result in pending:
+                try:
+                    waits.append(result.get(timeout=max(0.1, deadline - time.monotonic())) * 1000)
+                except CeleryTimeoutError:
+                    break
+            self._report(queue, len(pending), waits)
+
+    def _report(self, queue, sent, waits):
+        if len(waits) < 2:
+            self.stdout.write(f"{queue:<14} {len(waits):>6}/{sent}   (not enough results)")
+            return
+        waits.sort()
+        cuts = statistics.quantiles(waits, n=100, method="inclusive")
+        self.stdout.write(
+            f"{queue:<14} {len(waits):>6} {statistics.median(waits):>9.1f} {cuts[94]:>9.1f} "
+            f"{cuts[98]:>9.1f} {waits[-1]:>9.1f}"
+        )
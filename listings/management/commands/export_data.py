@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from listings.Utils.exports import DATASETS, FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = ("Stream listings, bookings or payments to a file (or stdout) as NDJSON or CSV, optionally gzipped. "
+            "Memory use stays flat whatever the table size.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(DATASETS))
+        parser.add_argument("--format", choices=list(FORMATS), default="ndjson")
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output.")
+        parser.add_argument("--output", "-o", default="-", help="File to write, '-' for stdout (default).")
+        parser.add_argument("--created-after", type=parse_datetime, help="Only rows created at or after this time.")
+        parser.add_argument("--created-before", type=parse_datetime, help="Only rows created before this time.")
+        parser.add_argument("--database", help="Database alias to read from, e.g. replica1 (default: the primary).")
+
+    def handle(self, *args, **options):
+        chunks = export_stream(options["dataset"], options["format"], options["gzip"],
+                               options["created_after"], options["created_before"], options["database"])
+        if options["output"] == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        written = 0
+        with open(options["output"], "wb") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                written += len(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']} "
+                                             f"({written} bytes)."))
@@ -0,0 +1,120 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+VERIFY_RE = re.compile(r"^/v1/transaction/verify/(?P<reference>[^/]+)/?$")
+
+
+class FakeChapaState:
+    """Transactions known to the fake gateway plus the configured latency/failure behaviour."""
+
+    def __init__(self, latency_ms, jitter_ms, failure_rate, seed):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.transactions = {}  # tx_ref and chapa reference -> transaction data
+
+    def delay_and_maybe_fail(self):
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self.random.random() < self.failure_rate
+        time.sleep(delay)
+        return fail
+
+
+def make_handler(state):
+    class FakeChapaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real gateway
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status_code, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if state.delay_and_maybe_fail():
+                return self._send(503, {"status": "failed", "message": "Service temporarily unavailable"})
+            if self.path.rstrip("/") != "/v1/transaction/initialize":
+                return self._send(404, {"status": "failed", "message": "Not found"})
+
+            data = json.loads(body or b"{}")
+            reference = f"AP{uuid.uuid4().hex[:10].upper()}"
+            transaction = {
+                "tx_ref": data.get("tx_ref"),
+                "reference": reference,
+                "amount": data.get("amount"),
+                "currency": data.get("currency", "ETB"),
+                "email": data.get("email"),
+                "status": "success",
+            }
+            with state.lock:
+                state.transactions[transaction["tx_ref"]] = transaction
+                state.transactions[reference] = transaction
+            host = self.headers.get("Host", "localhost")
+            self._send(200, {
+                "status": "success",
+                "message": "Hosted Link",
+                "data": {"checkout_url": f"http://{host}/checkout/payment/{reference}"},
+            })
+
+        def do_GET(self):
+            if state.delay_and_maybe_fail():
+                return self._send(503, {"status": "failed", "message": "Service temporarily unavailable"})
+            match = VERIFY_RE.match(self.path)
+            if not match:
+                return self._send(404, {"status": "failed", "message": "Not found"})
+
+            with state.lock:
+                transaction = state.transactions.get(match.group("reference"))
+            if transaction is None:
+                return self._send(404, {"status": "failed", "message": "Invalid transaction or Transaction not found"})
+            self._send(200, {"status": "success", "message": "Payment details", "data": transaction})
+
+    return FakeChapaHandler
+
+
+class FakeChapaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 refuses connections under load-test bursts
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Chapa API (initialize and verify) with configurable latency and "
+        "failure rate. Point CHAPA_BASE_URL at http://<host>:<port>/v1 to use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=float, default=150, help="Mean response latency.")
+        parser.add_argument("--jitter-ms", type=float, default=50, help="Uniform jitter around the mean latency.")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        state = FakeChapaState(options["latency_ms"], options["jitter_ms"], options["failure_rate"], options["seed"])
+        server = FakeChapaServer((options["host"], options["port"]), make_handler(state))
+        self.stdout.write(f"Fake Chapa listening on http://{options['host']}:{options['port']}/v1")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
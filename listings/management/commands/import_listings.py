@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.Utils.imports import ListingImportError, import_listings, infer_format
+
+
+class Command(BaseCommand):
+    help = ("Bulk-import listings from a CSV (with a header row) or NDJSON file, optionally gzipped. "
+            "Rows are validated with ListingSerializer's rules in batches and saved with one bulk_create per batch; "
+            "invalid rows are skipped and reported.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, help="Rows per batch (IMPORT_BATCH_SIZE by default).")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, insert nothing.")
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or infer_format(options["path"])
+        if file_format is None:
+            raise CommandError("Cannot tell the file format from its name; pass --format csv|ndjson.")
+
+        started = time.perf_counter()
+        try:
+            with open(options["path"], "rb") as stream:
+                report = import_listings(stream, file_format, options["batch_size"], options["dry_run"])
+        except (OSError, ListingImportError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        rows = report["created"] + report["rejected"]
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['created']} listing(s), rejected {report['rejected']}, "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from listings.Utils.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized rating average, count and histogram of every listing from its reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--listing", action="append", dest="listing_ids",
+                            help="Only rebuild this listing ID (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_rating_aggregates(options["listing_ids"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {updated} reviewed listing(s)."))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from listings.Utils.outbox import relay_pending
+
+
+class Command(BaseCommand):
+    help = "Publish committed outbox messages to the Celery broker, continuously or once (--once)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit.")
+        parser.add_argument("--interval", type=float, default=settings.OUTBOX_POLL_INTERVAL,
+                            help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            sent = relay_pending()
+            self.stdout.write(f"Dispatched {sent} outbox message(s).")
+            return
+
+        self.stdout.write("Outbox relay started.")
+        while True:
+            close_old_connections()
+            try:
+                sent = relay_pending(max_batches=10)
+            except Exception as exc:
+                self.stderr.write(f"Outbox relay pass failed: {exc}")
+                sent = 0
+            if not sent:
+                time.sleep(options["interval"])
@@ -1,34 +1,231 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.contrib.auth import get_user_model
-from listings.models import Listing, Booking, Review
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from listings.models import Booking, Listing, Payments, Review
+from listings.Utils import search
+from listings.Utils.cache import bump_table_version
 
-def run():
-    User = get_user_model()
+CITIES = ["Addis Ababa", "Abuja", "Lagos", "Nairobi", "Accra", "Kigali", "Kampala", "Dar es Salaam", "Cape Town",
+          "Johannesburg", "Marrakesh", "Cairo", "Zanzibar", "Mombasa", "Dakar", "Lusaka", "Bahir Dar", "Hawassa"]
+ADJECTIVES = ["Cozy", "Luxury", "Modern", "Rustic", "Sunny", "Quiet", "Spacious", "Charming", "Budget", "Elegant",
+              "Stylish", "Family", "Romantic", "Secluded", "Central", "Bright"]
+KINDS = ["Villa", "Apartment", "Studio", "Cottage", "Loft", "Guesthouse", "Bungalow", "Penthouse", "Hostel Room",
+         "Cabin", "Townhouse", "Suite"]
+FEATURES = ["a private pool", "a sea view", "fast wifi", "a rooftop terrace", "free parking", "a garden",
+            "a fully equipped kitchen", "air conditioning", "a fireplace", "a lake view", "a gym", "24h security",
+            "breakfast included", "a workspace", "mountain views", "a balcony"]
+COMMENTS = {
+    1: ["Not as described.", "Dirty and noisy, would not return.", "Host never answered our messages."],
+    2: ["Location was fine but the room needs work.", "Overpriced for what you get."],
+    3: ["Decent stay, nothing special.", "Good value, a few small issues.", "Okay for a night or two."],
+    4: ["Great location, would recommend.", "Comfortable and clean.", "Lovely host and a nice neighbourhood."],
+    5: ["Amazing stay!", "Perfect in every way, we will be back.", "Spotless, beautiful and great host."],
+}
+RATING_WEIGHTS = [3, 5, 15, 37, 40]  # skewed towards good reviews, like real platforms
+BOOKING_STATUSES = (["confirmed"] * 6) + (["pending"] * 3) + ["canceled"]
 
-    """Seed the database with initial data for Listings, Bookings, and Reviews."""
-    # Create a test user
-    user, _ = User.objects.get_or_create(
-        email="testuser@example.com",
-        defaults={"username": "testuser", "password": "password123"}
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, listings, bookings, reviews and payments with chunked bulk inserts. "
+        "The same --seed always produces the same data (use --clear to re-seed a database)."
     )
-    user.set_password("password123")
-    user.save()
-    
-    # Create sample listings
-    listings_data = [
-        {"title": "Luxury Villa", "description": "5-star villa with pool", "price": 500, "location": "Abuja"},
-        {"title": "Beachside Apartment", "description": "2-bedroom apartment near the beach", "price": 200, "location": "Lagos"},
-        {"title": "Budget Hostel", "description": "Shared hostel room for backpackers", "price": 50, "location": "Nairobi"}
-    ]
-
-    listings = []
-    for data in listings_data:
-        listing, _ = Listing.objects.get_or_create(**data)
-        listings.append(listing)
-
-    # Create sample bookings
-    Booking.objects.get_or_create(listing=listings[0], user=user, status="confirmed")
-    Booking.objects.get_or_create(listing=listings[1], user=user, status="pending")
-
-    # Create sample reviews
-    Review.objects.get_or_create(listing=listings[0], user=user, rating=5, comment="Amazing stay!")
-    Review.objects.get_or_create(listing=listings[1], user=user, rating=4, comment="Great location, would recommend.")
\ No newline at end of file
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--listings", type=int, default=100)
+        parser.add_argument("--bookings", type=int, default=200)
+        parser.add_argument("--reviews", type=int, default=300)
+        parser.add_argument("--payments", type=int, default=150, help="At most one payment per booking.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed, same data.")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per bulk INSERT / transaction.")
+        parser.add_argument("--clear", action="store_true",
+                            help="Delete all listings, bookings, reviews, payments and seed users first.")
+
+    def handle(self, *args, **options):
+        self.seed = options["seed"]
+        self.rng = random.Random(self.seed)
+        self.chunk_size = options["chunk_size"]
+        started = time.perf_counter()
+
+        if options["clear"]:
+            self._clear()
+
+        try:
+            user_ids = self._seed_users(options["users"])
+            reviews = options["reviews"] if options["listings"] else 0
+            ratings = self._rating_totals(reviews, options["listings"])
+            listing_ids, prices = self._seed_listings(options["listings"], ratings)
+            if listing_ids:
+                booking_rows = self._seed_bookings(options["bookings"], listing_ids, prices, user_ids)
+                self._seed_payments(min(options["payments"], len(booking_rows)), booking_rows)
+                self._seed_reviews(reviews, listing_ids, user_ids)
+        except IntegrityError as exc:
+            raise CommandError(f"Seed data already exists ({exc}). Re-run with --clear or another --seed.")
+
+        # bulk_create skips signals: invalidate what they would have (rating aggregates are written directly).
+        bump_table_version(Listing._meta.db_table, Review._meta.db_table)
+        search.reset_index()
+
+        self.stdout.write(self.style.SUCCESS(f"Seeding finished in {time.perf_counter() - started:.1f}s."))
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _insert(self, model, rows):
+        """Bulk insert a generator of model instances ``chunk_size`` rows per transaction."""
+        label = f"{model.__name__} rows"
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                total += self._flush(model, chunk)
+                self.stdout.write(f"  {label}: {total}")
+                chunk = []
+        if chunk:
+            total += self._flush(model, chunk)
+        self.stdout.write(f"Created {total} {label}.")
+        return total
+
+    def _flush(self, model, chunk):
+        with transaction.atomic():
+            model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+        return len(chunk)
+
+    def _clear(self):
+        self.stdout.write("Clearing existing data...")
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Plain DELETEs: a queryset delete() would load every row to run cascades and signals.
+            for model in (Payments, Booking, Review, Listing):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+            get_user_model().objects.filter(username__startswith="seed-user-").delete()
+
+    def _seed_users(self, count):
+        User = get_user_model()
+        password = make_password("password123")  # hashed once, shared by every seed user
+        users = [User(username=f"seed-user-{i}", email=f"seed-user-{i}@example.com", password=password)
+                 for i in range(count)]
+        for start in range(0, count, self.chunk_size):
+            # Seed users are shared between seeds, so re-runs keep the existing ones.
+            User.objects.bulk_create(users[start:start + self.chunk_size], ignore_conflicts=True)
+        self.stdout.write(f"Created up to {count} User rows.")
+        return list(User.objects.filter(username__startswith="seed-user-").order_by("pk").values_list("pk", flat=True))
+
+    def _review_draws(self, count, listings):
+        """Yield ``(listing index, rating)`` for each review; a dedicated RNG makes the sequence repeatable."""
+        rng = random.Random(f"{self.seed}:reviews")
+        for _ in range(count):
+            yield rng.randrange(listings), rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0]
+
+    def _rating_totals(self, count, listings):
+        """Per-listing rating histograms of the reviews to come, so listings are inserted with their aggregates."""
+        histograms = [[0] * 5 for _ in range(listings)]
+        for index, rating in self._review_draws(count, listings):
+            histograms[index][rating - 1] += 1
+        return histograms
+
+    def _seed_listings(self, count, ratings):
+        rng = self.rng
+        ids, prices = [], []
+
+        def rows():
+            for index in range(count):
+                listing_id = self._uuid()
+                price = Decimal(rng.randint(15, 900)) + Decimal(rng.choice((0, 50, 99))) / 100
+                city = rng.choice(CITIES)
+                features = rng.sample(FEATURES, 3)
+                ids.append(listing_id)
+                prices.append(price)
+                histogram = ratings[index]
+                rating_count = sum(histogram)
+                rating_sum = sum(value * n for value, n in enumerate(histogram, 1))
+                yield Listing(
+                    listing_id=listing_id,
+                    title=f"{rng.choice(ADJECTIVES)} {rng.choice(KINDS)} in {city}",
+                    description=f"Sleeps {rng.randint(1, 10)}, with {features[0]}, {features[1]} and {features[2]}.",
+                    price=price,
+                    location=city,
+                    rating_count=rating_count,
+                    rating_sum=rating_sum,
+                    rating_avg=(Decimal(rating_sum) / rating_count).quantize(Decimal("0.01"), ROUND_HALF_UP)
+                    if rating_count else Decimal(0),
+                    **{f"rating_{value}_count": n for value, n in enumerate(histogram, 1)},
+                )
+
+        self._insert(Listing, rows())
+        return ids, prices
+
+    def _seed_bookings(self, count, listing_ids, prices, user_ids):
+        """Bookings never overlap on a listing: each listing's stays follow one another from today on."""
+        rng = self.rng
+        today = timezone.localdate()
+        next_free = [0] * len(listing_ids)  # days from today when each listing is next free
+        emails = {pk: f"seed-user-{i}@example.com" for i, pk in enumerate(user_ids)}
+        seeded = []  # (booking_id, amount, status) for payments
+
+        def rows():
+            for _ in range(count):
+                index = rng.randrange(len(listing_ids))
+                nights = rng.randint(1, 7)
+                start = next_free[index] + rng.randint(0, 5)
+                next_free[index] = start + nights
+                user_id = rng.choice(user_ids) if user_ids and rng.random() < 0.8 else None
+                booking_id = self._uuid()
+                status = rng.choice(BOOKING_STATUSES)
+                seeded.append((booking_id, prices[index] * nights, status))
+                yield Booking(
+                    booking_id=booking_id,
+                    listing_id=listing_ids[index],
+                    user_id=user_id,
+                    email=emails[user_id] if user_id else f"guest{rng.randrange(10 ** 6)}@example.com",
+                    status=status,
+                    check_in=today + timedelta(days=start),
+                    check_out=today + timedelta(days=start + nights),
+                )
+
+        self._insert(Booking, rows())
+        return seeded
+
+    def _seed_payments(self, count, booking_rows):
+        rng = self.rng
+        payment_status = {"confirmed": "completed", "pending": "pending", "canceled": "failed"}
+
+        def rows():
+            for booking_id, amount, booking_status in rng.sample(booking_rows, count):
+                status = payment_status[booking_status]
+                token = self._uuid().hex.upper()
+                yield Payments(
+                    payment_id=self._uuid(),
+                    booking_id=booking_id,
+                    amount=amount,
+                    status=status,
+                    trxn_reference=f"CHAP-{token[:16]}",
+                    chapa_reference=f"AP{token[16:]}" if status != "pending" else None,
+                )
+
+        self._insert(Payments, rows())
+
+    def _seed_reviews(self, count, listing_ids, user_ids):
+        rng = self.rng
+
+        def rows():
+            for index, rating in self._review_draws(count, len(listing_ids)):
+                yield Review(
+                    review_id=self._uuid(),
+                    listing_id=listing_ids[index],
+                    user_id=rng.choice(user_ids) if user_ids else None,
+                    rating=rating,
+                    comment=rng.choice(COMMENTS[rating]),
+                )
+
+        self._insert(Review, rows())
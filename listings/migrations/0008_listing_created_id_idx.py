@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0007_alter_payments_booking_alter_review_listing"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["created_at", "listing_id"], name="listing_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0008_listing_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["location", "price"],
+                name="listing_location_price_idx",
+                opclasses=["varchar_pattern_ops", "numeric_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["location", "created_at", "listing_id"],
+                name="listing_loc_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["price", "listing_id"], name="listing_price_id_idx"
+            ),
+        ),
+    ]
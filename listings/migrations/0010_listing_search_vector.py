@@ -0,0 +1,58 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:23
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION listings_listing_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER listings_listing_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON listings_listing
+    FOR EACH ROW EXECUTE FUNCTION listings_listing_search_vector_update();
+
+UPDATE listings_listing SET title = title;
+
+CREATE INDEX listing_search_vector_gin ON listings_listing USING GIN (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS listing_search_vector_gin;
+DROP TRIGGER IF EXISTS listings_listing_search_vector_trigger ON listings_listing;
+DROP FUNCTION IF EXISTS listings_listing_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    """The tsvector trigger and GIN index only exist on PostgreSQL; other backends use the in-process index."""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0009_listing_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
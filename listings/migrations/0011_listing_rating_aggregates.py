@@ -0,0 +1,96 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:26
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Listing = apps.get_model("listings", "Listing")
+    Review = apps.get_model("listings", "Review")
+
+    totals = (
+        Review.objects.order_by()
+        .values("listing_id")
+        .annotate(
+            count=Count("pk"),
+            total=Sum("rating"),
+            **{
+                f"rating_{value}_count": Count("pk", filter=Q(rating=value))
+                for value in range(1, 6)
+            },
+        )
+    )
+    for row in totals.iterator():
+        Listing.objects.filter(pk=row["listing_id"]).update(
+            rating_avg=(Decimal(row["total"]) / row["count"]).quantize(
+                Decimal("0.01"), ROUND_HALF_UP
+            ),
+            rating_count=row["count"],
+            rating_sum=row["total"],
+            **{
+                f"rating_{value}_count": row[f"rating_{value}_count"]
+                for value in range(1, 6)
+            },
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0010_listing_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rating_avg",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["rating_avg", "rating_count", "listing_id"],
+                name="listing_rating_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
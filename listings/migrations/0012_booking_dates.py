@@ -0,0 +1,66 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:27
+
+from django.db import migrations, models
+
+# On PostgreSQL the database itself rejects overlapping stays for a listing, even if two
+# workers race past the application-level check. Other backends rely on that check alone.
+NO_OVERLAP_SQL = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE listings_booking ADD CONSTRAINT booking_no_overlap EXCLUDE USING gist (
+    listing_id WITH =,
+    daterange(check_in, check_out, '[)') WITH &&
+) WHERE (status <> 'canceled' AND check_in IS NOT NULL AND check_out IS NOT NULL);
+"""
+
+DROP_NO_OVERLAP_SQL = """
+ALTER TABLE listings_booking DROP CONSTRAINT IF EXISTS booking_no_overlap;
+"""
+
+
+def add_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(NO_OVERLAP_SQL)
+
+
+def drop_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_NO_OVERLAP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0011_listing_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="check_in",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="check_out",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["listing", "check_in", "check_out"],
+                name="booking_listing_dates_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("check_out__gt", models.F("check_in")),
+                    ("check_in__isnull", True),
+                    _connector="OR",
+                ),
+                name="booking_check_out_after_check_in",
+            ),
+        ),
+        migrations.RunPython(add_overlap_constraint, drop_overlap_constraint),
+    ]
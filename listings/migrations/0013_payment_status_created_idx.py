@@ -0,0 +1,20 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0012_booking_dates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payments",
+            index=models.Index(
+                fields=["status", "created_at", "payment_id"],
+                name="payment_status_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.23 on 2026-10-17 04:31
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def clear_blank_and_duplicate_references(apps, schema_editor):
+    """
+    Make existing chapa_reference values fit the new unique constraint.
+
+    Blank references become NULL (NULLs don't collide). Of payments sharing a
+    reference, the most recent keeps it and the older ones are set to NULL.
+    """
+    Payments = apps.get_model("listings", "Payments")
+    Payments.objects.filter(chapa_reference="").update(chapa_reference=None)
+    duplicated = (
+        Payments.objects.exclude(chapa_reference=None)
+        .values("chapa_reference")
+        .annotate(rows=Count("pk"))
+        .filter(rows__gt=1)
+        .values_list("chapa_reference", flat=True)
+    )
+    for reference in list(duplicated):
+        keep = Payments.objects.filter(chapa_reference=reference).order_by("-created_at", "-pk").values("pk")[:1]
+        Payments.objects.filter(chapa_reference=reference).exclude(pk__in=keep).update(chapa_reference=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0013_payment_status_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChapaWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event_id", models.CharField(max_length=128, unique=True)),
+                ("event_type", models.CharField(blank=True, max_length=50)),
+                (
+                    "reference",
+                    models.CharField(blank=True, db_index=True, max_length=100),
+                ),
+                ("tx_ref", models.CharField(blank=True, max_length=100)),
+                ("status", models.CharField(blank=True, max_length=20)),
+                ("payload", models.JSONField()),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(clear_blank_and_duplicate_references, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="payments",
+            name="chapa_reference",
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 
 """Models for Listings, Bookings, and Reviews in the travel app."""
 class Listing(models.Model):
@@ -10,6 +12,44 @@ class Listing(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     location = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by a database trigger on PostgreSQL (see migration 0010) and unused elsewhere.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Denormalized review aggregates, updated with each new review (see Utils/ratings.py).
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination order used by ListingListCreateView.
+            models.Index(fields=["created_at", "listing_id"], name="listing_created_id_idx"),
+            # Search filters: location equality/prefix with a price range, location with
+            # the default newest-first order, and the price sort orders.
+            models.Index(
+                fields=["location", "price"],
+                name="listing_location_price_idx",
+                opclasses=["varchar_pattern_ops", "numeric_ops"],
+            ),
+            models.Index(fields=["location", "created_at", "listing_id"], name="listing_loc_created_idx"),
+            models.Index(fields=["price", "listing_id"], name="listing_price_id_idx"),
+            models.Index(fields=["rating_avg", "rating_count", "listing_id"], name="listing_rating_idx"),
+        ]
+
+
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        """Bookings that still hold their dates."""
+        return self.exclude(status='canceled')
+
+    def overlapping(self, check_in, check_out):
+        """Active bookings whose half-open [check_in, check_out) range overlaps the given one."""
+        return self.active().filter(check_in__lt=check_out, check_out__gt=check_in)
 
 
 class Booking(models.Model):
@@ -18,8 +58,24 @@ class Booking(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     email = models.EmailField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=[('pending','Pending'),('confirmed','Confirmed'),('canceled','Canceled')], default='pending')
+    # Nullable only for bookings made before stays had dates; new bookings always set both.
+    check_in = models.DateField(null=True, blank=True)
+    check_out = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["listing", "check_in", "check_out"], name="booking_listing_dates_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(check_out__gt=models.F("check_in")) | models.Q(check_in__isnull=True),
+                name="booking_check_out_after_check_in",
+            ),
+        ]
+
 class Review(models.Model):
     review_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     listing = models.ForeignKey(Listing, related_name="reviews", on_delete=models.CASCADE)
@@ -43,9 +99,73 @@ class Payments(models.Model):
         default='pending'
     )
     trxn_reference = models.CharField(max_length=100, unique=True)  # your generated ref (CHAP-xxxx)
-    chapa_reference = models.CharField(max_length=100, blank=True, null=True)  # the APxxxx from Chapa
+    chapa_reference = models.CharField(max_length=100, blank=True, null=True, unique=True)  # the APxxxx from Chapa
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Backs the pending payment reconciliation sweep.
+            models.Index(fields=["status", "created_at", "payment_id"], name="payment_status_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Payment {self.trxn_reference} - {self.status}"
+
+
+class ChapaWebhookEvent(models.Model):
+    """Append-only log of webhook deliveries from Chapa, deduplicated on ``event_id``."""
+    event_id = models.CharField(max_length=128, unique=True)
+    event_type = models.CharField(max_length=50, blank=True)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)  # Chapa's APxxxx reference
+    tx_ref = models.CharField(max_length=100, blank=True)  # our CHAP-xxxx reference
+    status = models.CharField(max_length=20, blank=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Chapa webhook {self.event_type or 'event'} {self.reference} ({self.status})"
+
+
+
+class IdempotencyRecord(models.Model):
+    """Stored outcome of a request made with an ``Idempotency-Key`` (database fallback store)."""
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    state = models.CharField(max_length=20, choices=[('in_progress', 'In progress'), ('completed', 'Completed')])
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key} ({self.state})"
+
+
+
+class OutboxMessage(models.Model):
+    """
+    Celery task call recorded in the same transaction as the change that caused it.
+
+    The outbox relay (``manage.py relay_outbox``) publishes undispatched rows to the
+    broker after commit, so views never wait on the broker and rolled-back changes
+    never trigger a task.
+    """
+    task_name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)  # leased by a relay that is publishing it
+    attempts = models.PositiveIntegerField(default=0)  # failed relays; dead-lettered at OUTBOX_MAX_ATTEMPTS
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=models.Q(dispatched_at__isnull=True), name="outbox_pending_idx"),
+            models.Index(fields=["dispatched_at"], name="outbox_dispatched_idx"),
+        ]
+
     def __str__(self):
-        return f"Payment {self.trxn_reference} - {self.status}"
\ No newline at end of file
+        return f"Outbox {self.task_name} #{self.pk} ({'dispatched' if self.dispatched_at else 'pending'})"
@@ -1,13 +1,75 @@
 import re
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Listing, Booking, Review, Payments
+from .Utils.availability import create_booking
+from .Utils.fast_serializers import FastSerializer
+from .Utils.metrics import serializer_timer
 import uuid
 
-class ListingSerializer(serializers.ModelSerializer):
+
+RATING_COUNT_FIELDS = ['rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count']
+
+
+def rating_histogram(counts):
+    """Render the five per-star review counts as ``{"1": n1, ..., "5": n5}``."""
+    return dict(zip(("1", "2", "3", "4", "5"), counts))
+
+
+def validate_stay_dates(check_in, check_out):
+    """Shared check-in/check-out rules for bookings and availability queries."""
+    if check_out <= check_in:
+        raise serializers.ValidationError({"check_out": "check_out must be after check_in."})
+    if check_in < timezone.localdate():
+        raise serializers.ValidationError({"check_in": "check_in cannot be in the past."})
+
+
+class TimedSerializerMixin:
+    """Count validation and rendering time towards the request's serializer metric."""
+
+    def run_validation(self, *args, **kwargs):
+        with serializer_timer():
+            return super().run_validation(*args, **kwargs)
+
+    def to_representation(self, *args, **kwargs):
+        with serializer_timer():
+            return super().to_representation(*args, **kwargs)
+
+
+class DynamicFieldsModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """ModelSerializer that accepts a ``fields`` kwarg to trim its output to a subset of fields."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class ListingSerializer(DynamicFieldsModelSerializer):
+    rating_histogram = serializers.SerializerMethodField()
+
     class Meta:
         model = Listing
-        fields = '__all__'
-        
+        fields = ['listing_id', 'title', 'description', 'price', 'location', 'created_at',
+                  'rating_avg', 'rating_count', 'rating_histogram']
+        # Model columns each non-model field reads from, so callers can defer everything else.
+        source_fields = {'rating_histogram': RATING_COUNT_FIELDS}
+
+    @classmethod
+    def model_fields_for(cls, fields):
+        """Return the Listing columns needed to render ``fields``."""
+        columns = set()
+        for name in fields:
+            columns.update(cls.Meta.source_fields.get(name, [name]))
+        return columns
+
+    def get_rating_histogram(self, obj):
+        return rating_histogram(getattr(obj, name) for name in RATING_COUNT_FIELDS)
+
     def validate_title(self, value):
         if len(value) < 5:
             raise serializers.ValidationError("Title must be at least 5 characters long.")
@@ -18,17 +80,109 @@ class ListingSerializer(serializers.ModelSerializer):
         return value
     
 
-class BookingSerializer(serializers.ModelSerializer):
+class ListingFilterSerializer(serializers.Serializer):
+    """Validates the query parameters accepted by the listing search endpoint."""
+
+    location = serializers.CharField(required=False, max_length=255)
+    location_prefix = serializers.CharField(required=False, max_length=255)
+    min_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    max_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    sort = serializers.ChoiceField(required=False, choices=['newest', 'price_asc', 'price_desc', 'rating'],
+                                   default='newest')
+
+    def validate(self, attrs):
+        min_price, max_price = attrs.get('min_price'), attrs.get('max_price')
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError({"max_price": "max_price must be greater than or equal to min_price."})
+
+        created_after, created_before = attrs.get('created_after'), attrs.get('created_before')
+        if created_after and created_before and created_after > created_before:
+            raise serializers.ValidationError({"created_before": "created_before must be later than created_after."})
+        return attrs
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Validates the query parameters accepted by the data export endpoint."""
+
+    # Not ``format``: DRF reserves that parameter for choosing a renderer.
+    output = serializers.ChoiceField(required=False, choices=['ndjson', 'csv'], default='ndjson')
+    gzip = serializers.BooleanField(required=False, default=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+
+class ListingAvailabilitySerializer(ListingFilterSerializer):
+    """Validates availability queries: the listing filters plus a stay and an optional listing ID list."""
+
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    listing_ids = serializers.CharField(required=False)
+
+    def validate_listing_ids(self, value):
+        ids = [item.strip() for item in value.split(',') if item.strip()]
+        if len(ids) > 1000:
+            raise serializers.ValidationError("At most 1000 listing IDs can be checked at once.")
+        field = serializers.UUIDField()
+        return [field.to_internal_value(item) for item in ids]
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        validate_stay_dates(attrs['check_in'], attrs['check_out'])
+        return attrs
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that resolves against a ``{pk: instance}`` map in the
+    serializer context (under ``context_key``) when one is provided, so validating
+    many items costs one ``IN`` query instead of one lookup per item.
+    """
+
+    def __init__(self, context_key, **kwargs):
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        instances = self.context.get(self.context_key)
+        if instances is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in instances:
+            self.fail('does_not_exist', pk_value=data)
+        return instances[pk]
+
+
+class BookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     
-    listing = serializers.PrimaryKeyRelatedField(queryset=Listing.objects.all())
+    listing = PrefetchedPrimaryKeyRelatedField('listings', queryset=Listing.objects.all())
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     email = serializers.EmailField(required=False, allow_null=True)
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
     
     class Meta:
         model = Booking
-        fields = ['booking_id', 'listing', 'user', 'email', 'status', 'created_at']
+        fields = ['booking_id', 'listing', 'user', 'email', 'status', 'check_in', 'check_out', 'created_at']
         read_only_fields = ['booking_id', 'status', 'created_at']
 
+    def validate(self, attrs):
+        validate_stay_dates(attrs['check_in'], attrs['check_out'])
+        return attrs
+
+    def create(self, validated_data):
+        """Insert the booking only if its dates are still free; raises BookingConflict otherwise."""
+        return create_booking(
+            lambda: super(BookingSerializer, self).create(validated_data),
+            validated_data['listing'].pk,
+            validated_data['check_in'],
+            validated_data['check_out'],
+        )
+
     def validate_user(self, value):
         """Allow user to be None if unauthenticated."""
         request = self.context.get('request')
@@ -42,7 +196,7 @@ class BookingSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Status must be one of: pending, confirmed, canceled.")
         return value
     
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     
     listing = serializers.PrimaryKeyRelatedField(queryset=Listing.objects.all())
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
@@ -63,7 +217,15 @@ class ReviewSerializer(serializers.ModelSerializer):
         return value
 
 
-class PaymentCreateSerializer(serializers.Serializer):
+# Read-only ``.values()`` fast paths, rendering the same JSON as the serializers above (see FastSerializer).
+fast_listing_serializer = FastSerializer(
+    ListingSerializer, computed={'rating_histogram': (RATING_COUNT_FIELDS, rating_histogram)}
+)
+fast_booking_serializer = FastSerializer(BookingSerializer)
+fast_review_serializer = FastSerializer(ReviewSerializer)
+
+
+class PaymentCreateSerializer(TimedSerializerMixin, serializers.Serializer):
     
     class Meta:
         model = Payments
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Listing, Review
+from .Utils import search
+from .Utils.cache import bump_table_version
+
+
+@receiver([post_save, post_delete], sender=Listing)
+@receiver([post_save, post_delete], sender=Review)
+def bump_cache_version(sender, **kwargs):
+    """Invalidate cached responses built from this table once the write is committed."""
+    table = sender._meta.db_table
+    transaction.on_commit(lambda: bump_table_version(table))
+
+
+@receiver(post_save, sender=Listing)
+def update_search_index(sender, instance, **kwargs):
+    """Keep the in-process search index (non-PostgreSQL backends) in sync with saved listings."""
+    if search.index_is_loaded():
+        search.get_index().add(instance.listing_id, instance.title, instance.description)
+
+
+@receiver(post_delete, sender=Listing)
+def remove_from_search_index(sender, instance, **kwargs):
+    if search.index_is_loaded():
+        search.get_index().remove(instance.listing_id)
@@ -1,17 +1,201 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from celery import shared_task
-from django.core.mail import send_mail
+from celery.signals import worker_process_init
 from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from .models import ChapaWebhookEvent, Payments
+from .Utils.chapa_client import ChapaUnavailable
+from .Utils.payments import apply_payment_status, verify_with_chapa
+from .Utils.idempotency import purge_expired_records
+from .Utils import notifications, outbox
 import logging
 
 logger = logging.getLogger(__name__)
 
-@shared_task
+@worker_process_init.connect
+def _precompile_notification_templates(**kwargs):
+    notifications.precompile_templates()
+
+
+# Email tasks are acked on receipt: a worker crash may drop a batch, and a retry only
+# resends the messages that had not gone out, so no email is sent twice.
+@shared_task(bind=True, max_retries=5, acks_late=False, rate_limit=settings.NOTIFICATION_TASK_RATE_LIMIT)
+def send_notification_batch(self, messages, rate_limited=False):
+    """
+    Send a batch of notification emails over one mail connection.
+
+    The outbox relay folds queued single-email jobs into this task. Messages held
+    back by the per-recipient rate limit are rescheduled for the next window. If
+    sending fails part way, only the unsent messages are retried, with
+    ``rate_limited`` set because they already counted against the limit.
+    """
+    try:
+        sent, deferred = notifications.deliver(messages, rate_limit=not rate_limited)
+    except notifications.NotificationDeliveryError as exc:
+        logger.exception(f"Notification batch of {len(messages)} failed after {exc.sent} sent")
+        _defer_notifications(exc.deferred)
+        raise self.retry(args=[exc.unsent], kwargs={"rate_limited": True}, exc=exc,
+                         countdown=min(300, 10 * 2 ** self.request.retries))
+
+    _defer_notifications(deferred)
+    logger.info(f"Sent {sent} notification email(s), deferred {len(deferred)}")
+    return {"sent": sent, "deferred": len(deferred)}
+
+
+def _defer_notifications(messages):
+    if messages:
+        send_notification_batch.apply_async(args=[messages], countdown=settings.NOTIFICATION_RATE_WINDOW)
+
+
+@shared_task(acks_late=False)
 def send_booking_confirmation_email(user_email, booking_id):
-    subject = "Booking Confirmation"
-    message = f"Your booking (ID: {booking_id}) has been confirmed. Thank you for choosing us!"
-    email_from = settings.EMAIL_HOST_USER
-    
-    
-    send_mail(subject, message, email_from, [user_email])
-    logger.info(f"Booking confirmation email sent to {user_email}")
-    return f"Booking confirmation email sent to {user_email}"
\ No newline at end of file
+    # Queued, not called: a direct call can't retry, so a failed send would be lost.
+    send_notification_batch.delay([notifications.booking_confirmation(user_email, booking_id)])
+    logger.info(f"Booking confirmation email queued for {user_email}")
+    return f"Booking confirmation email queued for {user_email}"
+
+
+@shared_task(acks_late=False)
+def send_bulk_booking_confirmation_emails(recipients):
+    """
+    Confirm a group booking with one email per recipient, listing all of their bookings.
+
+    One email per booking would spread a large group's confirmations over hours
+    under the per-recipient rate limit. ``recipients`` is a list of [email, booking_id].
+    """
+    bookings_by_email = {}
+    for email, booking_id in recipients:
+        bookings_by_email.setdefault(email, []).append(booking_id)
+    send_notification_batch.delay([notifications.group_booking_confirmation(email, booking_ids)
+                                   for email, booking_ids in bookings_by_email.items()])
+    logger.info(f"Queued {len(bookings_by_email)} confirmation email(s) for {len(recipients)} bulk booking(s)")
+    return f"Queued {len(bookings_by_email)} bulk booking confirmation email(s)"
+
+
+@shared_task(acks_late=False)
+def send_payment_status_email(user_email, status, amount, reference):
+    send_notification_batch.delay([notifications.payment_status(user_email, status, amount, reference)])
+    logger.info(f"Payment {status} email queued for {user_email} for {reference}")
+    return f"Payment status email queued for {user_email}"
+
+
+@shared_task(bind=True, autoretry_for=(ChapaUnavailable,), retry_backoff=True, retry_jitter=True, max_retries=5,
+             rate_limit=settings.CHAPA_VERIFY_RATE_LIMIT)
+def verify_payment(self, payment_id):
+    """Verify one payment with Chapa off the request thread. Retried with backoff while Chapa is unreachable."""
+    payment = Payments.objects.select_related("booking__user").filter(pk=payment_id).first()
+    if payment is None:
+        logger.warning(f"verify_payment: payment {payment_id} no longer exists")
+        return None
+    if payment.status != "pending":
+        return payment.status
+    return verify_with_chapa(payment)
+
+
+def _verify_in_thread(payment):
+    """Run verify_with_chapa from a pool thread, closing that thread's DB connection afterwards."""
+    try:
+        return verify_with_chapa(payment)
+    finally:
+        connection.close()
+
+
+@shared_task
+def reconcile_pending_payments():
+    """
+    Sweep payments still pending and settle them with Chapa.
+
+    Walks pending payments oldest first in keyset batches of PAYMENT_RECONCILE_BATCH_SIZE,
+    verifying at most CHAPA_RECONCILE_CONCURRENCY at a time. The sweep stops early
+    if Chapa becomes unreachable; the next run picks up where it left off.
+    """
+    now = timezone.now()
+    pending = Payments.objects.select_related("booking__user").filter(
+        status="pending",
+        created_at__lte=now - timedelta(seconds=settings.PAYMENT_RECONCILE_MIN_AGE),
+        created_at__gte=now - timedelta(seconds=settings.PAYMENT_RECONCILE_MAX_AGE),
+    ).order_by("created_at", "payment_id")
+
+    checked = settled = 0
+    last = None
+    with ThreadPoolExecutor(max_workers=settings.CHAPA_RECONCILE_CONCURRENCY) as pool:
+        while True:
+            batch_qs = pending
+            if last is not None:
+                batch_qs = batch_qs.filter(
+                    Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, payment_id__gt=last.payment_id)
+                )
+            batch = list(batch_qs[:settings.PAYMENT_RECONCILE_BATCH_SIZE])
+            if not batch:
+                break
+
+            try:
+                statuses = list(pool.map(_verify_in_thread, batch))
+            except ChapaUnavailable as exc:
+                logger.warning(f"Payment reconciliation stopped early, Chapa unavailable: {exc}")
+                break
+
+            checked += len(batch)
+            settled += sum(1 for payment_status in statuses if payment_status != "pending")
+            last = batch[-1]
+
+    logger.info(f"Payment reconciliation checked {checked} pending payment(s), settled {settled}")
+    return {"checked": checked, "settled": settled}
+
+
+
+@shared_task
+def process_chapa_webhook_event(event_id):
+    """Apply a logged Chapa webhook delivery to its payment. Safe to run more than once."""
+    event = ChapaWebhookEvent.objects.filter(pk=event_id, processed_at__isnull=True).first()
+    if event is None:
+        return None
+
+    lookup = Q(chapa_reference=event.reference) if event.reference else Q()
+    if event.tx_ref:
+        lookup |= Q(trxn_reference=event.tx_ref)
+    payment = Payments.objects.select_related("booking__user").filter(lookup).first() if lookup else None
+
+    if payment is None:
+        logger.error(f"No payment found for Chapa webhook {event.event_id} (reference={event.reference})")
+    else:
+        if event.reference and not payment.chapa_reference:
+            Payments.objects.filter(pk=payment.pk, chapa_reference__isnull=True).update(chapa_reference=event.reference)
+        apply_payment_status(payment, event.status, source="webhook")
+
+    ChapaWebhookEvent.objects.filter(pk=event.pk).update(processed_at=timezone.now())
+    return payment.status if payment else None
+
+
+
+@shared_task
+def purge_idempotency_records():
+    """Remove expired Idempotency-Key records from the database store."""
+    deleted = purge_expired_records()
+    logger.info(f"Purged {deleted} expired idempotency record(s)")
+    return deleted
+
+
+
+@shared_task
+def relay_outbox():
+    """Safety net for the relay process: publish any outbox messages it has not picked up, then prune old ones."""
+    sent = outbox.relay_pending()
+    purged = outbox.purge_dispatched()
+    if sent or purged:
+        logger.info(f"Outbox relay task dispatched {sent} message(s), purged {purged}")
+    return {"dispatched": sent, "purged": purged}
+
+
+
+@shared_task
+def queue_latency_probe(sent_at, work_ms=0):
+    """Load-test probe: report how long this task waited in its queue, then simulate ``work_ms`` of work."""
+    waited = time.time() - sent_at
+    if work_ms:
+        time.sleep(work_ms / 1000)
+    return waited
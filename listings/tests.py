@@ -1,3 +1,1053 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import math
+from datetime import timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, OperationalError, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from kombu.exceptions import OperationalError as BrokerUnavailable
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .async_views import AsyncChapaPaymentInitView, AsyncChapaPaymentVerifyView, AsyncChapaPaymentWebhookView
+from .models import Booking, ChapaWebhookEvent, Listing, OutboxMessage, Payments, Review
+from .serializers import (BookingSerializer, ListingSerializer, ReviewSerializer, fast_booking_serializer,
+                          fast_listing_serializer, fast_review_serializer)
+from .Utils import notifications, outbox, search
+from .Utils.availability import BookingConflict, create_booking
+from .Utils.chapa_client import AsyncChapaClient, ChapaClient, ChapaUnavailable, CircuitBreaker
+from .Utils.cache import bump_table_version
+from .Utils.db_router import health as replica_health
+from .Utils.idempotency import DatabaseIdempotencyStore
+from .Utils.query_budget import QueryBudgetExceeded, QueryBudgetMixin, count_queries, query_budget
+from .Utils import throttling
+from .Utils.throttling import MemoryGCRALimiter, RedisGCRALimiter, reset_limiter
+from .tasks import (send_booking_confirmation_email, send_bulk_booking_confirmation_emails, send_notification_batch,
+                    send_payment_status_email)
+from .views import (LISTING_CACHE_TABLES, BookingBulkCreateView, BookingCreateView, ChapaPaymentInitView,
+                    ChapaPaymentVerifyView, ChapaPaymentWebhookView, DataExportView, ListingAvailabilityView,
+                    ListingListCreateView, ListingSearchView, MetricsView, PaymentStatusView, ReviewCreateView,
+                    ServiceHealthCheck)
+
+try:
+    import fakeredis
+except ImportError:  # optional: only the Redis limiter tests need it
+    fakeredis = None
+
+# Every view is exercised after seeding each of these many extra rows; budgets must hold for all of them.
+SIZES = (1, 10, 50)
+WEBHOOK_SECRET = "test-webhook-secret"
+
+
+class QueryBudgetUtilityTests(TestCase):
+    def test_reports_n_plus_one_with_stack(self):
+        user = get_user_model().objects.create_user("guest", "guest@example.com", "pw")
+        listing = Listing.objects.create(title="Lake house", description="Quiet", price=80, location="Bahir Dar")
+        for _ in range(3):
+            Booking.objects.create(listing=listing, user=user)
+
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with query_budget(1, label="per-row user lookups"):
+                [booking.user.email for booking in Booking.objects.all()]
+        report = str(raised.exception)
+        self.assertIn("ran 4 queries, budget is 1", report)
+        self.assertIn("3x SELECT", report)
+        self.assertIn("tests.py", report)
+
+        with query_budget(1):
+            [booking.user.email for booking in Booking.objects.select_related("user")]
+
+
+class FastSerializerTests(TestCase):
+    """The ``.values()`` fast paths render byte-for-byte what the DRF serializers render."""
+
+    def setUp(self):
+        search.reset_index()
+        user = get_user_model().objects.create_user("guest", "guest@example.com", "pw")
+        stay = timezone.localdate() + timedelta(days=30)
+        for n, price in enumerate(["80", "99.5", "1234567.89"]):
+            listing = Listing.objects.create(title=f"Lake house {n}", description="Quiet", price=price,
+                                             location="Bahir Dar", rating_avg="4.5", rating_count=2,
+                                             rating_4_count=1, rating_5_count=1)
+            Review.objects.create(listing=listing, user=user, rating=5, comment="Lovely stay overall")
+            Booking.objects.create(listing=listing, user=user, check_in=stay, check_out=stay + timedelta(days=2))
+            Booking.objects.create(listing=listing, email="walk-in@example.com")  # null user and dates
+
+    def assertSameJSON(self, serializer_class, fast, fields=None):
+        objects = serializer_class.Meta.model.objects.order_by("pk")
+        kwargs = {"fields": fields} if fields is not None else {}
+        expected = JSONRenderer().render(serializer_class(objects, many=True, **kwargs).data)
+        rows = objects.values(*fast.columns(fields))
+        self.assertEqual(JSONRenderer().render(fast.serialize_rows(rows, fields)), expected)
+        self.assertEqual(JSONRenderer().render(fast.serialize_objects(objects, fields)), expected)
+
+    def test_matches_drf_output(self):
+        self.assertSameJSON(ListingSerializer, fast_listing_serializer)
+        self.assertSameJSON(ListingSerializer, fast_listing_serializer, fields=["rating_histogram", "price", "title"])
+        self.assertSameJSON(BookingSerializer, fast_booking_serializer)
+        self.assertSameJSON(ReviewSerializer, fast_review_serializer)
+        with timezone.override("Africa/Addis_Ababa"):
+            self.assertSameJSON(ListingSerializer, fast_listing_serializer, fields=["listing_id", "created_at"])
+
+    def test_listing_views_unchanged(self):
+        for url in ["/api/listings/?page_size=2", "/api/listings/?sort=price_desc&fields=price,rating_histogram",
+                    "/api/listings/search/?q=lake&fields=title,price"]:
+            responses = []
+            for fast in (True, False):
+                cache.clear()
+                reset_limiter()
+                with override_settings(FAST_SERIALIZERS=fast):
+                    responses.append(APIClient().get(url).content)
+            self.assertEqual(responses[0], responses[1], url)
+            self.assertTrue(json.loads(responses[0])["data"], url)
+
+
+@override_settings(CHAPA_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Each view stays within its declared ``query_budgets`` however much data there is."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.seeded = 0
+        self.stay = timezone.localdate() + timedelta(days=30)
+        search.reset_index()
+
+    def seed(self, count):
+        """Add ``count`` users, each with a listing, a review, a booking and a pending payment."""
+        User = get_user_model()
+        for _ in range(count):
+            n = self.seeded = self.seeded + 1
+            user = User.objects.create_user(f"guest{n}", f"guest{n}@example.com", "pw")
+            listing = Listing.objects.create(title=f"Beach villa {n}", description="Sea view villa",
+                                             price=100 + n, location="Addis Ababa")
+            Review.objects.create(listing=listing, user=user, rating=4, comment="Lovely stay overall")
+            booking = Booking.objects.create(listing=listing, user=user, check_in=self.stay,
+                                             check_out=self.stay + timedelta(days=2))
+            Payments.objects.create(booking=booking, amount=100, trxn_reference=f"CHAP-SEED{n}")
+        self.user = User.objects.get(username=f"guest{self.seeded}")
+        self.listing = Listing.objects.get(title=f"Beach villa {self.seeded}")
+        self.booking = Booking.objects.get(listing=self.listing)
+
+    def call(self, view_class, method, send):
+        # Start every request cold: no cached pages, no rate-limit history.
+        cache.clear()
+        reset_limiter()
+        label = f"{view_class.__name__}.{method} with {self.seeded} seeded rows"
+        return self.assertWithinBudget(view_class, method, send, label=label)
+
+    def each_size(self):
+        for size in SIZES:
+            self.seed(size)
+            yield self.seeded
+
+    def test_listing_list(self):
+        for _ in self.each_size():
+            response = self.call(ListingListCreateView, "get", lambda: self.client.get("/api/listings/"))
+            self.assertEqual(response.status_code, 200)
+            response = self.call(ListingListCreateView, "get",
+                                 lambda: self.client.get("/api/listings/?sort=rating&fields=title,rating_histogram"))
+            self.assertEqual(response.status_code, 200)
+
+    def test_listing_create(self):
+        for rows in self.each_size():
+            body = {"title": f"New flat {rows}", "description": "Central", "price": "50.00", "location": "Lagos"}
+            response = self.call(ListingListCreateView, "post",
+                                 lambda: self.client.post("/api/listings/", body, format="json"))
+            self.assertEqual(response.status_code, 201)
+
+    def test_listing_search(self):
+        for _ in self.each_size():
+            response = self.call(ListingSearchView, "get", lambda: self.client.get("/api/listings/search/?q=villa"))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()["data"])
+
+    def test_listing_availability(self):
+        for _ in self.each_size():
+            url = f"/api/listings/availability/?check_in={self.stay}&check_out={self.stay + timedelta(days=1)}"
+            response = self.call(ListingAvailabilityView, "get", lambda: self.client.get(url))
+            self.assertEqual(response.status_code, 200)
+
+    @override_settings(IMPORT_BATCH_SIZE=20)
+    def test_listing_import(self):
+        admin = get_user_model().objects.create_user("admin", "admin@example.com", "pw", is_staff=True)
+        for rows in self.each_size():
+            self.client.force_authenticate(admin)
+            lines = ["title,description,price,location"]
+            lines += [f"Imported flat {rows}-{n},Near the park,{50 + n}.5,Kigali" for n in range(rows)]
+            lines += ["Flat,Too short a title,60,Kigali", f"Imported flat {rows}-x,Free,-1,Kigali",
+                      f"Imported flat {rows}-y,No location,70"]
+            upload = SimpleUploadedFile(f"partner-{rows}.csv", "\n".join(lines).encode())
+            before = Listing.objects.count()
+            # No fixed budget: the queries are one bulk_create per batch (these batches fit one INSERT).
+            with count_queries() as log:
+                response = self.client.post("/api/listings/import/", {"file": upload})
+            self.assertEqual(response.status_code, 207)
+            self.assertEqual(len(log), math.ceil((rows + 3) / 20))
+            self.assertTrue(all(sql.startswith('INSERT INTO "listings_listing"') for sql, _ in log.queries))
+            report = response.json()["data"]
+            self.assertEqual((report["created"], report["rejected"]), (rows, 3))
+            self.assertEqual(Listing.objects.count(), before + rows)
+            self.assertEqual([error["line"] for error in report["errors"]], [rows + 2, rows + 3, rows + 4])
+            self.assertIn("title", report["errors"][0]["errors"])
+            self.assertIn("price", report["errors"][1]["errors"])
+            self.assertEqual(report["errors"][2]["errors"], {"location": ["This field is required."]})
+
+        body = gzip.compress(b'{"title": "Garden cottage", "description": "Quiet", "price": 80, "location": "Accra"}'
+                             b'\n{not json\n')
+        upload = SimpleUploadedFile("partner.ndjson.gz", body)
+        response = self.client.post("/api/listings/import/", {"file": upload, "dry_run": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["data"]["created"], response.json()["data"]["rejected"]), (1, 1))
+        self.assertFalse(Listing.objects.filter(title="Garden cottage").exists())
+
+        self.client.force_authenticate(self.user)
+        upload = SimpleUploadedFile("partner.csv", b"title,description,price,location\n")
+        self.assertEqual(self.client.post("/api/listings/import/", {"file": upload}).status_code, 403)
+
+    def test_booking_create(self):
+        for rows in self.each_size():
+            check_in = self.stay + timedelta(days=10 + rows)
+            body = {"listing": str(self.listing.pk), "email": "guest@example.com",
+                    "check_in": str(check_in), "check_out": str(check_in + timedelta(days=1))}
+            response = self.call(BookingCreateView, "post",
+                                 lambda: self.client.post("/api/bookings/", body, format="json"))
+            self.assertEqual(response.status_code, 201)
+
+    def test_booking_bulk_create(self):
+        for rows in self.each_size():
+            check_in = self.stay + timedelta(days=10 + rows)
+            items = [{"listing": str(listing.pk), "email": "group@example.com", "check_in": str(check_in),
+                      "check_out": str(check_in + timedelta(days=1))} for listing in Listing.objects.all()]
+            response = self.call(BookingBulkCreateView, "post",
+                                 lambda: self.client.post("/api/bookings/bulk/", {"bookings": items}, format="json"))
+            self.assertEqual(response.status_code, 201)
+
+    def test_review_create(self):
+        for _ in self.each_size():
+            self.client.force_authenticate(self.user)
+            body = {"listing": str(self.listing.pk), "rating": 5, "comment": "Would come back again"}
+            response = self.call(ReviewCreateView, "post",
+                                 lambda: self.client.post("/api/reviews/", body, format="json"))
+            self.assertEqual(response.status_code, 201)
+
+    def test_payment_initiate(self):
+        for rows in self.each_size():
+            client = mock.Mock()
+            client.initialize.return_value = (200, {"status": "success",
+                                                    "data": {"checkout_url": f"https://checkout/AP{rows}"}})
+            body = {"amount": "100", "email": "guest@example.com", "booking_id": str(self.booking.pk)}
+            with mock.patch("listings.views.get_chapa_client", return_value=client):
+                response = self.call(ChapaPaymentInitView, "post",
+                                     lambda: self.client.post("/api/payments/initiate/", body, format="json"))
+            self.assertEqual(response.status_code, 200)
+
+    def test_payment_verify(self):
+        for rows in self.each_size():
+            # The booking has a user: its lookup must come from the join, not one query per payment.
+            response = self.call(ChapaPaymentVerifyView, "get",
+                                 lambda: self.client.get(f"/api/payments/verify/CHAP-SEED{rows}/"))
+            self.assertEqual(response.status_code, 202)
+
+    def test_payment_verify_polling(self):
+        self.seed(1)
+        verifies = OutboxMessage.objects.filter(task_name="listings.tasks.verify_payment")
+        cache.clear()
+        for view_class, url in [(ChapaPaymentVerifyView, "/api/payments/verify/CHAP-SEED1/"),
+                                (AsyncChapaPaymentVerifyView, "/api/async/payments/verify/CHAP-SEED1/")]:
+            for _ in range(3):
+                reset_limiter()
+                response = self.assertWithinBudget(view_class, "get", lambda: self.client.get(url))
+                self.assertEqual(response.status_code, 202)
+        # Polling, from either endpoint, queues one verification per window.
+        self.assertEqual(verifies.count(), 1)
+
+        cache.clear()  # the window has passed
+        self.assertEqual(self.client.get("/api/payments/verify/CHAP-SEED1/").status_code, 202)
+        self.assertEqual(verifies.count(), 2)
+
+    def test_payment_status(self):
+        for rows in self.each_size():
+            response = self.call(PaymentStatusView, "get",
+                                 lambda: self.client.get(f"/api/payments/status/CHAP-SEED{rows}/"))
+            self.assertEqual(response.status_code, 200)
+
+    def test_payment_webhook(self):
+        for rows in self.each_size():
+            body = json.dumps({"event": "charge.success", "reference": f"AP{rows}", "tx_ref": f"CHAP-SEED{rows}",
+                               "status": "success"}).encode()
+            signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            response = self.call(ChapaPaymentWebhookView, "post", lambda: self.client.generic(
+                "POST", "/api/payments/webhook/", body, content_type="application/json",
+                HTTP_X_CHAPA_SIGNATURE=signature,
+            ))
+            self.assertEqual(response.status_code, 200)
+
+    def test_async_payment_initiate(self):
+        for rows in self.each_size():
+            client = mock.Mock()
+            chapa_response = {"status": "success", "data": {"checkout_url": f"https://checkout/AA{rows}"}}
+            client.initialize = mock.AsyncMock(return_value=(200, chapa_response))
+            body = {"amount": "100", "email": "guest@example.com", "booking_id": str(self.booking.pk)}
+            with mock.patch("listings.async_views.get_async_chapa_client", return_value=client):
+                response = self.call(AsyncChapaPaymentInitView, "post", lambda: self.client.post(
+                    "/api/async/payments/initiate/", body, format="json", HTTP_IDEMPOTENCY_KEY=f"async-{rows}"))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["chapa_reference"], f"AA{rows}")
+
+                replay = self.client.post("/api/async/payments/initiate/", body, format="json",
+                                          HTTP_IDEMPOTENCY_KEY=f"async-{rows}")
+            self.assertEqual(replay.json(), response.json())
+            self.assertEqual(replay["Idempotent-Replayed"], "true")
+            self.assertEqual(client.initialize.await_count, 1)
+
+    def test_async_payment_verify(self):
+        for rows in self.each_size():
+            response = self.call(AsyncChapaPaymentVerifyView, "get",
+                                 lambda: self.client.get(f"/api/async/payments/verify/CHAP-SEED{rows}/"))
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()["tx_ref"], f"CHAP-SEED{rows}")
+
+    def test_async_payment_webhook(self):
+        for rows in self.each_size():
+            body = json.dumps({"event": "charge.success", "reference": f"AA{rows}", "tx_ref": f"CHAP-SEED{rows}",
+                               "status": "success"}).encode()
+            signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            response = self.call(AsyncChapaPaymentWebhookView, "post", lambda: self.client.generic(
+                "POST", "/api/async/payments/webhook/", body, content_type="application/json",
+                HTTP_X_CHAPA_SIGNATURE=signature,
+            ))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {"message": "Webhook received."})
+
+    def test_data_export(self):
+        admin = get_user_model().objects.create_user("admin", "admin@example.com", "pw", is_staff=True)
+        for rows in self.each_size():
+            self.client.force_authenticate(admin)
+            # The rows are read while the response streams, so consume it inside the budget.
+            response = self.call(DataExportView, "get", lambda: self.client.get("/api/exports/bookings/"))
+            lines = b"".join(response.streaming_content).splitlines()
+            self.assertEqual({json.loads(line)["booking_id"] for line in lines},
+                             {str(pk) for pk in Booking.objects.values_list("pk", flat=True)})
+
+            response = self.client.get("/api/exports/payments/?output=csv&gzip=true")
+            self.assertEqual(response["Content-Disposition"], 'attachment; filename="payments.csv.gz"')
+            lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+            self.assertEqual(lines[0], "payment_id,booking,amount,status,trxn_reference,chapa_reference,"
+                                       "created_at,updated_at")
+            self.assertEqual(len(lines), rows + 1)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/exports/listings/").status_code, 403)
+
+    def test_health_and_metrics(self):
+        self.admin = get_user_model().objects.create_user("admin", "admin@example.com", "pw", is_staff=True)
+        for _ in self.each_size():
+            self.assertEqual(self.call(ServiceHealthCheck, "get", lambda: self.client.get("/api/health/")).status_code,
+                             200)
+            self.client.force_authenticate(self.admin)
+            self.assertEqual(self.call(MetricsView, "get", lambda: self.client.get("/api/metrics/")).status_code, 200)
+            self.client.force_authenticate(None)
+
+
+class DataExportTests(TestCase):
+    """CSV exports can be opened in a spreadsheet without running user-supplied formulas."""
+
+    def test_csv_formula_cells_are_neutralized(self):
+        titles = ["=HYPERLINK(\"https://evil.example\",\"Click\")", "+1+1", "-2+3", "@SUM(A1)", "Plain villa"]
+        for title in titles:
+            Listing.objects.create(title=title, description="Sea view villa", price=120, location="Addis Ababa")
+        admin = get_user_model().objects.create_user("admin", "admin@example.com", "pw", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.get("/api/exports/listings/?output=csv")
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertCountEqual([row["title"] for row in rows], ["'" + title for title in titles[:4]] + ["Plain villa"])
+        self.assertEqual({row["price"] for row in rows}, {"120.00"})
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Replica-eligible reads go to ``replica1`` unless the client just wrote or the replica is down."""
+
+    databases = {"default", "replica1"}
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        reset_limiter()
+        replica_health.reset()
+        self.addCleanup(replica_health.reset)
+        search.reset_index()
+        self.listing = Listing.objects.create(title="Beach villa", description="Sea view villa", price=120,
+                                              location="Addis Ababa")
+
+    def served_by(self, send, written_now=False):
+        """
+        Send a request; return its body and the aliases that ran its queries.
+
+        Unless ``written_now``, the listing tables' last write is dated long ago, so the
+        replicas are assumed to have caught up with it.
+        """
+        cache.clear()
+        if not written_now:
+            with mock.patch("listings.Utils.cache._now_us", return_value=1):
+                bump_table_version(*LISTING_CACHE_TABLES)
+        with count_queries("default") as primary, count_queries("replica1") as replica:
+            response = send()
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body, {alias for alias, log in [("default", primary), ("replica1", replica)] if len(log)}
+
+    def test_reads_use_replica(self):
+        admin = get_user_model().objects.create_user("admin", "admin@example.com", "pw", is_staff=True)
+        self.client.force_authenticate(admin)
+        for url in ["/api/listings/", "/api/listings/search/?q=villa", "/api/exports/listings/"]:
+            response, body, aliases = self.served_by(lambda: self.client.get(url))
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn("replica1", aliases, url)
+            self.assertIn(str(self.listing.pk), body.decode(), url)
+        # Views that were not opted in keep reading from the primary.
+        *_, aliases = self.served_by(lambda: self.client.get("/api/listings/availability/"))
+        self.assertNotIn("replica1", aliases)
+
+    def test_writes_stick_to_primary(self):
+        stay = timezone.localdate() + timedelta(days=30)
+        body = {"listing": str(self.listing.pk), "email": "guest@example.com",
+                "check_in": str(stay), "check_out": str(stay + timedelta(days=2))}
+        response = self.client.post("/api/bookings/", body, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("db_primary_until", response.cookies)
+
+        response, body, aliases = self.served_by(lambda: self.client.get("/api/listings/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(aliases, {"default"})
+
+        # Once the window has passed, the client reads from the replica again.
+        self.client.cookies["db_primary_until"] = "0"
+        *_, aliases = self.served_by(lambda: self.client.get("/api/listings/"))
+        self.assertIn("replica1", aliases)
+
+    def test_recent_write_reads_primary(self):
+        # Another client just wrote: the replica may lag behind the new table version, so
+        # pages cached (or validated) under that version are built from the primary.
+        self.client.cookies.clear()
+        response, body, aliases = self.served_by(lambda: self.client.get("/api/listings/"), written_now=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(aliases, {"default"})
+        self.assertIn(str(self.listing.pk), body.decode())
+        *_, aliases = self.served_by(lambda: self.client.get("/api/listings/search/?q=villa"), written_now=True)
+        self.assertEqual(aliases, {"default"})
+
+        # Uncached reads are not tied to a table version and may still use the replica.
+        self.client.force_authenticate(get_user_model().objects.create_user("admin", "a@example.com", "pw",
+                                                                            is_staff=True))
+        *_, aliases = self.served_by(lambda: self.client.get("/api/exports/listings/"), written_now=True)
+        self.assertIn("replica1", aliases)
+
+        # Once the replicas have had time to catch up, the cached views read from them again.
+        *_, aliases = self.served_by(lambda: self.client.get("/api/listings/"))
+        self.assertIn("replica1", aliases)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        replica = connections["replica1"]
+        with mock.patch.object(replica, "ensure_connection", side_effect=OperationalError("replica unreachable")):
+            with self.assertLogs("listings.Utils.db_router", "WARNING"):
+                response, body, aliases = self.served_by(lambda: self.client.get("/api/listings/"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(aliases, {"default"})
+            self.assertIn(str(self.listing.pk), body.decode())
+
+            health_check = self.client.get("/api/health/")
+            self.assertEqual(health_check.status_code, 200)
+            self.assertEqual(health_check.json()["replicas"], {"replica1": "down"})
+
+        # A replica marked down is skipped until the retry window passes.
+        *_, aliases = self.served_by(lambda: self.client.get("/api/listings/"))
+        self.assertEqual(aliases, {"default"})
+        replica_health.reset()
+        *_, aliases = self.served_by(lambda: self.client.get("/api/listings/"))
+        self.assertIn("replica1", aliases)
+
+
+class RateLimiterTests(TestCase):
+    """The GCRA limiters let exactly ``limit`` requests through per period, for any rate."""
+
+    RATES = [(5, 60), (7, 60), (3, 1), (1, 60)]
+
+    def setUp(self):
+        reset_limiter()
+        self.addCleanup(reset_limiter)
+
+    def assertEnforces(self, limiter, limit, period):
+        key = f"rate-{limit}-{period}"
+        results = [limiter.hit(key, limit, period) for _ in range(limit + 1)]
+        self.assertEqual([allowed for allowed, _ in results], [True] * limit + [False], (limit, period))
+        retry_after = results[-1][1]
+        self.assertTrue(0 < retry_after <= period / limit, (limit, period, retry_after))
+
+    def redis_limiter(self, server):
+        with mock.patch("redis.Redis.from_url", return_value=fakeredis.FakeRedis(server=server)):
+            return RedisGCRALimiter("redis://throttle")
+
+    def test_memory_limiter(self):
+        limiter = MemoryGCRALimiter()
+        for limit, period in self.RATES:
+            self.assertEnforces(limiter, limit, period)
+
+    @skipIf(fakeredis is None, "fakeredis is not installed")
+    def test_redis_limiter_uneven_rates(self):
+        limiter = self.redis_limiter(fakeredis.FakeServer())
+        for limit, period in self.RATES:
+            self.assertEnforces(limiter, limit, period)
+
+    @skipIf(fakeredis is None, "fakeredis is not installed")
+    def test_redis_limit_is_shared_between_workers(self):
+        server = fakeredis.FakeServer()
+        workers = [self.redis_limiter(server), self.redis_limiter(server)]
+        results = [workers[n % 2].hit("shared", 7, 60)[0] for n in range(8)]
+        self.assertEqual(results, [True] * 7 + [False])
+
+    @override_settings(THROTTLE_REDIS_URL="redis://throttle")
+    def test_redis_errors_fall_back_to_process_limits(self):
+        broken = mock.Mock(spec=RedisGCRALimiter)
+        broken.hit.side_effect = ConnectionError("redis down")
+        with mock.patch.object(throttling, "RedisGCRALimiter", return_value=broken), \
+                self.assertLogs("listings.Utils.throttling", "WARNING"):
+            results = [throttling._hit("fallback", 3, 1)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        # Redis is not retried on every request while it is down.
+        self.assertEqual(broken.hit.call_count, 1)
+
+    def test_throttled_view(self):
+        client = APIClient()
+        statuses = [client.get("/api/health/").status_code for _ in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])  # anon: 5/minute
+        response = client.get("/api/health/")
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 12)
+        self.assertIn("throttled", response.json()["detail"])
+
+
+class CircuitBreakerTests(TestCase):
+    """closed -> open after the threshold -> one half-open trial -> closed or open again."""
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record_failure()  # the trial failed: a new open period, then a new trial
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow_request())
+        self.assertTrue(breaker.allow_request())
+
+    def test_trial_released_when_the_call_raises(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        session = mock.Mock()
+        session.request.side_effect = RuntimeError("unexpected")
+        client = ChapaClient(base_url="https://chapa.test", secret_key="sk", session=session, breaker=breaker)
+
+        with self.assertRaises(RuntimeError):
+            client.verify("tx-1")
+        # The failed trial re-opened the circuit instead of staying in flight forever.
+        self.assertTrue(breaker.allow_request())
+
+        breaker.record_failure()
+        session.request.side_effect = KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            client.verify("tx-1")
+        session.request.side_effect = None
+        session.request.return_value = mock.Mock(status_code=200, json=lambda: {"status": "success"})
+        self.assertEqual(client.verify("tx-1"), (200, {"status": "success"}))
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_async_trial_released_when_cancelled(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        session = mock.Mock()
+        session.request = mock.AsyncMock(side_effect=asyncio.CancelledError)
+        client = AsyncChapaClient(base_url="https://chapa.test", secret_key="sk", session=session, breaker=breaker)
+
+        with self.assertRaises(asyncio.CancelledError):
+            async_to_sync(client.verify)("tx-1")
+        self.assertTrue(breaker.allow_request())
+
+    def test_open_circuit_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        breaker.record_failure()
+        session = mock.Mock()
+        client = ChapaClient(base_url="https://chapa.test", secret_key="sk", session=session, breaker=breaker)
+        with self.assertRaises(ChapaUnavailable):
+            client.verify("tx-1")
+        session.request.assert_not_called()
+
+
+@override_settings(CHAPA_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class ChapaWebhookTests(TestCase):
+    """Webhooks must carry an HMAC of their own body, and each delivery is processed once."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.body = json.dumps({"event": "charge.success", "reference": "AP1", "tx_ref": "CHAP-1",
+                                "status": "success"}).encode()
+
+    def deliver(self, body, url="/api/payments/webhook/", **headers):
+        return self.client.generic("POST", url, body, content_type="application/json", **headers)
+
+    def sign(self, message):
+        return hmac.new(WEBHOOK_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+    def test_rejects_bad_or_missing_signature(self):
+        for url in ["/api/payments/webhook/", "/api/async/payments/webhook/"]:
+            with self.assertLogs("listings", "WARNING"):
+                self.assertEqual(self.deliver(self.body, url).status_code, 401, url)
+                response = self.deliver(self.body, url, HTTP_X_CHAPA_SIGNATURE=self.sign(b"another body"))
+            self.assertEqual(response.status_code, 401, url)
+            self.assertEqual(response.json(), {"error": "Invalid webhook signature."})
+        self.assertFalse(ChapaWebhookEvent.objects.exists())
+
+    def test_rejects_static_secret_signature(self):
+        # Chapa-Signature is HMAC(secret, secret): seen once, it could be replayed with any payload.
+        forged = json.dumps({"event": "charge.success", "tx_ref": "CHAP-VICTIM", "status": "success"}).encode()
+        for url in ["/api/payments/webhook/", "/api/async/payments/webhook/"]:
+            with self.assertLogs("listings", "WARNING"):
+                response = self.deliver(forged, url, HTTP_CHAPA_SIGNATURE=self.sign(WEBHOOK_SECRET.encode()))
+            self.assertEqual(response.status_code, 401, url)
+        self.assertFalse(ChapaWebhookEvent.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_duplicate_delivery(self):
+        for url in ["/api/payments/webhook/", "/api/async/payments/webhook/"]:
+            response = self.deliver(self.body, url, HTTP_X_CHAPA_SIGNATURE=self.sign(self.body))
+            self.assertEqual(response.status_code, 200, url)
+        self.assertEqual(response.json(), {"message": "Webhook already received."})
+        self.assertEqual(ChapaWebhookEvent.objects.count(), 1)
+        self.assertEqual(OutboxMessage.objects.filter(task_name="listings.tasks.process_chapa_webhook_event").count(),
+                         1)
+
+
+class ListingConditionalGetTests(TestCase):
+    """ETags and Last-Modified change whenever anything in the response does."""
+
+    def setUp(self):
+        cache.clear()
+        reset_limiter()
+        search.reset_index()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("guest", "guest@example.com", "pw")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing = Listing.objects.create(title="Beach villa", description="Sea view villa", price=120,
+                                                  location="Addis Ababa")
+
+    def test_new_review_changes_search_validators(self):
+        url = "/api/listings/search/?q=villa"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            body = {"listing": str(self.listing.pk), "rating": 4, "comment": "Lovely stay overall"}
+            self.assertEqual(self.client.post("/api/reviews/", body, format="json").status_code, 201)
+        self.client.force_authenticate(None)
+
+        # The review changes the listing's rating fields, so the old validators must not match.
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"], HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"][0]["rating_count"], 1)
+
+
+class ListingCacheTests(TestCase):
+    """Without a shared cache, table versions are per process, so listing responses are not cached or validated."""
+
+    def setUp(self):
+        cache.clear()
+        reset_limiter()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing = Listing.objects.create(title="Beach villa", description="Sea view villa", price=120,
+                                                  location="Addis Ababa")
+
+    def write_in_another_worker(self, title):
+        # The version bump lands in that worker's LocMem cache, not this one's.
+        Listing.objects.filter(pk=self.listing.pk).update(title=title)
+
+    @override_settings(LISTINGS_CACHE=False)
+    def test_per_process_cache(self):
+        self.assertEqual(self.client.get("/api/listings/").json()["data"][0]["title"], "Beach villa")
+        self.write_in_another_worker("Lake house")
+        self.assertEqual(self.client.get("/api/listings/").json()["data"][0]["title"], "Lake house")
+
+    @override_settings(LISTINGS_CACHE=False)
+    def test_no_validators_without_shared_cache(self):
+        for url in ["/api/listings/", "/api/listings/search/?q=villa"]:
+            first = self.client.get(url)
+            self.assertNotIn("ETag", first, url)
+            self.assertNotIn("Last-Modified", first, url)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH="*",
+                                       HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+            self.assertEqual(response.status_code, 200, url)
+
+
+@override_settings(NOTIFICATION_RATE_LIMIT=3)
+class NotificationBatchTests(TestCase):
+    """A failed batch is retried without re-sending what already went out or re-spending the rate limit."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_retry_sends_only_unsent_messages(self):
+        messages = [notifications.booking_confirmation(f"guest{n % 2}@example.com", f"booking-{n}") for n in range(5)]
+        send_messages = EmailBackend.send_messages
+        attempts = []
+
+        def flaky_send(backend, emails):
+            # Like SMTP: messages go out one by one, and the connection drops at the third one.
+            for email in emails:
+                attempts.append(email)
+                if len(attempts) == 3:
+                    raise ConnectionError("SMTP connection dropped")
+                send_messages(backend, [email])
+            return len(emails)
+
+        with mock.patch.object(EmailBackend, "send_messages", flaky_send), \
+                self.assertLogs("listings.tasks", "ERROR"):
+            result = send_notification_batch.apply(args=[messages])
+
+        self.assertTrue(result.successful())
+        self.assertEqual(sorted(email.body for email in mail.outbox),
+                         sorted(notifications.render(message)[1] for message in messages))
+        # Each recipient counted once per message, not again for the retry.
+        self.assertEqual(cache.get("notifications:rate:guest0@example.com"), 3)
+        self.assertEqual(cache.get("notifications:rate:guest1@example.com"), 2)
+
+    @override_settings(NOTIFICATION_RATE_LIMIT=20)
+    def test_group_booking_sends_one_email_per_recipient(self):
+        recipients = [["lead@example.com", f"booking-{n}"] for n in range(200)] + [["friend@example.com", "booking-x"]]
+        send_bulk_booking_confirmation_emails.apply(args=[recipients])
+
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ["friend@example.com", "lead@example.com"])
+        summary = next(email for email in mail.outbox if email.to == ["lead@example.com"])
+        self.assertEqual(summary.subject, "Group Booking Confirmation")
+        self.assertIn("200 stays", summary.body)
+        self.assertIn("booking-199", summary.body)
+        self.assertEqual(cache.get("notifications:rate:lead@example.com"), 1)
+
+    def test_wrapper_tasks_keep_retries(self):
+        # The single-email and bulk tasks queue a batch job, so a failed send is still retried.
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def fail_once(backend, emails):
+            calls.append(emails)
+            if len(calls) == 1:
+                raise ConnectionError("SMTP connection dropped")
+            return send_messages(backend, emails)
+
+        for task, args in [(send_booking_confirmation_email, ["guest@example.com", "booking-1"]),
+                           (send_bulk_booking_confirmation_emails, [[["guest@example.com", "booking-2"]]]),
+                           (send_payment_status_email, ["guest@example.com", "success", "100", "CHAP-1"])]:
+            with self.subTest(task=task.name):
+                mail.outbox.clear()
+                calls.clear()
+                with mock.patch.object(EmailBackend, "send_messages", fail_once), \
+                        self.assertLogs("listings.tasks", "ERROR"):
+                    self.assertTrue(task.apply(args=args).successful())
+                self.assertEqual(len(mail.outbox), 1)
+
+
+class BookingAvailabilityTests(TestCase):
+    """Overlapping stays are refused; adjacent stays and dates freed by a cancellation are not."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.listing = Listing.objects.create(title="Beach villa", description="Sea view villa", price=120,
+                                              location="Addis Ababa")
+        self.start = timezone.localdate() + timedelta(days=30)
+
+    def book(self, first_night, nights):
+        reset_limiter()  # booking: 1/minute
+        check_in = self.start + timedelta(days=first_night)
+        body = {"listing": str(self.listing.pk), "email": "guest@example.com",
+                "check_in": str(check_in), "check_out": str(check_in + timedelta(days=nights))}
+        return self.client.post("/api/bookings/", body, format="json")
+
+    def test_overlapping_stays(self):
+        first = self.book(0, 3)
+        self.assertEqual(first.status_code, 201)
+        for first_night, nights in [(0, 3), (1, 1), (2, 4), (-1, 2), (-2, 10)]:
+            response = self.book(first_night, nights)
+            self.assertEqual(response.status_code, 409, (first_night, nights))
+            self.assertEqual(response.json(), {"error": BookingConflict.default_detail})
+
+        # Half-open ranges: leaving on the day the next guest arrives is not an overlap.
+        self.assertEqual(self.book(3, 2).status_code, 201)
+        self.assertEqual(self.book(-2, 2).status_code, 201)
+
+        Booking.objects.filter(pk=first.json()["data"]["booking_id"]).update(status="canceled")
+        self.assertEqual(self.book(1, 1).status_code, 201)
+        self.assertEqual(Booking.objects.active().count(), 3)
+
+    def test_bulk_rejects_overlaps(self):
+        self.assertEqual(self.book(0, 3).status_code, 201)
+        reset_limiter()
+        items = [{"listing": str(self.listing.pk), "email": "group@example.com",
+                  "check_in": str(self.start + timedelta(days=first_night)),
+                  "check_out": str(self.start + timedelta(days=first_night + nights))}
+                 for first_night, nights in [(1, 1), (3, 2), (4, 2), (5, 1)]]
+        response = self.client.post("/api/bookings/bulk/", {"bookings": items}, format="json")
+        self.assertEqual(response.status_code, 207)
+        # One overlaps the existing stay, one overlaps an earlier stay in the same request.
+        statuses = [result["status"] for result in response.json()["data"]]
+        self.assertEqual(statuses, ["error", "created", "error", "created"])
+
+    def test_only_overlap_violations_are_conflicts(self):
+        check_in = self.start
+        check_out = self.start + timedelta(days=2)
+
+        class ExclusionViolation(Exception):
+            diag = mock.Mock(constraint_name="booking_no_overlap")
+
+        overlap = IntegrityError("conflicting key value violates exclusion constraint")
+        overlap.__cause__ = ExclusionViolation()
+        with self.assertRaises(BookingConflict):
+            create_booking(mock.Mock(side_effect=overlap), self.listing.pk, check_in, check_out)
+
+        other = IntegrityError("NOT NULL constraint failed: listings_booking.email")
+        with self.assertRaises(IntegrityError):
+            create_booking(mock.Mock(side_effect=other), self.listing.pk, check_in, check_out)
+
+
+class IdempotencyTests(TestCase):
+    """A repeated Idempotency-Key gets the stored response back and creates nothing new, with either store."""
+
+    # Query budgets assume the cache store (as in production with Redis); the db store adds its own queries.
+    BACKENDS = [{"IDEMPOTENCY_BACKEND": "cache"}, {"IDEMPOTENCY_BACKEND": "db", "QUERY_BUDGET_MODE": ""}]
+
+    def setUp(self):
+        cache.clear()
+        self.listing = Listing.objects.create(title="Beach villa", description="Sea view villa", price=120,
+                                              location="Addis Ababa")
+        self.check_in = timezone.localdate() + timedelta(days=30)
+
+    def booking_body(self, nights=2):
+        return {"listing": str(self.listing.pk), "email": "guest@example.com",
+                "check_in": str(self.check_in), "check_out": str(self.check_in + timedelta(days=nights))}
+
+    def test_booking_replay(self):
+        for overrides in self.BACKENDS:
+            backend = overrides["IDEMPOTENCY_BACKEND"]
+            with self.subTest(backend=backend), override_settings(**overrides):
+                Booking.objects.all().delete()
+                reset_limiter()
+                self.client = APIClient()
+                key = f"booking-{backend}"
+                first = self.client.post("/api/bookings/", self.booking_body(), format="json",
+                                         HTTP_IDEMPOTENCY_KEY=key)
+                self.assertEqual(first.status_code, 201)
+                # The replay is not throttled (booking: 1/minute) and does not hit the overlap check.
+                replay = self.client.post("/api/bookings/", self.booking_body(), format="json",
+                                          HTTP_IDEMPOTENCY_KEY=key)
+                self.assertEqual(replay.status_code, 201)
+                self.assertEqual(replay["Idempotent-Replayed"], "true")
+                self.assertEqual(replay.json(), first.json())
+                self.assertEqual(Booking.objects.count(), 1)
+
+                reset_limiter()
+                reused = self.client.post("/api/bookings/", self.booking_body(nights=3), format="json",
+                                          HTTP_IDEMPOTENCY_KEY=key)
+                self.assertEqual(reused.status_code, 422)
+                self.assertEqual(reused.json(), {"error": "Idempotency-Key was already used with a different request."})
+                self.assertEqual(Booking.objects.count(), 1)
+
+    def test_payment_replay(self):
+        booking = Booking.objects.create(listing=self.listing, email="guest@example.com", check_in=self.check_in,
+                                         check_out=self.check_in + timedelta(days=2))
+        body = {"amount": "100", "email": "guest@example.com", "booking_id": str(booking.pk)}
+        for overrides in self.BACKENDS:
+            backend = overrides["IDEMPOTENCY_BACKEND"]
+            with self.subTest(backend=backend), override_settings(**overrides):
+                Payments.objects.all().delete()
+                reset_limiter()
+                self.client = APIClient()
+                chapa = mock.Mock()
+                chapa.initialize.return_value = (200, {"status": "success",
+                                                       "data": {"checkout_url": "https://checkout/AP1"}})
+                key = f"payment-{backend}"
+                with mock.patch("listings.views.get_chapa_client", return_value=chapa):
+                    first = self.client.post("/api/payments/initiate/", body, format="json", HTTP_IDEMPOTENCY_KEY=key)
+                    replay = self.client.post("/api/payments/initiate/", body, format="json",
+                                              HTTP_IDEMPOTENCY_KEY=key)
+                    reused = self.client.post("/api/payments/initiate/", {**body, "amount": "200"}, format="json",
+                                              HTTP_IDEMPOTENCY_KEY=key)
+                self.assertEqual(first.status_code, 200)
+                self.assertEqual((replay.status_code, replay.json()), (200, first.json()))
+                self.assertEqual(replay["Idempotent-Replayed"], "true")
+                self.assertEqual(reused.status_code, 422)
+                self.assertEqual(Payments.objects.count(), 1)
+                self.assertEqual(chapa.initialize.call_count, 1)
+
+    def test_db_store_lost_race_keeps_transaction_usable(self):
+        store = DatabaseIdempotencyStore()
+        with transaction.atomic():
+            self.assertTrue(store.acquire("race", "fingerprint"))
+            self.assertFalse(store.acquire("race", "fingerprint"))
+            # Without a savepoint the failed INSERT leaves the transaction unusable.
+            self.assertEqual(store.get("race")["state"], "in_progress")
+
+    def test_anonymous_keys_are_per_client(self):
+        booking = Booking.objects.create(listing=self.listing, email="guest@example.com", check_in=self.check_in,
+                                         check_out=self.check_in + timedelta(days=2))
+        body = {"amount": "100", "email": "guest@example.com", "booking_id": str(booking.pk)}
+        chapa = mock.Mock()
+        chapa.initialize.side_effect = [(200, {"status": "success", "data": {"checkout_url": url}})
+                                        for url in ["https://checkout/AP1", "https://checkout/AP2"]]
+        responses = []
+        with mock.patch("listings.views.get_chapa_client", return_value=chapa):
+            for address in ["10.0.0.1", "10.0.0.2", "10.0.0.1"]:
+                reset_limiter()
+                responses.append(APIClient(REMOTE_ADDR=address).post("/api/payments/initiate/", body, format="json",
+                                                                     HTTP_IDEMPOTENCY_KEY="1"))
+        first, other_guest, retry = responses
+        # Another guest who happens to pick the same key gets their own payment, not the first guest's.
+        self.assertEqual(other_guest.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", other_guest)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(chapa.initialize.call_count, 2)
+
+    def test_async_view_authenticates_like_sync(self):
+        # Keys are scoped per user, so a key sent to both paths by the same (Basic-auth) user replays.
+        get_user_model().objects.create_user("guest", "guest@example.com", "pw")
+        credentials = "Basic " + base64.b64encode(b"guest:pw").decode()
+        booking = Booking.objects.create(listing=self.listing, email="guest@example.com", check_in=self.check_in,
+                                         check_out=self.check_in + timedelta(days=2))
+        body = {"amount": "100", "email": "guest@example.com", "booking_id": str(booking.pk)}
+        chapa = mock.Mock()
+        chapa.initialize.return_value = (200, {"status": "success", "data": {"checkout_url": "https://checkout/AP1"}})
+        async_chapa = mock.Mock(initialize=mock.AsyncMock())
+        self.client = APIClient(HTTP_AUTHORIZATION=credentials)
+        with override_settings(QUERY_BUDGET_MODE=""), \
+                mock.patch("listings.views.get_chapa_client", return_value=chapa), \
+                mock.patch("listings.async_views.get_async_chapa_client", return_value=async_chapa):
+            first = self.client.post("/api/payments/initiate/", body, format="json", HTTP_IDEMPOTENCY_KEY="both")
+            replay = self.client.post("/api/async/payments/initiate/", body, format="json",
+                                      HTTP_IDEMPOTENCY_KEY="both")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((replay.status_code, replay.json()), (200, first.json()))
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        async_chapa.initialize.assert_not_awaited()
+
+        # Bad credentials are refused the same way on both paths.
+        self.client = APIClient(HTTP_AUTHORIZATION="Basic " + base64.b64encode(b"guest:wrong").decode())
+        for url in ["/api/payments/verify/CHAP-X/", "/api/async/payments/verify/CHAP-X/"]:
+            reset_limiter()
+            self.assertEqual(self.client.get(url).status_code, 403, url)
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3)
+class OutboxRelayTests(TestCase):
+    """One bad message is skipped (and eventually dead-lettered) without holding up the others."""
+
+    def relay(self, send_task=None):
+        app = mock.MagicMock()
+        if send_task is not None:
+            app.send_task.side_effect = send_task
+        with mock.patch("listings.Utils.outbox.current_app", app), self.assertLogs("listings.Utils.outbox"):
+            return outbox.relay_batch(), app.send_task
+
+    def test_bad_message_does_not_stall_relay(self):
+        poison = outbox.enqueue("listings.tasks.send_booking_confirmation_email", ["missing-booking-id"])
+        good = outbox.enqueue("listings.tasks.send_booking_confirmation_email", ["guest@example.com", "booking-1"])
+        plain = outbox.enqueue("listings.tasks.verify_payment", [1])
+
+        sent, send_task = self.relay()
+        self.assertEqual(sent, 2)
+        self.assertEqual(send_task.call_count, 2)
+        good.refresh_from_db()
+        plain.refresh_from_db()
+        self.assertIsNotNone(good.dispatched_at)
+        self.assertIsNotNone(plain.dispatched_at)
+        poison.refresh_from_db()
+        self.assertEqual((poison.dispatched_at, poison.attempts, poison.claimed_until), (None, 1, None))
+        self.assertIn("TypeError", poison.last_error)
+
+        for _ in range(2):
+            self.relay()
+        poison.refresh_from_db()
+        self.assertEqual(poison.attempts, 3)
+        # Dead-lettered: no longer picked up.
+        with mock.patch("listings.Utils.outbox.current_app") as app:
+            self.assertEqual(outbox.relay_batch(), 0)
+        app.send_task.assert_not_called()
+
+    def test_rows_leased_not_locked_while_publishing(self):
+        message = outbox.enqueue("listings.tasks.verify_payment", [1])
+        seen = []
+
+        def send_task(*args, **kwargs):
+            # Another relay running meanwhile skips the leased row instead of waiting on a lock.
+            seen.append(outbox.relay_batch())
+
+        with mock.patch("listings.Utils.outbox.current_app") as app:
+            app.send_task.side_effect = send_task
+            self.assertEqual(outbox.relay_batch(), 1)
+        self.assertEqual(seen, [0])
+        message.refresh_from_db()
+        self.assertIsNotNone(message.dispatched_at)
+        self.assertIsNone(message.claimed_until)
+
+    def test_broker_outage_does_not_count_as_attempt(self):
+        message = outbox.enqueue("listings.tasks.verify_payment", [1])
+        sent, _ = self.relay(send_task=BrokerUnavailable("connection refused"))
+        self.assertEqual(sent, 0)
+        message.refresh_from_db()
+        self.assertEqual((message.dispatched_at, message.attempts, message.claimed_until), (None, 0, None))
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+class MetricsAccessTests(TestCase):
+    """Metrics are for staff and the Prometheus scraper, not the public."""
+
+    def test_access(self):
+        client = APIClient()
+        self.assertEqual(client.get("/api/metrics/").status_code, 403)
+        self.assertEqual(client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer wrong-token").status_code, 403)
+        self.assertEqual(client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer scrape-token").status_code, 200)
+
+        client.force_authenticate(get_user_model().objects.create_user("guest", "guest@example.com", "pw"))
+        self.assertEqual(client.get("/api/metrics/").status_code, 403)
+        client.force_authenticate(get_user_model().objects.create_user("admin", "admin@example.com", "pw",
+                                                                       is_staff=True))
+        self.assertEqual(client.get("/api/metrics/").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_is_disabled(self):
+        self.assertEqual(APIClient().get("/api/metrics/", HTTP_AUTHORIZATION="Bearer ").status_code, 403)
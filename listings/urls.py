@@ -1,14 +1,28 @@
 from django.urls import path, re_path
-from . import views
+from . import async_views, views
 from rest_framework import permissions
 
 
 urlpatterns = [
     path('listings/', views.ListingListCreateView.as_view(), name='listing-list-create'),
+    path('listings/import/', views.ListingImportView.as_view(), name='listing-import'),
+    path('listings/search/', views.ListingSearchView.as_view(), name='listing-search'),
+    path('listings/availability/', views.ListingAvailabilityView.as_view(), name='listing-availability'),
     path ('bookings/', views.BookingCreateView.as_view(), name='create-booking'),
+    path('bookings/bulk/', views.BookingBulkCreateView.as_view(), name='create-booking-bulk'),
     path('reviews/', views.ReviewCreateView.as_view(), name='review-create'),
     path('payments/initiate/', views.ChapaPaymentInitView.as_view(), name='chapa-payment-init'),
     path('payments/verify/<str:reference>/', views.ChapaPaymentVerifyView.as_view(), name='chapa-payment-verify'),
+    path('payments/status/<str:reference>/', views.PaymentStatusView.as_view(), name='chapa-payment-status'),
     path('health/', views.ServiceHealthCheck.as_view(), name='health-check'),
-    #path('payments/webhook/', views.ChapaPaymentWebhookView.as_view(), name='chapa-payment-webhook'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+    path('exports/<str:dataset>/', views.DataExportView.as_view(), name='data-export'),
+    path('payments/webhook/', views.ChapaPaymentWebhookView.as_view(), name='chapa-payment-webhook'),
+
+    # Async twins of the payment endpoints, for the ASGI (uvicorn) workers.
+    path('async/payments/initiate/', async_views.AsyncChapaPaymentInitView.as_view(), name='async-chapa-payment-init'),
+    path('async/payments/verify/<str:reference>/', async_views.AsyncChapaPaymentVerifyView.as_view(),
+         name='async-chapa-payment-verify'),
+    path('async/payments/webhook/', async_views.AsyncChapaPaymentWebhookView.as_view(),
+         name='async-chapa-payment-webhook'),
 ]
\ No newline at end of file
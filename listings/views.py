@@ -1,36 +1,113 @@
 import json
-import requests
+from django.http import HttpResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.permissions import AllowAny
+from django.views.decorators.http import condition
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from .serializers import PaymentCreateSerializer, BookingSerializer, ReviewSerializer, ListingSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from .serializers import (PaymentCreateSerializer, BookingSerializer, ReviewSerializer, ListingSerializer,
+                          ListingFilterSerializer, ListingAvailabilitySerializer, ExportQuerySerializer,
+                          fast_booking_serializer, fast_listing_serializer)
 from .models import Payments, Booking, Listing, Review
-from .Utils.utils import generate_payment_reference 
+from .Utils.utils import generate_payment_reference, parse_fields_param
+from .Utils.pagination import KeysetPaginator
+from .Utils.filters import LISTING_ORDERINGS, filter_listings
+from .Utils.search import search_listings
+from .Utils.ratings import record_review_rating
+from .Utils.availability import BookingConflict, available_listings, create_bookings_bulk
+from .Utils.cache import build_cache_key, canonical_query, get_or_compute, table_etag, table_last_modified
 from django.conf import settings
-from .tasks import send_booking_confirmation_email 
-from django.db import connection
+from .tasks import send_booking_confirmation_email, send_bulk_booking_confirmation_emails, verify_payment
+from .Utils import outbox
+from django.db import connection, router, transaction
 import logging
 import uuid
-from django.db import models
 from .Utils.throttling import CustomScopedRateThrottle
+from .Utils.chapa_client import ChapaUnavailable, get_chapa_client
+from .Utils.payments import claim_verification, find_payment, release_verification
+from .Utils.webhooks import accept_webhook_event, verify_chapa_signature
+from .Utils.idempotency import idempotent
+from .Utils.metrics import CanReadMetrics, render_metrics
+from .Utils.exports import DATASETS, FORMATS, export_filename, export_stream
+from .Utils.imports import ListingImportError, import_listings, infer_format
+from .Utils.db_router import health as replica_health, reads_from_replica
 
 logger = logging.getLogger(__name__)
 
-CHAPA_SECRET_KEY = settings.CHAPA_SECRET_KEY
 
+LISTING_CACHE_TABLES = [Listing._meta.db_table, Review._meta.db_table]
 
+
+def paginate_listings(paginator, listings, request, fields):
+    """
+    Load one page of ``listings`` and render it with ListingSerializer's output shape.
+
+    With ``FAST_SERIALIZERS`` on, only the needed columns are fetched as ``.values()``
+    rows and rendered by the fast path; otherwise model instances go through DRF.
+
+    Returns:
+        tuple[list[dict], str | None]: The serialized rows and the next cursor.
+    """
+    if settings.FAST_SERIALIZERS:
+        # Always load the ordering columns so the next cursor can be built.
+        columns = fast_listing_serializer.columns(fields)
+        columns += [name for name in paginator.fields if name not in columns]
+        rows, next_cursor = paginator.paginate_queryset(listings.values(*columns), request)
+        return fast_listing_serializer.serialize_rows(rows, fields), next_cursor
+
+    if fields is not None:
+        listings = listings.only(*ListingSerializer.model_fields_for(fields) | set(paginator.fields))
+    rows, next_cursor = paginator.paginate_queryset(listings, request)
+    return ListingSerializer(rows, many=True, fields=fields).data, next_cursor
+
+
+@method_decorator(
+    condition(
+        etag_func=table_etag("listings:list", LISTING_CACHE_TABLES),
+        last_modified_func=table_last_modified(LISTING_CACHE_TABLES),
+    ),
+    name='get',
+)
 class ListingListCreateView(APIView):
-    """API view to list all listings or create a new listing."""
+    """API view to list listings (filtered, cursor paginated, cached) or create a new listing."""
     permission_classes = [AllowAny]
+    query_budgets = {"get": 2, "post": 2}  # max queries per request, whatever the data size
 
+    @reads_from_replica(unless_changed=LISTING_CACHE_TABLES)
     def get(self, request):
-        listings = Listing.objects.all()
-        serializer = ListingSerializer(listings, many=True)
-        return Response({"message": "Listings retrieved successfully.", "data": serializer.data})
+        filter_serializer = ListingFilterSerializer(data=request.query_params)
+        if not filter_serializer.is_valid():
+            return Response({"error": filter_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        filters = filter_serializer.validated_data
+
+        paginator = KeysetPaginator(LISTING_ORDERINGS[filters["sort"]])
+        try:
+            fields = parse_fields_param(request.query_params.get("fields"), ListingSerializer().fields)
+        except ValueError as exc:
+            return Response({"error": {"fields": [str(exc)]}}, status=status.HTTP_400_BAD_REQUEST)
+
+        def build_page():
+            data, next_cursor = paginate_listings(paginator, filter_listings(Listing.objects.all(), filters),
+                                                  request, fields)
+            return {"data": data, "next_cursor": next_cursor}
+
+        cache_key = build_cache_key("listings:list", LISTING_CACHE_TABLES, canonical_query(request))
+        try:
+            page = get_or_compute(cache_key, build_page)
+        except ValidationError as exc:
+            return Response({"error": exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "message": "Listings retrieved successfully.",
+            "data": page["data"],
+            "next_cursor": page["next_cursor"],
+            "next": paginator.get_next_link(request, page["next_cursor"]),
+        })
 
     def post(self, request):
         serializer = ListingSerializer(data=request.data)
@@ -42,38 +119,160 @@ class ListingListCreateView(APIView):
         return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ListingImportView(APIView):
+    """
+    Admin-only bulk import of listings from an uploaded CSV or NDJSON file (optionally gzipped).
+
+    Rows are checked with ListingSerializer's rules in batches and saved with one
+    bulk_create per batch (see import_listings); invalid rows are skipped and reported by line number.
+
+    No query budget: the number of INSERTs grows with the file, one or a few per
+    IMPORT_BATCH_SIZE rows, and none per row.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": {"file": ["Upload the listings as a 'file' form field."]}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get("file_format") or infer_format(upload.name)
+        if file_format not in ("csv", "ndjson"):
+            return Response({"error": {"file_format": ["Use 'csv' or 'ndjson', or name the file *.csv / *.ndjson."]}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true", "yes")
+
+        try:
+            report = import_listings(upload, file_format, dry_run=dry_run)
+        except ListingImportError as exc:
+            return Response({"error": {"file": [str(exc)]}}, status=status.HTTP_400_BAD_REQUEST)
+
+        total = report["created"] + report["rejected"]
+        if dry_run:
+            response_status = status.HTTP_200_OK
+        elif report["created"] == total and total:
+            response_status = status.HTTP_201_CREATED
+        elif report["created"]:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        verb = "valid" if dry_run else "imported"
+        logger.info(f"Listing import by {request.user}: {report['created']} of {total} {verb}")
+        return Response({"message": f"{report['created']} of {total} listings {verb}.", "data": report},
+                        status=response_status)
+
+
+@method_decorator(
+    condition(
+        etag_func=table_etag("listings:search", LISTING_CACHE_TABLES),
+        last_modified_func=table_last_modified(LISTING_CACHE_TABLES),
+    ),
+    name='get',
+)
+class ListingSearchView(APIView):
+    """API view to full-text search listing titles and descriptions, best match first."""
+    permission_classes = [AllowAny]
+    query_budgets = {"get": 2}
+
+    @reads_from_replica(unless_changed=LISTING_CACHE_TABLES)
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": {"q": ["This query parameter is required."]}},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            fields = parse_fields_param(request.query_params.get("fields"), ListingSerializer().fields)
+            limit = int(request.query_params.get("limit", settings.LISTINGS_PAGE_SIZE))
+            if limit < 1:
+                raise ValueError("limit must be a positive integer.")
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, settings.LISTINGS_MAX_PAGE_SIZE)
+
+        columns = ListingSerializer.model_fields_for(fields) if fields is not None else None
+        results = search_listings(query, limit, fields=columns)
+        if settings.FAST_SERIALIZERS:
+            data = fast_listing_serializer.serialize_objects(results, fields)
+        else:
+            data = ListingSerializer(results, many=True, fields=fields).data
+        for item, listing in zip(data, results):
+            item["rank"] = round(float(listing.rank), 6)
+
+        return Response({"message": "Search completed successfully.", "data": data})
+
+
+class ListingAvailabilityView(APIView):
+    """API view to list the listings that are free for a whole stay (cursor paginated)."""
+    permission_classes = [AllowAny]
+    query_budgets = {"get": 2}
+
+    def get(self, request):
+        query_serializer = ListingAvailabilitySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return Response({"error": query_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        params = query_serializer.validated_data
+
+        paginator = KeysetPaginator(LISTING_ORDERINGS[params["sort"]])
+        try:
+            fields = parse_fields_param(request.query_params.get("fields"), ListingSerializer().fields)
+        except ValueError as exc:
+            return Response({"error": {"fields": [str(exc)]}}, status=status.HTTP_400_BAD_REQUEST)
+
+        listings = filter_listings(Listing.objects.all(), params)
+        if params.get("listing_ids") is not None:
+            listings = listings.filter(pk__in=params["listing_ids"])
+        listings = available_listings(listings, params["check_in"], params["check_out"])
+
+        try:
+            data, next_cursor = paginate_listings(paginator, listings, request, fields)
+        except ValidationError as exc:
+            return Response({"error": exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "message": "Available listings retrieved successfully.",
+            "data": data,
+            "next_cursor": next_cursor,
+            "next": paginator.get_next_link(request, next_cursor),
+        })
+
+
 class BookingCreateView(APIView):
     """API view to create a booking for a listing."""
     permission_classes = [AllowAny]
+    query_budgets = {"post": 5}
     throttle_classes = [CustomScopedRateThrottle]
     throttle_scope = 'booking'
+    idempotency_scope = 'booking'
 
     def _trigger_email(self, user_email, booking_id):
-        """Helper method to trigger sending booking confirmation email asynchronously."""
-        try:
-            send_booking_confirmation_email.delay(user_email, booking_id)
-            logger.info(f"Celery task triggered for booking ID {booking_id} -> {user_email}")
-        except Exception:
-            logger.exception(f"Failed to trigger Celery email task for booking {booking_id}")
+        """Queue the booking confirmation email in the outbox; call inside the booking's transaction."""
+        outbox.enqueue(send_booking_confirmation_email, [user_email, str(booking_id)])
+        logger.info(f"Confirmation email queued for booking ID {booking_id} -> {user_email}")
 
+    @idempotent
     def post(self, request):
         serializer = BookingSerializer(data=request.data, context={'request': request})
 
         if serializer.is_valid():
             try:
-                booking = serializer.save()
-
-                # Determine user email (authenticated user or guest)
-                user_email = None
-                if booking.user and getattr(booking.user, 'email', None):
-                    user_email = booking.user.email
-                elif serializer.validated_data.get('email'):
-                    user_email = serializer.validated_data['email']
-
-                if user_email:
-                    self._trigger_email(user_email, booking.booking_id)
-                else:
-                    logger.warning(f"No email provided for booking ID {booking.id}. Email will not be sent.")
+                # The booking and its email job commit together, or not at all.
+                with transaction.atomic():
+                    booking = serializer.save()
+
+                    # Determine user email (authenticated user or guest)
+                    user_email = None
+                    if booking.user and getattr(booking.user, 'email', None):
+                        user_email = booking.user.email
+                    elif serializer.validated_data.get('email'):
+                        user_email = serializer.validated_data['email']
+
+                    if user_email:
+                        self._trigger_email(user_email, booking.booking_id)
+                    else:
+                        logger.warning(f"No email provided for booking ID {booking.booking_id}. "
+                                       f"Email will not be sent.")
 
                 return Response(
                     {
@@ -83,6 +282,11 @@ class BookingCreateView(APIView):
                     status=status.HTTP_201_CREATED
                 )
 
+            except BookingConflict as exc:
+                logger.info(f"Booking rejected, dates taken: {serializer.validated_data['listing'].pk} "
+                            f"{serializer.validated_data['check_in']}..{serializer.validated_data['check_out']}")
+                return Response({"error": exc.detail}, status=exc.status_code)
+
             except Exception:
                 logger.exception("Error while saving booking")
                 return Response(
@@ -94,14 +298,103 @@ class BookingCreateView(APIView):
         return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BookingBulkCreateView(APIView):
+    """API view to create many bookings (e.g. a group trip) in one request and one transaction."""
+    permission_classes = [AllowAny]
+    query_budgets = {"post": 5}
+    throttle_classes = [CustomScopedRateThrottle]
+    throttle_scope = 'booking_bulk'
+    idempotency_scope = 'booking_bulk'
+
+    def _trigger_emails(self, recipients):
+        """Queue every confirmation email of the batch as a single outbox job; call inside the batch's transaction."""
+        if not recipients:
+            return
+        outbox.enqueue(send_bulk_booking_confirmation_emails, [recipients])
+        logger.info(f"Bulk confirmation email queued for {len(recipients)} booking(s)")
+
+    @idempotent
+    def post(self, request):
+        items = request.data.get("bookings") if hasattr(request.data, "get") else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty 'bookings' list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BULK_BOOKING_MAX_ITEMS:
+            return Response({"error": f"At most {settings.BULK_BOOKING_MAX_ITEMS} bookings can be created at once."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Resolve every referenced listing with one IN query.
+        listing_field = Listing._meta.pk
+        listing_ids = set()
+        for item in items:
+            try:
+                listing_ids.add(listing_field.to_python(item.get("listing")))
+            except Exception:
+                continue
+        context = {'request': request, 'listings': Listing.objects.in_bulk(listing_ids - {None})}
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = BookingSerializer(data=item, context=context)
+            if serializer.is_valid():
+                valid.append((index, serializer))
+            else:
+                results[index] = {"index": index, "status": "error", "errors": serializer.errors}
+
+        bookings = [Booking(**serializer.validated_data) for _, serializer in valid]
+        try:
+            # The bookings and their email job commit together, or not at all.
+            with transaction.atomic():
+                created, conflicts = create_bookings_bulk(bookings)
+                recipients = []
+                for position, booking in enumerate(bookings):
+                    if position in conflicts:
+                        continue
+                    user_email = (booking.user.email if booking.user and getattr(booking.user, 'email', None)
+                                  else booking.email)
+                    if user_email:
+                        recipients.append([user_email, str(booking.booking_id)])
+                self._trigger_emails(recipients)
+        except BookingConflict as exc:
+            created, conflicts = [], set(range(len(valid)))
+            logger.warning(f"Bulk booking rejected by the overlap constraint: {exc.detail}")
+        except Exception:
+            logger.exception("Error while saving bulk bookings")
+            return Response({"error": "Internal server error while creating bookings."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if settings.FAST_SERIALIZERS:
+            rendered = fast_booking_serializer.serialize_objects(bookings)
+        else:
+            rendered = [BookingSerializer(booking).data for booking in bookings]
+        for position, ((index, _), data) in enumerate(zip(valid, rendered)):
+            if position in conflicts:
+                results[index] = {"index": index, "status": "error", "errors": BookingConflict.default_detail}
+                continue
+            results[index] = {"index": index, "status": "created", "data": data}
+
+        if len(created) == len(items):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        logger.info(f"Bulk booking: {len(created)} of {len(items)} created")
+        return Response({"message": f"{len(created)} of {len(items)} bookings created.", "data": results},
+                        status=response_status)
+
+
 class ReviewCreateView(APIView):
     """API view to create a review for a listing."""
     permission_classes = [AllowAny]
+    query_budgets = {"post": 3}
 
     def post(self, request):
         serializer = ReviewSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                review = serializer.save()
+                record_review_rating(review.listing_id, review.rating)
             return Response({"message": "Review created successfully.", "data": serializer.data},
                             status=status.HTTP_201_CREATED)
         logger.error(f"Review creation failed. Errors: {serializer.errors}")
@@ -112,8 +405,10 @@ class ReviewCreateView(APIView):
 class ChapaPaymentInitView(APIView):
     """API view to initialize a payment with Chapa."""
     permission_classes = [AllowAny]
+    query_budgets = {"post": 2}
     throttle_classes = [CustomScopedRateThrottle]
     throttle_scope = 'payment'
+    idempotency_scope = 'payment_init'
 
     def _create_payment_record(self, booking_id, amount, payment_reference, chapa_ref):
         """Helper method to create a payment record in the database."""
@@ -125,6 +420,7 @@ class ChapaPaymentInitView(APIView):
         )
         logger.info(f"Chapa payment record created: ETB{amount} | Ref: {payment_reference} | ChapaRef: {chapa_ref}")
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         amount = request.data.get("amount")
         email = request.data.get("email")
@@ -141,13 +437,10 @@ class ChapaPaymentInitView(APIView):
             #"return_url": "http://localhost:8000/success",
         }
 
-        headers = {"Authorization": f"Bearer {CHAPA_SECRET_KEY}"}
-
         try:
-            response = requests.post("https://api.chapa.co/v1/transaction/initialize", json=payload, headers=headers)
-            response_data = response.json()
+            status_code, response_data = get_chapa_client().initialize(payload)
 
-            if response.status_code == 200 and response_data.get("status") == "success":
+            if status_code == 200 and response_data.get("status") == "success":
                 checkout_url = response_data["data"]["checkout_url"]
                 chapa_ref = checkout_url.split("/")[-1]
 
@@ -164,6 +457,11 @@ class ChapaPaymentInitView(APIView):
             return Response({"error": "Failed to initialize payment", "details": response_data},
                             status=status.HTTP_400_BAD_REQUEST)
 
+        except ChapaUnavailable as exc:
+            logger.error(f"Chapa unavailable during payment initialization: {exc}")
+            return Response({"error": "Payment gateway is temporarily unavailable. Please try again later."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
         except Exception:
             logger.exception("Error initializing Chapa payment")
             return Response({"error": "Internal server error while initializing payment."},
@@ -172,119 +470,102 @@ class ChapaPaymentInitView(APIView):
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ChapaPaymentVerifyView(APIView):
-    """API view to verify a payment with Chapa."""
+    """API view to request verification of a payment with Chapa.
+
+    Verification runs in a Celery task; pending payments get a 202 with a status URL to poll.
+    """
     permission_classes = [AllowAny]
+    query_budgets = {"get": 2}
 
     def get(self, request, reference, *args, **kwargs):
-        headers = {"Authorization": f"Bearer {CHAPA_SECRET_KEY}"}
-
-        possible_refs = [reference]
-        if not reference.startswith("CHAP-"):
-            possible_refs.append(f"CHAP-{reference}")
-
         try:
-            for ref in possible_refs:
-                response = requests.get(
-                    f"https://api.chapa.co/v1/transaction/verify/{ref}",
-                    headers=headers
-                )
-                response_data = response.json()
-
-                logger.debug(f"Verifying payment reference: {ref}")
-
-                if response.status_code == 200 and response_data.get('status') == 'success':
-                    payment_data = response_data['data']
-                    tx_ref = payment_data.get('tx_ref')
-                    chapa_ref = payment_data.get('reference')
-                    chapa_status = payment_data.get('status')
-
-                    payment = Payments.objects.filter(
-                        models.Q(trxn_reference__in=[ref, tx_ref]) |
-                        models.Q(chapa_reference__in=[ref, chapa_ref])
-                    ).first()
-
-                    if payment:
-                        payment.status = chapa_status or payment.status
-                        if hasattr(payment, "chapa_response"):
-                            payment.chapa_response = payment_data
-                        payment.save()
-                        
-                        
-                        """Send payment status email asynchronously"""
-                        try:
-                            booking = payment.booking
-                            user_email = None
-                            if booking and booking.user and getattr(booking.user, 'email', None):
-                                user_email = booking.user.email
-                            elif getattr(booking, 'email', None):
-                                user_email = booking.email
-
-                            if user_email:
-                                from .tasks import send_payment_status_email
-                                send_payment_status_email.delay(
-                                    user_email,
-                                    chapa_status or "unknown",
-                                    payment.amount,
-                                    payment.trxn_reference
-                                )
-                            else:
-                                logger.warning(f"No email found for payment {payment.trxn_reference}")
-
-                        except Exception:
-                            logger.exception("Failed to queue payment status email")
-
-                        logger.info(f"Chapa payment verified: {chapa_ref} ({payment.status})")
-                        return Response({
-                            "message": "Payment verified successfully.",
-                            "reference": chapa_ref, 
-                            "tx_ref": tx_ref,
-                            "status": payment.status
-                        }, status=status.HTTP_200_OK)
-
-                    logger.warning(f"No payment found for tx_ref={tx_ref} or reference={chapa_ref}")
-                    return Response({"error": "Payment record not found."}, status=status.HTTP_404_NOT_FOUND)
-
-            logger.error(f"Verification failed for all references: {possible_refs}")
-            return Response({
-                "error": "Failed to verify payment.",
-                "details": response_data
-            }, status=status.HTTP_400_BAD_REQUEST)
+            payment = find_payment(reference)
+            if not payment:
+                logger.warning(f"No payment found for reference={reference}")
+                return Response({"error": "Payment record not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            status_url = request.build_absolute_uri(reverse('chapa-payment-status', args=[payment.trxn_reference]))
+            body = {
+                "reference": payment.chapa_reference,
+                "tx_ref": payment.trxn_reference,
+                "status": payment.status,
+                "status_url": status_url,
+            }
+
+            if payment.status != "pending":
+                return Response({"message": "Payment already verified.", **body}, status=status.HTTP_200_OK)
+
+            if claim_verification(payment):
+                try:
+                    outbox.enqueue(verify_payment, [str(payment.payment_id)])
+                except Exception:
+                    release_verification(payment)
+                    raise
+                logger.info(f"Chapa payment verification queued: {payment.trxn_reference}")
+            else:
+                logger.info(f"Chapa payment verification already queued: {payment.trxn_reference}")
+            return Response({"message": "Payment verification in progress.", **body}, status=status.HTTP_202_ACCEPTED)
 
         except Exception:
-            logger.exception("Error verifying Chapa payment")
+            logger.exception("Error queuing Chapa payment verification")
             return Response({"error": "Internal server error while verifying payment."},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class PaymentStatusView(APIView):
+    """API view to poll the current status of a payment."""
+    permission_classes = [AllowAny]
+    query_budgets = {"get": 1}
+
+    def get(self, request, reference, *args, **kwargs):
+        payment = find_payment(reference)
+        if not payment:
+            return Response({"error": "Payment record not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "message": "Payment status retrieved successfully.",
+            "reference": payment.chapa_reference,
+            "tx_ref": payment.trxn_reference,
+            "status": payment.status,
+        }, status=status.HTTP_200_OK)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class ChapaPaymentWebhookView(APIView):
-    """API view to handle Chapa payment webhook notifications."""
+    """API view to handle Chapa payment webhook notifications.
+
+    Deliveries are signature-checked, appended to the webhook event log and
+    acknowledged straight away; a Celery task applies them to the payment.
+    """
     permission_classes = [AllowAny]
+    query_budgets = {"post": 3}
+    throttle_classes = []
 
     def post(self, request, *args, **kwargs):
         try:
-            payload = request.data
-            logger.info(f"Received Chapa webhook payload: {payload}")
+            # Read the raw body before DRF parses it: the signature covers the exact bytes.
+            raw_body = request.body
+            if not verify_chapa_signature(raw_body, request.headers):
+                logger.warning("Chapa webhook rejected: invalid signature")
+                return Response({"error": "Invalid webhook signature."}, status=status.HTTP_401_UNAUTHORIZED)
 
-            chapa_reference = payload.get("reference")
-            status_chapa = payload.get("status")
+            try:
+                payload = json.loads(raw_body)
+            except ValueError:
+                return Response({"error": "Webhook payload must be JSON."}, status=status.HTTP_400_BAD_REQUEST)
 
-            if not chapa_reference:
+            if not isinstance(payload, dict) or not (payload.get("reference") or payload.get("tx_ref")):
                 logger.error("Chapa webhook missing 'reference' field")
                 return Response({"error": "Missing 'reference' in webhook payload"}, status=status.HTTP_400_BAD_REQUEST)
 
-            payment = Payments.objects.filter(chapa_reference=chapa_reference).first()
-            if not payment:
-                logger.error(f"No payment found for Chapa reference: {chapa_reference}")
-                return Response({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
+            event, created = accept_webhook_event(payload)
 
-            payment.status = status_chapa or payment.status
-            if hasattr(payment, "chapa_response"):
-                payment.chapa_response = payload
-            payment.save()
+            if not created:
+                logger.info(f"Duplicate Chapa webhook {event.event_id} ignored")
+                return Response({"message": "Webhook already received."}, status=status.HTTP_200_OK)
 
-            logger.info(f"Chapa webhook processed successfully for reference: {chapa_reference} with status: {payment.status}")
-            return Response({"message": "Webhook processed successfully."}, status=status.HTTP_200_OK)
+            logger.info(f"Chapa webhook {event.event_id} accepted for reference: {event.reference or event.tx_ref}")
+            return Response({"message": "Webhook received."}, status=status.HTTP_200_OK)
 
         except Exception:
             logger.exception("Error processing Chapa webhook")
@@ -295,6 +576,7 @@ class ChapaPaymentWebhookView(APIView):
 class ServiceHealthCheck(APIView):
     """API view to check the health status of the service."""
     permission_classes = [AllowAny]
+    query_budgets = {"get": 1}
 
     def get(self, request):
         try:
@@ -302,10 +584,12 @@ class ServiceHealthCheck(APIView):
             with connection.cursor() as cursor:
                 cursor.execute("SELECT 1;")
 
-            return Response(
-                {"status": "Service is up and running."},
-                status=status.HTTP_200_OK
-            )
+            # Replicas are reported but not required: reads fall back to the primary without them.
+            body = {"status": "Service is up and running."}
+            if settings.DATABASE_REPLICAS:
+                body["replicas"] = {alias: "up" if replica_health.probe(alias) else "down"
+                                    for alias in settings.DATABASE_REPLICAS}
+            return Response(body, status=status.HTTP_200_OK)
 
         except Exception as e:
             logger.exception("Health check failed")
@@ -313,5 +597,52 @@ class ServiceHealthCheck(APIView):
                 {"status": "Service is unhealthy.", "error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-   
-      
\ No newline at end of file
+
+
+class DataExportView(APIView):
+    """
+    Admin-only streaming dump of listings, bookings or payments as NDJSON or CSV, optionally gzipped.
+
+    Rows are streamed off a server-side cursor as they are read, so memory use
+    does not grow with the table.
+    """
+    permission_classes = [IsAdminUser]
+    query_budgets = {"get": 1}  # one cursor for the whole export, however many rows
+
+    @reads_from_replica
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            return Response({"error": f"Unknown dataset. Choose one of: {', '.join(DATASETS)}."},
+                            status=status.HTTP_404_NOT_FOUND)
+        query_serializer = ExportQuerySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return Response({"error": query_serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        params = query_serializer.validated_data
+
+        export_format, compress = params["output"], params["gzip"]
+        content_type = "application/gzip" if compress else FORMATS[export_format][0]
+        # Rows are read after this method returns, so pin the export to the database chosen now.
+        using = router.db_for_read(DATASETS[dataset].serializer_class.Meta.model)
+        response = StreamingHttpResponse(
+            export_stream(dataset, export_format, compress, params.get("created_after"), params.get("created_before"),
+                          using),
+            content_type=content_type,
+        )
+        filename = export_filename(dataset, export_format, compress)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        logger.info(f"Export of {dataset} ({filename}) started by {request.user}")
+        return response
+
+
+class MetricsView(APIView):
+    """API view exposing request, database, serializer and Chapa metrics in Prometheus text format.
+
+    Readable by staff, or by a scraper holding METRICS_TOKEN (see CanReadMetrics).
+    """
+    permission_classes = [CanReadMetrics]
+    query_budgets = {"get": 0}
+    throttle_classes = []
+
+    def get(self, request):
+        body, content_type = render_metrics()
+        return HttpResponse(body, content_type=content_type)